@@ -5,19 +5,49 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Application Initialization for Flask Application."""
 
+import secrets
+from pathlib import Path
+
 from flask import Flask
 from flask_sanitize_escape import SanitizeEscapeExtension
 
-from app import config
+from app import admission, compression, config, database, metrics
+from app.api.routes import blueprint as api_bp
+from app.assets.pipeline import AssetManifest
+from app.assets.routes import asset_url_for
+from app.assets.routes import blueprint as assets_bp
+from app.circuit_breaker import CircuitBreaker
+from app.commands import (
+    assets_cli,
+    related_clips_cli,
+    search_index_cli,
+    sitemaps_cli,
+    slow_queries_cli,
+    sqlite_cli,
+)
 from app.errors import handlers
+from app.main.backends import create_backend
+from app.main.cache import DataVersionMonitor, SearchCache
+from app.main.memory_index import MemorySearchEngine
 from app.main.redirects import blueprint as redirects_bp
+from app.main.related import RelatedClips
 from app.main.routes import blueprint as main_bp
+from app.main.search import SearchStrategy
+from app.main.single_flight import SingleFlight
+from app.main.suggest import SuggestionEngine
+from app.prerender import PageCache
+from app.sitemaps.clips import ClipSitemaps
 from app.sitemaps.routes import blueprint as sitemaps_bp
+from app.slow_queries import SlowQueryLog
+from app.status.routes import blueprint as status_bp
 from app.utilities import current_year
 from app.version import APP_VERSION
 
 
-def create_app() -> Flask:
+def create_app(
+    app_settings_path: str = "app_settings.json",
+    database_settings_path: str = "database_settings.json",
+) -> Flask:
     """Create and initialize Flask application."""
     app = Flask(__name__)
     app.url_map.strict_slashes = False
@@ -30,16 +60,123 @@ def create_app() -> Flask:
 
     # Register error handlers
     app.register_error_handler(404, handlers.not_found)
+    app.register_error_handler(429, handlers.too_many_requests)
     app.register_error_handler(500, handlers.handle_exception)
 
     # Load Application and Database Settings Files
-    _app_settings = config.load_app_settings()
-    _database_settings = config.load_database_settings()
+    _app_settings = config.load_app_settings(app_settings_path=app_settings_path)
+    _database_settings = config.load_database_settings(
+        database_settings_path=database_settings_path
+    )
     _database_settings["time_zone"] = _app_settings["time_zone"]
 
     app.config["app_settings"] = _app_settings
     app.config["database_settings"] = _database_settings
 
+    # Set the secret key used to sign pagination cursors. Cursors signed
+    # with a random key are only accepted by the worker that created them.
+    app.secret_key = _app_settings["secret_key"] or secrets.token_hex(32)
+
+    # Create and warm up the per-worker database connection pool
+    database_pool = database.init_app(app)
+
+    # Create the clip search backend selected in the database settings
+    app.extensions["search_backend"] = create_backend(
+        _database_settings["backend"],
+        search_strategy=SearchStrategy(_app_settings["search_strategy"]),
+    )
+
+    # Register request timing and metrics hooks
+    metrics.init_app(app)
+
+    # Register the response compression stage
+    compression.init_app(app)
+
+    # Create the per-worker slow query log
+    if _app_settings["slow_query_log"]:
+        app.extensions["slow_query_log"] = SlowQueryLog(
+            log_path=_app_settings["slow_query_log"],
+            database_settings=_database_settings,
+            threshold=_app_settings["slow_query_threshold"] / 1000,
+            # EXPLAIN ANALYZE is only captured for MySQL queries
+            explain_rate=(
+                _app_settings["slow_query_explain_rate"]
+                if _database_settings["backend"] == "mysql"
+                else 0
+            ),
+            max_bytes=_app_settings["slow_query_log_max_bytes"],
+            backup_count=_app_settings["slow_query_log_backups"],
+        )
+
+    # Create the per-worker data version monitor and search result cache
+    app.extensions["data_version"] = DataVersionMonitor(
+        database_pool, interval=_app_settings["data_version_interval"]
+    )
+    if _app_settings["search_cache_size"]:
+        app.extensions["search_cache"] = SearchCache(
+            max_entries=_app_settings["search_cache_size"],
+            ttl=_app_settings["search_cache_ttl"],
+        )
+
+    # Create the per-worker database circuit breaker
+    if _app_settings["circuit_breaker_threshold"]:
+        app.extensions["circuit_breaker"] = CircuitBreaker(
+            database_pool,
+            failure_threshold=_app_settings["circuit_breaker_threshold"],
+            probe_interval=_app_settings["circuit_breaker_probe_interval"],
+        )
+
+    # Create the admission control, which shares client token buckets and
+    # search slots with the other workers on the host
+    admission.init_app(app)
+
+    # Create the per-worker request coalescing for backend searches and
+    # clip lookups
+    if _app_settings["single_flight_timeout"]:
+        app.extensions["single_flight"] = SingleFlight(
+            timeout=_app_settings["single_flight_timeout"]
+        )
+
+    # Create and load the per-worker memory-resident search index
+    if _app_settings["search_engine"] == "memory":
+        search_engine = MemorySearchEngine(
+            app.extensions["data_version"],
+            refresh_interval=_app_settings["search_index_refresh_interval"],
+            snapshot_path=_app_settings["search_index_snapshot"],
+        )
+        app.extensions["search_engine"] = search_engine
+        search_engine.refresh()
+
+    # Create and load the per-worker related clips, which are built using
+    # the flask related-clips build command
+    if _app_settings["related_clips_path"]:
+        related_clips = RelatedClips(
+            related_path=_app_settings["related_clips_path"],
+            limit=_app_settings["related_clips_count"],
+        )
+        app.extensions["related_clips"] = related_clips
+        related_clips.load()
+
+    # Create the clip sitemaps, which are built when first requested or
+    # using the flask sitemaps build command. Sitemap URLs must be
+    # absolute, so clip sitemaps also require the site URL to be set.
+    if _app_settings["sitemap_directory"] and _app_settings.get("site_url"):
+        app.extensions["clip_sitemaps"] = ClipSitemaps(
+            directory=_app_settings["sitemap_directory"],
+            site_url=_app_settings["site_url"],
+            refresh_interval=_app_settings["sitemap_refresh_interval"],
+        )
+
+    # Create and load the per-worker search query suggestion index
+    if _app_settings["enable_suggestions"]:
+        suggest_engine = SuggestionEngine(
+            app.extensions["data_version"],
+            refresh_interval=_app_settings["suggest_refresh_interval"],
+            limit=_app_settings["suggest_max_results"],
+        )
+        app.extensions["suggest_engine"] = suggest_engine
+        suggest_engine.refresh()
+
     # Add Jinja globals
     app.jinja_env.globals["app_version"] = APP_VERSION
     app.jinja_env.globals["block_ai_scrapers"] = bool(
@@ -48,6 +185,8 @@ def create_app() -> Flask:
     app.jinja_env.globals["enable_query_expansion_mode"] = bool(
         _app_settings.get("enable_query_expansion_mode", False)
     )
+    app.jinja_env.globals["enable_clip_sitemaps"] = "clip_sitemaps" in app.extensions
+    app.jinja_env.globals["enable_suggestions"] = _app_settings["enable_suggestions"]
     app.jinja_env.globals["current_year"] = current_year
     app.jinja_env.globals["git_repository"] = _app_settings.get("git_repository")
     app.jinja_env.globals["max_query_length"] = _app_settings["max_query_length"]
@@ -62,13 +201,36 @@ def create_app() -> Flask:
         _app_settings.get("use_minified_css", False)
     )
 
+    # Load the fingerprinted static file manifest written by the flask
+    # assets build command. Static file URLs are only fingerprinted if
+    # the manifest has been built.
+    if _app_settings["use_fingerprinted_assets"]:
+        asset_manifest = AssetManifest.load(Path(app.static_folder) / "dist")
+        if asset_manifest:
+            app.extensions["asset_manifest"] = asset_manifest
+            app.jinja_env.globals["url_for"] = asset_url_for
+
+    # Create the per-worker pre-rendered page cache
+    app.extensions["page_cache"] = PageCache(app)
+
     # Register Flask Sanitize Escape
     sanitize_extension = SanitizeEscapeExtension(app, sanitize_quotes=False)
     sanitize_extension.init_app(app)
 
     # Register Application Blueprints
     app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(assets_bp)
     app.register_blueprint(redirects_bp)
     app.register_blueprint(sitemaps_bp)
+    app.register_blueprint(status_bp)
+
+    # Register Application Commands
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(related_clips_cli)
+    app.cli.add_command(search_index_cli)
+    app.cli.add_command(sitemaps_cli)
+    app.cli.add_command(slow_queries_cli)
+    app.cli.add_command(sqlite_cli)
 
     return app
@@ -0,0 +1,360 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Request Admission Control Functions.
+
+Search and clip requests are admitted using a token bucket for each
+client address, and each request takes tokens based on its cost, so
+expensive search modes and deep result pages use up the bucket sooner.
+Token buckets are stored in a memory-mapped file shared by all Gunicorn
+workers on a host. Searches that need to query the database also take
+one of a fixed number of search slots shared by all workers. Requests
+that are over their rate limit or find no free search slot are rejected
+right away with a 429 response rather than queued.
+"""
+
+import fcntl
+import hashlib
+import ipaddress
+import math
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+from collections.abc import Callable
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, current_app, g, request
+from werkzeug.exceptions import TooManyRequests
+
+from app.main.search import SearchMode
+from app.metrics import record_admission_rejection
+
+# Request costs in tokens. Deep result pages are more expensive as the
+# database reads and discards every result before the requested page.
+CLIP_COST: float = 0.5
+SEARCH_MODE_COSTS: dict[SearchMode, float] = {
+    SearchMode.NATURAL: 1,
+    SearchMode.BOOLEAN: 2,
+    SearchMode.EXPANDED: 4,
+}
+DEEP_PAGE_INTERVAL: int = 5
+MAX_PAGE_MULTIPLIER: int = 8
+
+# Exports stream every matching clip and hold a search slot until the
+# last clip has been sent, so they take a flat cost close to a full bucket
+EXPORT_COST: float = 16
+
+# Shared token bucket file layout: a header with a format identifier and
+# a salt for hashing client addresses, followed by a fixed number of
+# bucket slots with a client address hash, token count and update time
+_MAGIC: bytes = b"MGADMIT1"
+_HEADER = struct.Struct("<8s16s")
+_SLOT = struct.Struct("<Qdd")
+BUCKET_SLOTS: int = 65536
+_PROBE_LENGTH: int = 8
+_FILE_SIZE: int = _HEADER.size + BUCKET_SLOTS * _SLOT.size
+
+# Byte-range lock offsets. Search slots are locked past the end of the
+# file, so locks held by a worker that exits are released by the kernel.
+_TABLE_LOCK_OFFSET: int = 0
+_SEARCH_LOCK_OFFSET: int = _FILE_SIZE
+
+
+def search_cost(search_mode: SearchMode, page: int) -> float:
+    """Return the cost of a search request in tokens."""
+    multiplier = min(1 + (max(page, 1) - 1) // DEEP_PAGE_INTERVAL, MAX_PAGE_MULTIPLIER)
+    return SEARCH_MODE_COSTS[search_mode] * multiplier
+
+
+def client_address(header: str | None = None) -> str:
+    """Return the client address used to select a token bucket.
+
+    If a header is set, the address is taken from the header set by the
+    front-end HTTP server. IPv6 addresses are reduced to their /64
+    network, as a single client is usually assigned a whole /64 network.
+    """
+    address = (request.headers.get(header) if header else None) or (
+        request.remote_addr or ""
+    )
+    address = address.split(",")[-1].strip()
+    try:
+        parsed = ipaddress.ip_address(address)
+    except ValueError:
+        return address
+
+    if isinstance(parsed, ipaddress.IPv6Address):
+        if parsed.ipv4_mapped:
+            return str(parsed.ipv4_mapped)
+        return str(ipaddress.ip_network(f"{parsed}/64", strict=False))
+    return str(parsed)
+
+
+class AdmissionControl:
+    """Token bucket rate limiter and search slots shared by workers.
+
+    Each client bucket holds up to ``capacity`` tokens and refills at
+    ``refill_rate`` tokens per second. Up to ``max_searches`` database
+    searches can run at once across all workers using the same file, or
+    any number if ``max_searches`` is 0. Buckets are stored in a fixed
+    number of slots, so buckets of clients that have not been seen for
+    the longest time are replaced when the slots near a client are full.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: float = 30,
+        refill_rate: float = 0.5,
+        max_searches: int = 0,
+    ) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_searches = max_searches
+
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._fd: int | None = None
+        self._map: mmap.mmap | None = None
+        self._salt: bytes = b""
+        self._held_searches: set[int] = set()
+        self._admitted = 0
+        self._rate_limited = 0
+        self._search_limited = 0
+
+    def _open(self) -> None:
+        """Open and map the shared file, creating it if needed.
+
+        Called with the instance lock held. Forked processes keep using
+        the inherited file and mapping, but do not hold the search slots
+        locked by their parent process, as byte-range locks are not
+        inherited. The file is never closed, as closing any descriptor
+        for a file releases all byte-range locks held on it.
+        """
+        if self._fd is not None:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._held_searches = set()
+            return
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o660)
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, _TABLE_LOCK_OFFSET)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if len(header) < _HEADER.size or header[: len(_MAGIC)] != _MAGIC:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, _FILE_SIZE)
+                header = _HEADER.pack(_MAGIC, secrets.token_bytes(16))
+                os.pwrite(fd, header, 0)
+            elif os.fstat(fd).st_size < _FILE_SIZE:
+                os.ftruncate(fd, _FILE_SIZE)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, _TABLE_LOCK_OFFSET)
+
+        self._fd = fd
+        self._map = mmap.mmap(fd, _FILE_SIZE)
+        self._salt = _HEADER.unpack(header)[1]
+        self._pid = os.getpid()
+
+    def _client_hash(self, client: str) -> int:
+        digest = hashlib.blake2b(
+            client.encode("utf-8"), digest_size=8, key=self._salt
+        ).digest()
+        # A hash of 0 marks an empty slot
+        return int.from_bytes(digest, "little") or 1
+
+    def admit(self, client: str, cost: float) -> float | None:
+        """Take tokens from a client bucket.
+
+        Returns None if the request is admitted, or the number of seconds
+        until the bucket holds enough tokens if it is not.
+        """
+        cost = min(cost, self.capacity)
+        with self._lock:
+            self._open()
+            client_hash = self._client_hash(client)
+            start = client_hash % BUCKET_SLOTS
+            now = time.time()
+
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _TABLE_LOCK_OFFSET)
+            try:
+                # Find the client bucket, or the least recently updated
+                # nearby slot to replace
+                offset: int = 0
+                tokens: float = self.capacity
+                oldest: float = math.inf
+                for probe in range(_PROBE_LENGTH):
+                    slot_offset = (
+                        _HEADER.size + ((start + probe) % BUCKET_SLOTS) * _SLOT.size
+                    )
+                    slot_hash, slot_tokens, updated = _SLOT.unpack_from(
+                        self._map, slot_offset
+                    )
+                    if slot_hash == client_hash:
+                        offset = slot_offset
+                        elapsed = max(now - updated, 0.0)
+                        tokens = min(
+                            self.capacity, slot_tokens + elapsed * self.refill_rate
+                        )
+                        break
+                    if updated < oldest:
+                        offset, oldest = slot_offset, updated
+
+                retry_after: float | None = None
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    retry_after = (cost - tokens) / self.refill_rate
+                _SLOT.pack_into(self._map, offset, client_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _TABLE_LOCK_OFFSET)
+
+            if retry_after is None:
+                self._admitted += 1
+            else:
+                self._rate_limited += 1
+            return retry_after
+
+    def acquire_search(self) -> int | None:
+        """Take a free search slot, or return None if all slots are in use."""
+        with self._lock:
+            self._open()
+            for slot in range(self.max_searches):
+                if slot in self._held_searches:
+                    continue
+                try:
+                    fcntl.lockf(
+                        self._fd,
+                        fcntl.LOCK_EX | fcntl.LOCK_NB,
+                        1,
+                        _SEARCH_LOCK_OFFSET + slot,
+                    )
+                except OSError:
+                    continue
+
+                self._held_searches.add(slot)
+                return slot
+
+            self._search_limited += 1
+            return None
+
+    def release_search(self, slot: int) -> None:
+        """Release a search slot taken by acquire_search()."""
+        with self._lock:
+            if self._pid != os.getpid() or slot not in self._held_searches:
+                return
+            self._held_searches.discard(slot)
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _SEARCH_LOCK_OFFSET + slot)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return admission control statistics for this worker."""
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "refill_rate": self.refill_rate,
+                "max_searches": self.max_searches,
+                "active_searches": len(self._held_searches),
+                "admitted": self._admitted,
+                "rate_limited": self._rate_limited,
+                "search_limited": self._search_limited,
+            }
+
+
+def _reject(retry_after: float, reason: str) -> None:
+    record_admission_rejection(reason, request.endpoint or "unmatched")
+    raise TooManyRequests(retry_after=max(math.ceil(retry_after), 1))
+
+
+def admission_control(cost: Callable[[], float]) -> Callable:
+    """Admit a request to a view using the client token bucket.
+
+    The cost of the request is returned by ``cost``, and requests with
+    no cost, such as the page shown without a search query, are always
+    admitted.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            admission: AdmissionControl | None = current_app.extensions.get(
+                "admission_control"
+            )
+            request_cost = cost() if admission else 0
+            if request_cost:
+                retry_after = admission.admit(
+                    client_address(
+                        current_app.config["app_settings"]["rate_limit_client_header"]
+                    ),
+                    request_cost,
+                )
+                if retry_after is not None:
+                    _reject(retry_after, "rate_limit")
+
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def acquire_search_slot() -> None:
+    """Take a search slot for the rest of the request.
+
+    Rejects the request if all search slots are in use. The slot is
+    released once the response has been sent, which is after the last
+    part has been sent for streamed responses.
+    """
+    admission: AdmissionControl | None = current_app.extensions.get("admission_control")
+    if not admission or not admission.max_searches or "search_slot" in g:
+        return
+
+    slot = admission.acquire_search()
+    if slot is None:
+        _reject(1, "search_limit")
+    g.search_slot = slot
+
+
+def _release_search_slot_after(response: Response) -> Response:
+    slot: int | None = g.pop("search_slot", None)
+    if slot is None:
+        return response
+
+    admission: AdmissionControl = current_app.extensions["admission_control"]
+    if response.is_streamed:
+        # Streamed responses are rendered after the view returns, and
+        # Flask runs request teardown both when the view returns and
+        # when the stream ends, so the slot is released on close
+        response.call_on_close(lambda: admission.release_search(slot))
+    else:
+        admission.release_search(slot)
+    return response
+
+
+def _release_search_slot(_error: BaseException | None = None) -> None:
+    slot: int | None = g.pop("search_slot", None)
+    if slot is not None:
+        current_app.extensions["admission_control"].release_search(slot)
+
+
+def init_app(app: Flask) -> None:
+    """Create the admission control if a shared file path is set."""
+    app_settings = app.config["app_settings"]
+    if not app_settings["rate_limit_path"]:
+        return
+
+    app.extensions["admission_control"] = AdmissionControl(
+        path=app_settings["rate_limit_path"],
+        capacity=app_settings["rate_limit_capacity"],
+        refill_rate=app_settings["rate_limit_refill_rate"],
+        max_searches=app_settings["rate_limit_max_searches"],
+    )
+    app.after_request(_release_search_slot_after)
+    app.teardown_request(_release_search_slot)
@@ -0,0 +1,241 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""API Routes."""
+
+import json
+import math
+from collections.abc import Iterator
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    g,
+    jsonify,
+    stream_with_context,
+)
+from mysql.connector.errors import Error
+
+from app.admission import (
+    CLIP_COST,
+    EXPORT_COST,
+    acquire_search_slot,
+    admission_control,
+    search_cost,
+)
+from app.caching import clip_surrogate_keys, conditional_response
+from app.main.backends import SearchBackend
+from app.main.clip import Clip
+from app.main.results import (
+    cached_search_results,
+    retrieve_backend_search_results,
+    retrieve_clip,
+)
+from app.main.search import SearchMode, parse_search_mode
+from app.main.suggest import SuggestionEngine
+from app.metrics import record_database_error
+
+blueprint = Blueprint("api", __name__, url_prefix="/api")
+
+
+def _clip_surrogate_keys() -> str:
+    """Return surrogate keys used to purge cached clip API responses."""
+    return clip_surrogate_keys("clips api api-clip", "api-clip")
+
+
+def _search_surrogate_keys() -> str:
+    """Return surrogate keys used to purge cached search API responses."""
+    return "clips api api-search"
+
+
+def _suggest_surrogate_keys() -> str:
+    """Return surrogate keys used to purge cached suggestion API responses."""
+    return "clips api api-suggest"
+
+
+def _clip_cost() -> float:
+    """Return the admission control cost of a clip API request."""
+    return CLIP_COST if (g.sanitized_args.get("key") or "").strip() else 0
+
+
+def _search_cost() -> float:
+    """Return the admission control cost of a search API request."""
+    request_data = g.sanitized_args
+    if not (request_data.get("query") or "").strip():
+        return 0
+
+    if request_data.get("format") == "ndjson":
+        return EXPORT_COST
+
+    try:
+        page: int = int(request_data.get("page", 1))
+    except ValueError:
+        page = 1
+
+    search_mode, _ = parse_search_mode(
+        request_data.get("mode", 1),
+        enable_query_expansion_mode=current_app.config["app_settings"][
+            "enable_query_expansion_mode"
+        ],
+    )
+    return search_cost(search_mode, page)
+
+
+def _error_response(error: str, status_code: int) -> Response:
+    """Return a JSON error response."""
+    response: Response = jsonify({"error": error})
+    response.status_code = status_code
+    return response
+
+
+def _ndjson_lines(search_query: str, search_mode: SearchMode) -> Iterator[str]:
+    """Yield every matching clip as a newline-delimited JSON line."""
+    batch_size: int = current_app.config["app_settings"]["api_stream_batch_size"]
+    search_backend: SearchBackend = current_app.extensions["search_backend"]
+    try:
+        for clip in search_backend.stream(
+            search_query=search_query,
+            search_mode=search_mode,
+            batch_size=batch_size,
+        ):
+            yield json.dumps(clip.as_dict(), separators=(",", ":")) + "\n"
+    except Error:
+        record_database_error("DatabaseError", "export")
+
+        # Headers have already been sent, so errors are reported as the
+        # last line of the stream
+        yield json.dumps({"error": "DatabaseError"}) + "\n"
+
+
+@blueprint.route("/clip")
+@conditional_response(
+    max_age=300, shared_max_age=3600, surrogate_keys=_clip_surrogate_keys
+)
+@admission_control(cost=_clip_cost)
+def clip() -> Response:
+    """API: Clip Information."""
+    _key: str | None = g.sanitized_args.get("key")
+    if not _key:
+        return _error_response("MissingClipKey", 400)
+
+    # Strip whitespaces from and enforce clip key ID length to 254
+    _key = _key.strip()[:254]
+    _clip: Clip | dict[str, str] | None = retrieve_clip(_key)
+
+    if isinstance(_clip, dict):
+        return _error_response(_clip["error"], 503)
+
+    if not _clip:
+        return _error_response("ClipNotFound", 404)
+
+    return jsonify({**_clip.as_dict(), "stale": g.get("stale_results", False)})
+
+
+@blueprint.route("/search")
+@conditional_response(
+    max_age=60, shared_max_age=300, surrogate_keys=_search_surrogate_keys
+)
+@admission_control(cost=_search_cost)
+def search() -> Response:
+    """API: Search Results.
+
+    Returns a page of search results as JSON, or every matching clip as
+    newline-delimited JSON if the ``format`` argument is ``ndjson``.
+    """
+    request_data = g.sanitized_args
+    query: str | None = request_data.get("query")
+    if not query or not query.strip():
+        return _error_response("MissingQuery", 400)
+
+    # Strip whitespaces from and enforce length limit on query string
+    query = query.strip()
+    query = query[: current_app.config["app_settings"]["max_query_length"]]
+
+    search_mode, _ = parse_search_mode(
+        request_data.get("mode", 1),
+        enable_query_expansion_mode=current_app.config["app_settings"][
+            "enable_query_expansion_mode"
+        ],
+    )
+    g.search_mode = search_mode
+
+    # Exports hold a search slot until the last clip has been sent, and
+    # are not cacheable as database errors are reported after the headers
+    if request_data.get("format") == "ndjson":
+        acquire_search_slot()
+        g.response_cacheable = False
+        return Response(
+            stream_with_context(_ndjson_lines(query, search_mode)),
+            mimetype="application/x-ndjson",
+        )
+
+    try:
+        page: int = int(request_data.get("page", 1))
+        page = max(page, 1)
+    except ValueError:
+        page = 1
+
+    results_per_page: int = current_app.config["app_settings"]["results_per_page"]
+    offset: int = (page - 1) * results_per_page
+    results_info: dict[str, int | list[Clip]] | None = cached_search_results(
+        search_query=query,
+        search_mode=search_mode,
+        results_per_page=results_per_page,
+        offset=offset,
+    )
+    if results_info is None:
+        acquire_search_slot()
+        results_info = retrieve_backend_search_results(
+            search_query=query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+        )
+
+    if "error" in results_info:
+        return _error_response(results_info["error"], 503)
+
+    return jsonify(
+        {
+            "query": query,
+            "mode": search_mode.value,
+            "page": page,
+            "total_pages": math.ceil(results_info["total_count"] / results_per_page),
+            "total_count": results_info["total_count"],
+            "returned_count": results_info["returned_count"],
+            "results": [clip.as_dict() for clip in results_info["results"]],
+            "stale": g.get("stale_results", False),
+        }
+    )
+
+
+@blueprint.route("/suggest")
+@conditional_response(
+    max_age=60, shared_max_age=300, surrogate_keys=_suggest_surrogate_keys
+)
+def suggest() -> Response:
+    """API: Search Query Suggestions."""
+    suggest_engine: SuggestionEngine | None = current_app.extensions.get(
+        "suggest_engine"
+    )
+    if not suggest_engine:
+        abort(404)
+
+    request_data = g.sanitized_args
+    prefix: str = request_data.get("prefix") or ""
+    prefix = prefix[: current_app.config["app_settings"]["max_query_length"]]
+    try:
+        limit: int | None = int(request_data["limit"])
+        limit = max(limit, 1)
+    except (KeyError, ValueError):
+        limit = None
+
+    suggestions: list[str] | None = suggest_engine.suggest(prefix, limit=limit)
+    if suggestions is None:
+        return _error_response("SuggestionsUnavailable", 503)
+
+    return jsonify({"prefix": prefix, "suggestions": suggestions})
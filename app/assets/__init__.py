@@ -0,0 +1,6 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Fingerprinted Static Asset Routes Module."""
@@ -0,0 +1,171 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Fingerprinted Static Asset Build Functions.
+
+Static files are copied into an output directory with a hash of their
+contents added to their file names, along with gzip and Brotli
+compressed copies of text files and a manifest that maps static file
+names to fingerprinted file names. References to other static files in
+stylesheets and source map comments in scripts are rewritten to the
+fingerprinted file names, so a change to a font also changes the file
+name of the stylesheet that uses it.
+"""
+
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from app.compression import ENCODINGS, compress
+
+MANIFEST_NAME: str = "manifest.json"
+
+# Static file types that are fingerprinted
+ASSET_EXTENSIONS: frozenset[str] = frozenset(
+    {".css", ".ico", ".js", ".map", ".png", ".svg", ".woff", ".woff2"}
+)
+
+# Static file types that are also written as compressed copies. Fonts
+# and images are already compressed.
+COMPRESSED_EXTENSIONS: frozenset[str] = frozenset({".css", ".js", ".map", ".svg"})
+
+_CSS_URL_PATTERN: re.Pattern = re.compile(r"""url\(\s*(['"]?)([^'")]+?)\1\s*\)""")
+_SOURCE_MAP_PATTERN: re.Pattern = re.compile(r"(sourceMappingURL=)(\S+)")
+_REFERENCE_PATTERN: re.Pattern = re.compile(r"([^?#]*)(.*)", re.DOTALL)
+
+# File name suffixes of compressed copies by content encoding
+ENCODING_SUFFIXES: dict[str, str] = {"br": "br", "gzip": "gz"}
+
+
+def _fingerprinted_name(path: str, data: bytes) -> str:
+    """Return a file path with a hash of the file contents in its name."""
+    path_object = PurePosixPath(path)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return str(
+        path_object.with_name(f"{path_object.stem}.{digest}{path_object.suffix}")
+    )
+
+
+def _rewrite_reference(
+    reference: str, source: str, fingerprinted: dict[str, str]
+) -> str | None:
+    """Return a reference to the fingerprinted name of a static file.
+
+    Fingerprinted files are written to the same relative directory as
+    their source files, so references stay relative. Returns None if the
+    reference is not to a fingerprinted static file.
+    """
+    if reference.startswith(("data:", "http:", "https:", "//", "/", "#")):
+        return None
+
+    target, suffix = _REFERENCE_PATTERN.fullmatch(reference).groups()
+    directory = posixpath.dirname(source)
+    target_path = posixpath.normpath(posixpath.join(directory, target))
+    if target_path not in fingerprinted:
+        return None
+
+    return f"{posixpath.relpath(fingerprinted[target_path], directory)}{suffix}"
+
+
+def _rewrite(path: str, data: bytes, fingerprinted: dict[str, str]) -> bytes:
+    """Rewrite static file references in a stylesheet or script."""
+    suffix = PurePosixPath(path).suffix
+    if suffix not in (".css", ".js"):
+        return data
+
+    text = data.decode("utf-8")
+    if suffix == ".css":
+        pattern = _CSS_URL_PATTERN
+
+        def _replace(match: re.Match) -> str:
+            reference = _rewrite_reference(match.group(2), path, fingerprinted)
+            if reference is None:
+                return match.group(0)
+            return f"url({match.group(1)}{reference}{match.group(1)})"
+
+    else:
+        pattern = _SOURCE_MAP_PATTERN
+
+        def _replace(match: re.Match) -> str:
+            reference = _rewrite_reference(match.group(2), path, fingerprinted)
+            if reference is None:
+                return match.group(0)
+            return f"{match.group(1)}{reference}"
+
+    return pattern.sub(_replace, text).encode("utf-8")
+
+
+def build_assets(static_folder: str | Path, output_path: str | Path) -> dict[str, Any]:
+    """Build fingerprinted copies of static files and their manifest.
+
+    Files from previous builds are kept, so pages rendered before a new
+    build can still load the files they reference. Returns the manifest.
+    """
+    static_folder = Path(static_folder).resolve()
+    output_path = Path(output_path).resolve()
+    sources = sorted(
+        path.relative_to(static_folder).as_posix()
+        for path in static_folder.rglob("*")
+        if path.is_file()
+        and path.suffix in ASSET_EXTENSIONS
+        and output_path not in path.parents
+    )
+
+    # Stylesheets and scripts are fingerprinted after the files they
+    # reference, so their contents include the fingerprinted names
+    sources.sort(key=lambda source: PurePosixPath(source).suffix in (".css", ".js"))
+
+    fingerprinted: dict[str, str] = {}
+    manifest: dict[str, Any] = {}
+    for source in sources:
+        data = _rewrite(source, (static_folder / source).read_bytes(), fingerprinted)
+        fingerprinted[source] = _fingerprinted_name(source, data)
+
+        destination = output_path / fingerprinted[source]
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_bytes(data)
+
+        encodings: list[str] = []
+        if PurePosixPath(source).suffix in COMPRESSED_EXTENSIONS:
+            for encoding in ENCODINGS:
+                compressed = compress(data, encoding)
+                if len(compressed) < len(data):
+                    destination.with_name(
+                        f"{destination.name}.{ENCODING_SUFFIXES[encoding]}"
+                    ).write_bytes(compressed)
+                    encodings.append(encoding)
+
+        manifest[source] = {"path": fingerprinted[source], "encodings": encodings}
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path / f".{MANIFEST_NAME}"
+    temp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), "utf-8")
+    temp_path.replace(output_path / MANIFEST_NAME)
+    return manifest
+
+
+class AssetManifest:
+    """Fingerprinted static file manifest."""
+
+    def __init__(self, output_path: str | Path, manifest: dict[str, Any]) -> None:
+        self.output_path = Path(output_path)
+        self.paths: dict[str, str] = {
+            source: entry["path"] for source, entry in manifest.items()
+        }
+        self.encodings: dict[str, tuple[str, ...]] = {
+            entry["path"]: tuple(entry["encodings"]) for entry in manifest.values()
+        }
+
+    @classmethod
+    def load(cls, output_path: str | Path) -> "AssetManifest | None":
+        """Load a manifest, or return None if it is missing or invalid."""
+        try:
+            with (Path(output_path) / MANIFEST_NAME).open(encoding="utf-8") as file:
+                return cls(output_path, json.load(file))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
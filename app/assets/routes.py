@@ -0,0 +1,72 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Fingerprinted Static Asset Routes."""
+
+import mimetypes
+from typing import Any
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    request,
+    send_from_directory,
+    url_for,
+)
+
+from app.assets.pipeline import ENCODING_SUFFIXES, AssetManifest
+from app.compression import negotiate_encoding
+
+blueprint = Blueprint("assets", __name__)
+
+# Fingerprinted file names change whenever their contents change, so
+# responses can be cached for a year without revalidation
+_MAX_AGE: int = 31536000
+
+
+def asset_url_for(endpoint: str, **values: Any) -> str:
+    """Build a URL, using fingerprinted file names for static files.
+
+    Used in place of url_for in templates. Static files that are not in
+    the asset manifest use the static file URL.
+    """
+    asset_manifest: AssetManifest | None = current_app.extensions.get("asset_manifest")
+    if asset_manifest and endpoint == "static":
+        path: str | None = asset_manifest.paths.get(values.get("filename", ""))
+        if path:
+            return url_for("assets.asset", **{**values, "filename": path})
+
+    return url_for(endpoint, **values)
+
+
+@blueprint.route("/assets/<path:filename>")
+def asset(filename: str) -> Response:
+    """View: Fingerprinted Static File.
+
+    Files are sent using the best encoding the client accepts out of the
+    compressed copies written by the asset build.
+    """
+    asset_manifest: AssetManifest | None = current_app.extensions.get("asset_manifest")
+    if not asset_manifest or filename not in asset_manifest.encodings:
+        abort(404)
+
+    encoding = negotiate_encoding(
+        request.accept_encodings, asset_manifest.encodings[filename]
+    )
+    response: Response = send_from_directory(
+        asset_manifest.output_path,
+        f"{filename}.{ENCODING_SUFFIXES[encoding]}" if encoding else filename,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        max_age=_MAX_AGE,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,101 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""HTTP Response Caching Functions."""
+
+import hashlib
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+
+from flask import Response, current_app, g, make_response, request
+
+from app.compression import ENCODINGS
+from app.main.clip import slugify_key
+from app.version import APP_VERSION
+
+
+def response_etag(data_version: tuple[int, ...]) -> str:
+    """Return a strong entity tag for the current request.
+
+    The entity tag is derived from the application version, the data
+    version, the request path and the request query string arguments.
+    """
+    arguments = sorted(request.args.items(multi=True))
+    _tag = f"{APP_VERSION}|{data_version}|{request.path}|{arguments}"
+    return hashlib.sha256(_tag.encode("utf-8")).hexdigest()[:32]
+
+
+def clip_surrogate_keys(surrogate_keys: str, clip_key_prefix: str) -> str:
+    """Return surrogate keys for a clip response.
+
+    A surrogate key for the requested clip key is added, so responses for
+    a single clip can be purged.
+    """
+    _key: str | None = request.args.get("key")
+    if not _key or not _key.strip():
+        return surrogate_keys
+
+    return f"{surrogate_keys} {clip_key_prefix}-{slugify_key(_key.strip()[:254])}"
+
+
+def conditional_response(
+    max_age: int, shared_max_age: int, surrogate_keys: Callable[[], str]
+) -> Callable:
+    """Add conditional GET and cache headers to a view.
+
+    Requests with a matching If-None-Match header receive a 304 response
+    without calling the view. Last-Modified is not sent, as there is no
+    stored modification time that is the same for every worker. Entity
+    tags of compressed responses include the content encoding, so those
+    are also matched and returned in the 304 response. Views can mark a
+    response as not cacheable, such as when a database error occurs, by
+    setting ``g.response_cacheable`` to False.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Response:
+            data_version_monitor = current_app.extensions.get("data_version")
+            data_version = (
+                data_version_monitor.current() if data_version_monitor else None
+            )
+            if data_version is None:
+                response: Response = make_response(view(*args, **kwargs))
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+
+            etag = response_etag(data_version)
+            headers = {
+                "Cache-Control": (
+                    f"public, max-age={max_age}, s-maxage={shared_max_age}"
+                ),
+                "Surrogate-Key": surrogate_keys(),
+            }
+
+            matched_etag = next(
+                (
+                    tag
+                    for tag in (etag, *(f"{etag}-{e}" for e in ENCODINGS))
+                    if request.if_none_match.contains(tag)
+                ),
+                None,
+            )
+            if matched_etag:
+                etag = matched_etag
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or not g.get("response_cacheable", True):
+                    response.headers["Cache-Control"] = "no-store"
+                    return response
+
+            response.headers.update(headers)
+            response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
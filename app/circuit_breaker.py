@@ -0,0 +1,160 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Database Circuit Breaker Functions.
+
+After a number of consecutive database errors, the circuit breaker
+opens and requests fail fast without waiting for a database connection
+or query to time out. While the circuit is open, a background thread in
+each worker probes the database and closes the circuit once the probe
+query succeeds.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from mysql.connector.errors import Error
+
+from app.database import ConnectionPool
+
+_logger = logging.getLogger(__name__)
+
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half_open"
+
+
+class CircuitBreaker:
+    """Per-worker circuit breaker for search backend queries.
+
+    The circuit opens after ``failure_threshold`` consecutive failures.
+    While the circuit is open, the database is probed once every
+    ``probe_interval`` seconds using a connection from the worker
+    connection pool, and the circuit is reported as half open while a
+    probe is running.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        failure_threshold: int = 5,
+        probe_interval: float = 10.0,
+    ) -> None:
+        self.pool = pool
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.state: str = CLOSED
+        self.opened_at: float | None = None
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opens = 0
+        self._rejected = 0
+        self._probes = 0
+        self._probe_failures = 0
+        self._probe_pid: int | None = None
+
+    def allow_request(self) -> bool:
+        """Return True if backend queries are allowed."""
+        if self.state == CLOSED:
+            return True
+
+        with self._lock:
+            self._rejected += 1
+        self._start_probe()
+        return False
+
+    def record_success(self) -> None:
+        """Reset the consecutive failure count."""
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failure and open the circuit at the failure threshold."""
+        with self._lock:
+            self._failures += 1
+            if self.state != CLOSED or self._failures < self.failure_threshold:
+                return
+
+            self.state = OPEN
+            self.opened_at = time.time()
+            self._opens += 1
+
+        _logger.warning(
+            "Database circuit breaker opened after %d consecutive failures",
+            self.failure_threshold,
+        )
+        self._start_probe()
+
+    def probe(self) -> bool:
+        """Run a probe query and close the circuit if it succeeds."""
+        with self._lock:
+            self.state = HALF_OPEN
+            self._probes += 1
+
+        try:
+            connection = self.pool.get_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                finally:
+                    cursor.close()
+            finally:
+                self.pool.release(connection)
+        except Error as error:
+            with self._lock:
+                self.state = OPEN
+                self._probe_failures += 1
+            _logger.debug("Database circuit breaker probe failed: %s", error)
+            return False
+
+        with self._lock:
+            self.state = CLOSED
+            self.opened_at = None
+            self._failures = 0
+        _logger.warning("Database circuit breaker closed")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            self.probe()
+            with self._lock:
+                if self.state == CLOSED:
+                    self._probe_pid = None
+                    return
+
+    def _start_probe(self) -> None:
+        """Start the probe thread for this worker if it is not running."""
+        if self._probe_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._probe_pid == os.getpid():
+                return
+
+            self._probe_pid = os.getpid()
+            threading.Thread(
+                target=self._run, name="circuit-breaker-probe", daemon=True
+            ).start()
+
+    def stats(self) -> dict[str, int | float | str | None]:
+        """Return circuit breaker state and statistics for this worker."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "opened_at": self.opened_at,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "opens": self._opens,
+                "rejected": self._rejected,
+                "probes": self._probes,
+                "probe_failures": self._probe_failures,
+            }
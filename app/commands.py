@@ -0,0 +1,214 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Application Command Line Interface Commands."""
+
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from mysql.connector import connect
+
+from app.assets.pipeline import build_assets
+from app.database import POOL_SETTINGS_KEYS, get_connection
+from app.main.cache import retrieve_data_version
+from app.main.memory_index import SearchIndex, retrieve_index_rows
+from app.main.related import RELATED_NEIGHBOURS, build_related_clips
+from app.main.snapshot import MappedSearchIndex, write_snapshot
+from app.sitemaps.clips import build_clip_sitemaps
+from app.slow_queries import read_slow_query_log, summarize_slow_queries
+from app.sqlite import load_sqlite_database
+
+assets_cli = AppGroup("assets", help="Manage the fingerprinted static files.")
+related_clips_cli = AppGroup("related-clips", help="Manage the related clips file.")
+search_index_cli = AppGroup("search-index", help="Manage the search index snapshot.")
+sitemaps_cli = AppGroup("sitemaps", help="Manage the clip sitemaps.")
+slow_queries_cli = AppGroup("slow-queries", help="Review the slow query log.")
+sqlite_cli = AppGroup("sqlite", help="Manage the SQLite search backend database.")
+
+
+@assets_cli.command("build")
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="Output directory. Defaults to the dist directory in the static folder.",
+)
+def build_fingerprinted_assets(output_path: str | None) -> None:
+    """Build fingerprinted and compressed copies of the static files."""
+    static_folder = Path(current_app.static_folder)
+    output_path = output_path or str(static_folder / "dist")
+    manifest = build_assets(static_folder, output_path)
+    compressed = sum(1 for entry in manifest.values() if entry["encodings"])
+    click.echo(
+        f"Wrote {len(manifest)} static files ({compressed} compressed) to {output_path}"
+    )
+
+
+@related_clips_cli.command("build")
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="Related clips file path. Defaults to the related_clips_path setting.",
+)
+@click.option(
+    "--neighbours",
+    default=RELATED_NEIGHBOURS,
+    show_default=True,
+    help="Related clips stored for each clip.",
+)
+@click.option("--full", is_flag=True, help="Compare every clip against every clip.")
+def build_related(output_path: str | None, neighbours: int, full: bool) -> None:
+    """Build or update the related clips file from the database."""
+    related_path = (
+        output_path or current_app.config["app_settings"]["related_clips_path"]
+    )
+    if not related_path:
+        raise click.UsageError(
+            "No output path provided and related_clips_path is not set."
+        )
+
+    metadata = build_related_clips(
+        get_connection(), related_path, neighbours=neighbours, full=full
+    )
+    build_type = "Updated" if metadata["incremental"] else "Built"
+    click.echo(
+        f"{build_type} related clips for {metadata['clips']} clips "
+        f"({metadata['added']} added) in {related_path}"
+    )
+
+
+@search_index_cli.command("build")
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="Snapshot file path. Defaults to the search_index_snapshot setting.",
+)
+def build_search_index(output_path: str | None) -> None:
+    """Build a search index snapshot from the database."""
+    snapshot_path = (
+        output_path or current_app.config["app_settings"]["search_index_snapshot"]
+    )
+    if not snapshot_path:
+        raise click.UsageError(
+            "No output path provided and search_index_snapshot is not set."
+        )
+
+    database_connection = get_connection()
+    data_version = retrieve_data_version(database_connection)
+    index = SearchIndex.from_rows(retrieve_index_rows(database_connection))
+    generation = write_snapshot(snapshot_path, index, data_version=data_version)
+
+    snapshot = MappedSearchIndex(snapshot_path)
+    click.echo(
+        f"Wrote {snapshot.document_count} clips to {snapshot_path} "
+        f"(generation {generation})"
+    )
+
+
+@sitemaps_cli.command("build")
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="Sitemap directory. Defaults to the sitemap_directory setting.",
+)
+@click.option("--full", is_flag=True, help="Rebuild every sitemap.")
+def build_sitemaps(output_path: str | None, full: bool) -> None:
+    """Build or update the clip sitemaps from the database."""
+    app_settings = current_app.config["app_settings"]
+    sitemap_directory = output_path or app_settings["sitemap_directory"]
+    if not sitemap_directory:
+        raise click.UsageError(
+            "No output path provided and sitemap_directory is not set."
+        )
+
+    if not app_settings.get("site_url"):
+        raise click.UsageError("site_url must be set to build clip sitemaps.")
+
+    manifest = build_clip_sitemaps(
+        get_connection(), sitemap_directory, app_settings["site_url"], full=full
+    )
+    clip_count = sum(sitemap["count"] for sitemap in manifest["sitemaps"])
+    click.echo(
+        f"Wrote {clip_count} clips in {len(manifest['sitemaps'])} sitemaps "
+        f"to {sitemap_directory}"
+    )
+
+
+@slow_queries_cli.command("summary")
+@click.option(
+    "--log",
+    "log_path",
+    default=None,
+    help="Slow query log file path. Defaults to the slow_query_log setting.",
+)
+@click.option("--limit", default=10, show_default=True, help="Number of queries.")
+@click.option(
+    "--explain", is_flag=True, help="Include captured EXPLAIN ANALYZE output."
+)
+def summarize_slow_query_log(log_path: str | None, limit: int, explain: bool) -> None:
+    """Summarize the slowest queries in the slow query log."""
+    log_path = log_path or current_app.config["app_settings"]["slow_query_log"]
+    if not log_path:
+        raise click.UsageError("No log path provided and slow_query_log is not set.")
+
+    summary = summarize_slow_queries(read_slow_query_log(log_path), limit=limit)
+    if not summary:
+        click.echo(f"No slow queries found in {log_path}")
+        return
+
+    for rank, group in enumerate(summary, start=1):
+        operation = " ".join(
+            value for value in (group["operation"], group["mode"]) if value
+        )
+        click.echo(
+            f"{rank}. {operation}: count={group['count']} "
+            f"total={group['total_ms']}ms mean={group['mean_ms']}ms "
+            f"max={group['max_ms']}ms last={group['last_seen']}"
+        )
+        click.echo(f"   parameters: {group['parameters']}")
+        click.echo(f"   query: {group['query']}")
+        if explain and group["explain"]:
+            click.echo(click.style("   explain:", bold=True))
+            for line in group["explain"].splitlines():
+                click.echo(f"     {line}")
+
+
+@sqlite_cli.command("load")
+@click.option(
+    "--output",
+    "output_path",
+    default=None,
+    help="SQLite database file path. Defaults to the sqlite_path setting.",
+)
+@click.option(
+    "--batch-size", default=5000, show_default=True, help="Rows copied per batch."
+)
+def load_sqlite(output_path: str | None, batch_size: int) -> None:
+    """Copy the clips and tags tables from MySQL into a SQLite database."""
+    database_settings = current_app.config["database_settings"]
+    database_path = output_path or database_settings["sqlite_path"]
+
+    # The MySQL connection settings are used even if the SQLite backend
+    # is selected, so the SQLite database can be refreshed in place
+    source_connection = connect(
+        **{
+            key: value
+            for key, value in database_settings.items()
+            if key not in POOL_SETTINGS_KEYS
+        }
+    )
+    try:
+        clip_count = load_sqlite_database(
+            source_connection, database_path, batch_size=batch_size
+        )
+    finally:
+        source_connection.close()
+
+    click.echo(f"Wrote {clip_count} clips to {database_path}")
@@ -0,0 +1,160 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Response Compression Functions."""
+
+import gzip
+import zlib
+from collections.abc import Iterable, Iterator
+
+import brotli
+from flask import Flask, Response, current_app, request
+from werkzeug.datastructures import Accept
+
+# Supported content encodings in order of preference
+ENCODINGS: tuple[str, ...] = ("br", "gzip")
+
+# Default compression levels used for content that is compressed once
+# and reused, such as pre-rendered pages
+MAX_LEVELS: dict[str, int] = {"br": 11, "gzip": 9}
+
+# Response content types that are compressed by the compression stage
+COMPRESSIBLE_MIMETYPES: frozenset[str] = frozenset(
+    {
+        "application/javascript",
+        "application/json",
+        "application/x-ndjson",
+        "application/xml",
+        "image/svg+xml",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "text/xml",
+    }
+)
+
+# Application settings for the compression level of each encoding
+_LEVEL_SETTINGS: dict[str, str] = {
+    "br": "compression_brotli_level",
+    "gzip": "compression_gzip_level",
+}
+
+
+def compress(data: bytes, encoding: str, level: int | None = None) -> bytes:
+    """Compress data using a content encoding.
+
+    If no level is provided, the maximum compression level for the
+    encoding is used.
+    """
+    level = MAX_LEVELS[encoding] if level is None else level
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+
+    # The gzip header timestamp is fixed, so identical data is always
+    # compressed to identical bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(
+    accept_encodings: Accept, encodings: tuple[str, ...] = ENCODINGS
+) -> str | None:
+    """Return the supported encoding the client accepts with the highest quality.
+
+    Encodings with equal quality values are chosen in order of preference.
+    Returns None if the client does not accept any supported encoding.
+    """
+    best: str | None = None
+    best_quality: float = 0
+    for encoding in encodings:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def _stream_compressor(
+    chunks: Iterable[bytes | str], encoding: str, level: int
+) -> Iterator[bytes]:
+    """Compress a streamed response body.
+
+    The compressor is flushed after each chunk so that each part of the
+    response is sent to the client as soon as it is produced.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = (
+            compressor.process,
+            compressor.flush,
+            compressor.finish,
+        )
+    else:
+        # wbits of 31 writes a gzip header and trailer
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush() -> bytes:
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def compress_response(response: Response) -> Response:
+    """Compress a response using the best encoding the client accepts.
+
+    Responses that are already encoded, are not a compressible content
+    type, or are smaller than the minimum size are not compressed.
+    Streamed responses are compressed as they are sent. Entity tags of
+    compressed responses include the content encoding, so each encoding
+    of a response has a distinct strong entity tag.
+    """
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+
+    app_settings = current_app.config["app_settings"]
+    level: int = app_settings[_LEVEL_SETTINGS[encoding]]
+    if response.is_streamed:
+        response.response = _stream_compressor(response.response, encoding, level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < app_settings["compression_min_size"]:
+            return response
+        response.set_data(compress(data, encoding, level))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Register the response compression stage if it is enabled."""
+    if app.config["app_settings"]["enable_compression"]:
+        app.after_request(compress_response)
@@ -40,6 +40,82 @@ def load_app_settings(
             app_settings.get("enable_query_expansion_mode", False)
         )
 
+        app_settings["enable_status"] = bool(app_settings.get("enable_status", False))
+        app_settings["enable_metrics"] = bool(app_settings.get("enable_metrics", False))
+        app_settings["enable_server_timing"] = bool(
+            app_settings.get("enable_server_timing", False)
+        )
+        app_settings["stream_search_results"] = bool(
+            app_settings.get("stream_search_results", False)
+        )
+        app_settings["use_fingerprinted_assets"] = bool(
+            app_settings.get("use_fingerprinted_assets", False)
+        )
+
+        # Process search query execution strategy (default: window)
+        search_strategy = str(app_settings.get("search_strategy", "window")).lower()
+        if search_strategy not in ("window", "two_query"):
+            search_strategy = "window"
+        app_settings["search_strategy"] = search_strategy
+
+        # Process search engine settings (default: database)
+        search_engine = str(app_settings.get("search_engine", "database")).lower()
+        if search_engine not in ("database", "memory"):
+            search_engine = "database"
+        app_settings["search_engine"] = search_engine
+
+        try:
+            app_settings["search_index_refresh_interval"] = max(
+                int(app_settings.get("search_index_refresh_interval", 60)), 0
+            )
+        except (TypeError, ValueError):
+            app_settings["search_index_refresh_interval"] = 60
+
+        app_settings["search_index_snapshot"] = (
+            app_settings.get("search_index_snapshot") or None
+        )
+
+        # Process search query suggestion settings
+        app_settings["enable_suggestions"] = bool(
+            app_settings.get("enable_suggestions", False)
+        )
+        for key, default in (
+            ("suggest_max_results", 10),
+            ("suggest_refresh_interval", 300),
+        ):
+            try:
+                app_settings[key] = max(int(app_settings.get(key, default)), 1)
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        # Process API NDJSON export batch size (default: 500)
+        try:
+            app_settings["api_stream_batch_size"] = max(
+                int(app_settings.get("api_stream_batch_size", 500)), 1
+            )
+        except (TypeError, ValueError):
+            app_settings["api_stream_batch_size"] = 500
+
+        # Process slow query log settings. The slow query log is disabled
+        # unless a log file path is set.
+        app_settings["slow_query_log"] = app_settings.get("slow_query_log") or None
+        for key, default in (
+            ("slow_query_threshold", 500),
+            ("slow_query_log_max_bytes", 10485760),
+            ("slow_query_log_backups", 5),
+        ):
+            try:
+                app_settings[key] = max(int(app_settings.get(key, default)), 0)
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        try:
+            app_settings["slow_query_explain_rate"] = min(
+                max(float(app_settings.get("slow_query_explain_rate", 0.1)), 0.0), 1.0
+            )
+        except (TypeError, ValueError):
+            app_settings["slow_query_explain_rate"] = 0.1
+
         # Process time zone configuration settings
         time_zone = app_settings.get("time_zone", app_time_zone)
         time_zone_object, time_zone_string = time_zone_parser(time_zone)
@@ -69,6 +145,105 @@ def load_app_settings(
         except ValueError:
             app_settings["results_per_page"] = results_per_page
 
+        # Process search result cache and data version check settings.
+        # Setting the cache size to 0 disables the search result cache.
+        for key, default in (
+            ("search_cache_size", 512),
+            ("search_cache_ttl", 300),
+            ("data_version_interval", 5),
+        ):
+            try:
+                app_settings[key] = max(int(app_settings.get(key, default)), 0)
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        # Process database circuit breaker settings. Setting the failure
+        # threshold to 0 disables the circuit breaker.
+        for key, default, minimum in (
+            ("circuit_breaker_threshold", 5, 0),
+            ("circuit_breaker_probe_interval", 10, 1),
+        ):
+            try:
+                app_settings[key] = max(int(app_settings.get(key, default)), minimum)
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        # Process clip sitemap settings. Clip sitemaps are disabled unless
+        # a sitemap directory is set.
+        app_settings["sitemap_directory"] = (
+            app_settings.get("sitemap_directory") or None
+        )
+        try:
+            app_settings["sitemap_refresh_interval"] = max(
+                int(app_settings.get("sitemap_refresh_interval", 300)), 0
+            )
+        except (TypeError, ValueError):
+            app_settings["sitemap_refresh_interval"] = 300
+
+        # Process related clips settings. Related clips are disabled
+        # unless a related clips file path is set.
+        app_settings["related_clips_path"] = (
+            app_settings.get("related_clips_path") or None
+        )
+        try:
+            app_settings["related_clips_count"] = max(
+                int(app_settings.get("related_clips_count", 5)), 1
+            )
+        except (TypeError, ValueError):
+            app_settings["related_clips_count"] = 5
+
+        # Process response compression settings. Responses smaller than
+        # the minimum size, in bytes, are not compressed.
+        app_settings["enable_compression"] = bool(
+            app_settings.get("enable_compression", False)
+        )
+        for key, default, minimum, maximum in (
+            ("compression_min_size", 1024, 0, None),
+            ("compression_gzip_level", 6, 1, 9),
+            ("compression_brotli_level", 4, 0, 11),
+        ):
+            try:
+                value = max(int(app_settings.get(key, default)), minimum)
+                app_settings[key] = min(value, maximum) if maximum else value
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        # Process request coalescing timeout. Setting the timeout to 0
+        # disables request coalescing.
+        try:
+            app_settings["single_flight_timeout"] = max(
+                float(app_settings.get("single_flight_timeout", 10)), 0.0
+            )
+        except (TypeError, ValueError):
+            app_settings["single_flight_timeout"] = 10.0
+
+        # Process admission control settings. Admission control is
+        # disabled unless a shared token bucket file path is set. Setting
+        # the maximum concurrent searches to 0 removes the search limit.
+        app_settings["rate_limit_path"] = app_settings.get("rate_limit_path") or None
+        app_settings["rate_limit_client_header"] = (
+            app_settings.get("rate_limit_client_header") or None
+        )
+        for key, default, minimum in (
+            ("rate_limit_capacity", 30.0, 1.0),
+            ("rate_limit_refill_rate", 0.5, 0.01),
+        ):
+            try:
+                app_settings[key] = max(float(app_settings.get(key, default)), minimum)
+            except (TypeError, ValueError):
+                app_settings[key] = default
+
+        try:
+            app_settings["rate_limit_max_searches"] = max(
+                int(app_settings.get("rate_limit_max_searches", 8)), 0
+            )
+        except (TypeError, ValueError):
+            app_settings["rate_limit_max_searches"] = 8
+
+        # Process the secret key used to sign pagination cursors. A random
+        # key is used for each worker if one is not set.
+        app_settings["secret_key"] = app_settings.get("secret_key") or None
+
         return app_settings
 
     return None
@@ -92,30 +267,45 @@ def load_database_settings(
         if not database_settings:
             return None
 
-        use_pool = bool(database_settings.get("use_pool", False))
-        if use_pool:
-            pool_name: str | None = database_settings.get(
-                "pool_name", connection_pool_name
-            )
-            pool_size: int | None = database_settings.get(
-                "pool_size", connection_pool_size
-            )
+        # Connections are always handed out from a per-worker pool. The
+        # legacy use_pool flag is accepted but no longer has any effect.
+        if "use_pool" in database_settings:
+            del database_settings["use_pool"]
 
-            if pool_size < connection_pool_size:
-                pool_size = connection_pool_size
+        # Process search backend settings (default: mysql)
+        backend = str(database_settings.get("backend", "mysql")).lower()
+        if backend not in ("mysql", "sqlite"):
+            backend = "mysql"
+        database_settings["backend"] = backend
+        database_settings["sqlite_path"] = str(
+            database_settings.get("sqlite_path") or "mg_clips.sqlite"
+        )
 
-            database_settings["pool_name"] = pool_name
-            database_settings["pool_size"] = pool_size
-            del database_settings["use_pool"]
-        else:
-            if "pool_name" in database_settings:
-                del database_settings["pool_name"]
+        database_settings["pool_name"] = str(
+            database_settings.get("pool_name", connection_pool_name)
+        )
 
-            if "pool_size" in database_settings:
-                del database_settings["pool_size"]
+        try:
+            pool_size = int(database_settings.get("pool_size", connection_pool_size))
+        except (TypeError, ValueError):
+            pool_size = connection_pool_size
+        database_settings["pool_size"] = max(pool_size, 1)
 
-            if "use_pool" in database_settings:
-                del database_settings["use_pool"]
+        database_settings["pool_warm"] = bool(database_settings.get("pool_warm", True))
+        database_settings["pool_pre_ping"] = bool(
+            database_settings.get("pool_pre_ping", True)
+        )
+        for key, default in (
+            ("pool_pre_ping_interval", 30),
+            ("pool_max_idle_time", 300),
+            ("pool_timeout", 5),
+        ):
+            try:
+                database_settings[key] = max(
+                    float(database_settings.get(key, default)), 0
+                )
+            except (TypeError, ValueError):
+                database_settings[key] = default
 
         return database_settings
 
@@ -0,0 +1,296 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Database Connection Pool and Request Lifecycle Functions."""
+
+import contextlib
+import logging
+import os
+import queue
+import threading
+import time
+
+from flask import Flask, current_app, g
+from mysql.connector import connect
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import Error, InterfaceError, PoolError
+
+from app.metrics import timed
+
+_logger = logging.getLogger(__name__)
+
+# Database settings keys that configure the connection pool or search
+# backend and must not be passed through to mysql.connector.connect()
+POOL_SETTINGS_KEYS: tuple[str, ...] = (
+    "backend",
+    "sqlite_path",
+    "pool_name",
+    "pool_size",
+    "pool_pre_ping",
+    "pool_pre_ping_interval",
+    "pool_max_idle_time",
+    "pool_timeout",
+    "pool_warm",
+)
+
+
+class ConnectionPool:
+    """Per-worker pool of MySQL connections.
+
+    Connections are created lazily up to ``pool_size`` and are handed
+    out in LIFO order so that the most recently used connections are
+    reused first. Connections that have been idle for longer than
+    ``max_idle_time`` seconds are replaced, and connections that have
+    been idle for longer than ``pre_ping_interval`` seconds are pinged
+    before being handed out when ``pre_ping`` is enabled.
+    """
+
+    def __init__(
+        self,
+        database_settings: dict[str, int | str | bool],
+        pool_name: str = "mg_search",
+        pool_size: int = 10,
+        pre_ping: bool = True,
+        pre_ping_interval: float = 30.0,
+        max_idle_time: float = 300.0,
+        timeout: float = 5.0,
+    ) -> None:
+        self.connection_settings = {
+            key: value
+            for key, value in database_settings.items()
+            if key not in POOL_SETTINGS_KEYS
+        }
+        self.name = pool_name
+        self.size = max(int(pool_size), 1)
+        self.pre_ping = pre_ping
+        self.pre_ping_interval = pre_ping_interval
+        self.max_idle_time = max_idle_time
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._idle: queue.LifoQueue[tuple[MySQLConnection, float]] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._pid = os.getpid()
+        self._opened = 0
+        self._checked_out = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._pings = 0
+        self._replaced = 0
+
+    def _open(self) -> MySQLConnection:
+        connection = connect(**self.connection_settings)
+        with self._lock:
+            self._opened += 1
+        return connection
+
+    def _discard(self, connection: MySQLConnection) -> None:
+        with contextlib.suppress(Error):
+            connection.close()
+
+        with self._lock:
+            self._opened -= 1
+
+    def _check_fork(self) -> None:
+        """Drop connections inherited from a parent process."""
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self.size)
+            self._opened = 0
+            self._checked_out = 0
+
+    def warm(self, count: int | None = None) -> int:
+        """Open up to ``count`` idle connections ahead of the first request.
+
+        Returns the number of connections that were opened.
+        """
+        self._check_fork()
+        count = self.size if count is None else min(count, self.size)
+        opened = 0
+        while self._opened < count:
+            try:
+                connection = self._open()
+            except Error as error:
+                _logger.warning(
+                    "Unable to warm connection pool %s: %s", self.name, error
+                )
+                break
+
+            self._idle.put((connection, time.monotonic()))
+            opened += 1
+
+        return opened
+
+    def get_connection(self) -> MySQLConnection:
+        """Check out a connection, waiting up to the pool timeout for one."""
+        self._check_fork()
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self._wait_time += time.perf_counter() - start
+
+            if not acquired:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolError(
+                    f"Timed out waiting for a connection from pool {self.name}"
+                )
+
+        try:
+            connection = self._checkout_idle() or self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+
+        return connection
+
+    def _checkout_idle(self) -> MySQLConnection | None:
+        while True:
+            try:
+                connection, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            idle_time = time.monotonic() - returned_at
+            if self.max_idle_time and idle_time > self.max_idle_time:
+                self._discard(connection)
+                with self._lock:
+                    self._replaced += 1
+                continue
+
+            if self.pre_ping and idle_time > self.pre_ping_interval:
+                with self._lock:
+                    self._pings += 1
+                try:
+                    connection.ping(reconnect=False)
+                except (Error, AttributeError):
+                    self._discard(connection)
+                    with self._lock:
+                        self._replaced += 1
+                    continue
+
+            return connection
+
+    def release(self, connection: MySQLConnection) -> None:
+        """Return a checked out connection back to the pool."""
+        if self._pid != os.getpid():
+            return
+
+        with self._lock:
+            self._checked_out -= 1
+
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except (Error, AttributeError):
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all idle connections held by the pool."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return connection pool usage statistics for this worker."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "pid": self._pid,
+                "size": self.size,
+                "opened": self._opened,
+                "idle": self._idle.qsize(),
+                "checked_out": self._checked_out,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time": round(self._wait_time, 6),
+                "timeouts": self._timeouts,
+                "pings": self._pings,
+                "replaced": self._replaced,
+            }
+
+
+def init_app(app: Flask) -> ConnectionPool:
+    """Create the worker connection pool and register request teardown.
+
+    If the SQLite backend is selected, the pool hands out read-only
+    connections to the SQLite database file instead.
+    """
+    database_settings = app.config["database_settings"]
+    if database_settings.get("backend") == "sqlite":
+        # Imported here as the sqlite module depends on this module
+        from app.sqlite import SQLiteConnectionPool
+
+        pool: ConnectionPool = SQLiteConnectionPool(
+            database_settings["sqlite_path"],
+            pool_name=database_settings.get("pool_name", "mg_search"),
+            pool_size=database_settings.get("pool_size", 10),
+            timeout=float(database_settings.get("pool_timeout", 5)),
+        )
+    else:
+        pool = ConnectionPool(
+            database_settings,
+            pool_name=database_settings.get("pool_name", "mg_search"),
+            pool_size=database_settings.get("pool_size", 10),
+            pre_ping=bool(database_settings.get("pool_pre_ping", True)),
+            pre_ping_interval=float(
+                database_settings.get("pool_pre_ping_interval", 30)
+            ),
+            max_idle_time=float(database_settings.get("pool_max_idle_time", 300)),
+            timeout=float(database_settings.get("pool_timeout", 5)),
+        )
+    app.extensions["database_pool"] = pool
+    app.teardown_appcontext(release_connection)
+
+    if database_settings.get("pool_warm", True):
+        pool.warm()
+
+    return pool
+
+
+def get_connection() -> MySQLConnection:
+    """Return the connection assigned to the current application context."""
+    if "database_connection" not in g:
+        with timed("db-connect"):
+            g.database_connection = current_app.extensions[
+                "database_pool"
+            ].get_connection()
+
+    return g.database_connection
+
+
+def release_connection(_exception: BaseException | None = None) -> None:
+    """Return the application context connection to the pool."""
+    connection: MySQLConnection | None = g.pop("database_connection", None)
+    if connection is None:
+        return
+
+    try:
+        current_app.extensions["database_pool"].release(connection)
+    except InterfaceError:
+        _logger.exception("Unable to release database connection")
@@ -5,16 +5,25 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Application Error Handlers."""
 
-from typing import Literal
+from flask import Response
 
-from flask import render_template
+from app.prerender import prerendered_response
 
 
-def not_found(error) -> tuple[str, Literal[404]]:
+def not_found(error) -> Response:
     """Handle resource not found conditions."""
-    return render_template("errors/404.html", error=error), 404
+    return prerendered_response("errors/404.html", status_code=404)
 
 
-def handle_exception(error) -> tuple[str, Literal[500]]:
+def too_many_requests(error) -> Response:
+    """Handle requests rejected by admission control."""
+    response = prerendered_response("errors/429.html", status_code=429)
+    response.headers["Cache-Control"] = "no-store"
+    if error.retry_after:
+        response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def handle_exception(error) -> Response:
     """Handle exceptions in a semi-graceful manner."""
-    return render_template("errors/500.html", error=error), 500
+    return prerendered_response("errors/500.html", status_code=500)
@@ -0,0 +1,367 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Clip Search Backend Functions.
+
+Search backends search, count, stream and look up clips using
+connections from the worker connection pool. The MySQL backend uses
+MySQL full-text search, and the SQLite backend uses an FTS5 full-text
+index in a SQLite database file created by the ``flask sqlite load``
+command. The backend is selected by the ``backend`` database setting.
+"""
+
+import contextlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from mysql.connector.errors import DatabaseError, Error, ProgrammingError
+
+from app.database import get_connection
+from app.main.clip import CLIP_COLUMNS, Clip, retrieve_clip_info
+from app.main.memory_index import BOOLEAN_CLAUSE_PATTERN, is_indexed, tokenize
+from app.main.search import (
+    TOTAL_COUNT_COLUMN,
+    SearchMode,
+    SearchStrategy,
+    SeekPosition,
+    build_results,
+    count_clips,
+    search_clips,
+    stream_clips,
+)
+from app.slow_queries import timed_query
+
+
+class SearchBackend(ABC):
+    """Clip search backend interface.
+
+    Backends must implement every method, which is checked when the
+    backend is created.
+    """
+
+    name: str = ""
+
+    def __init__(self, connection_factory: Callable[[], Any] = get_connection) -> None:
+        self.connection_factory = connection_factory
+
+    @abstractmethod
+    def search(
+        self,
+        search_query: str,
+        search_mode: SearchMode,
+        results_per_page: int,
+        offset: int,
+        seek: SeekPosition | None = None,
+    ) -> dict[str, int | list[Clip]] | None:
+        """Search clips, returning results in the format of search_clips."""
+
+    @abstractmethod
+    def count(self, search_query: str, search_mode: SearchMode) -> int | dict[str, str]:
+        """Count the clips that match a search query."""
+
+    @abstractmethod
+    def lookup(self, clip_key: str) -> Clip | dict[str, str] | None:
+        """Retrieve a clip by clip key."""
+
+    @abstractmethod
+    def stream(
+        self, search_query: str, search_mode: SearchMode, batch_size: int = 500
+    ) -> Iterator[Clip]:
+        """Yield every clip that matches a search query in relevance order."""
+
+
+class MySQLBackend(SearchBackend):
+    """Search backend using MySQL full-text search."""
+
+    name = "mysql"
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any] = get_connection,
+        search_strategy: SearchStrategy = SearchStrategy.WINDOW,
+    ) -> None:
+        super().__init__(connection_factory)
+        self.search_strategy = search_strategy
+
+    def search(
+        self,
+        search_query: str,
+        search_mode: SearchMode,
+        results_per_page: int,
+        offset: int,
+        seek: SeekPosition | None = None,
+    ) -> dict[str, int | list[Clip]] | None:
+        """Search clips, returning results in the format of search_clips."""
+        return search_clips(
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+            database_connection=self.connection_factory(),
+            search_strategy=self.search_strategy,
+            seek=seek,
+        )
+
+    def count(self, search_query: str, search_mode: SearchMode) -> int | dict[str, str]:
+        """Count the clips that match a search query."""
+        return count_clips(search_query, search_mode, self.connection_factory())
+
+    def lookup(self, clip_key: str) -> Clip | dict[str, str] | None:
+        """Retrieve a clip by clip key."""
+        return retrieve_clip_info(clip_key, self.connection_factory())
+
+    def stream(
+        self, search_query: str, search_mode: SearchMode, batch_size: int = 500
+    ) -> Iterator[Clip]:
+        """Yield every clip that matches a search query in relevance order."""
+        return stream_clips(
+            search_query=search_query,
+            search_mode=search_mode,
+            database_connection=self.connection_factory(),
+            batch_size=batch_size,
+        )
+
+
+def _fts5_string(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def fts5_query(search_query: str, search_mode: SearchMode) -> str | None:
+    """Translate a search query into an FTS5 full-text query.
+
+    Natural language mode queries match clips that contain any indexed
+    word in the query. Boolean mode required (+) and excluded (-)
+    clauses, wildcard (*) prefixes and quoted phrases are translated to
+    the FTS5 AND, NOT, prefix and phrase syntax. As with MySQL, optional
+    clauses do not restrict the results of a query with required
+    clauses, although they also do not change the ranking. FTS5 has no
+    query expansion, so query expansion mode is treated as natural
+    language mode.
+
+    Words are tokenized using the same rules as the memory-resident
+    search index, and None is returned if a query has no indexed words.
+    """
+    if search_mode != SearchMode.BOOLEAN:
+        words = dict.fromkeys(
+            token for token, _ in tokenize(search_query) if is_indexed(token)
+        )
+        return " OR ".join(_fts5_string(word) for word in words) or None
+
+    required: list[str] = []
+    excluded: list[str] = []
+    optional: list[str] = []
+    for match in BOOLEAN_CLAUSE_PATTERN.finditer(search_query):
+        operators, phrase, word = match.groups()
+        text = phrase if phrase is not None else word
+        if not text:
+            continue
+
+        if phrase is None and text.endswith("*"):
+            prefix = [token for token, _ in tokenize(text.rstrip("*"))]
+            if len(prefix) != 1:
+                continue
+            clause = _fts5_string(prefix[0]) + "*"
+        else:
+            tokens = [token for token, _ in tokenize(text) if is_indexed(token)]
+            if not tokens:
+                continue
+            clause = _fts5_string(" ".join(tokens))
+
+        if "-" in operators:
+            excluded.append(clause)
+        elif "+" in operators:
+            required.append(clause)
+        else:
+            optional.append(clause)
+
+    if not required and not optional:
+        return None
+
+    query = " AND ".join(required) if required else " OR ".join(optional)
+    if excluded:
+        return f"({query}) NOT ({' OR '.join(excluded)})"
+    return query
+
+
+# Matching tags and their scores are materialized before joining, as the
+# FTS5 bm25() function can only be used in a query on the FTS5 table
+_SQLITE_MATCHES: str = (
+    "WITH matches AS MATERIALIZED ("
+    "SELECT rowid AS tag_id, -bm25(tags_fts) AS score "
+    "FROM tags_fts WHERE tags_fts MATCH ?) "
+)
+
+
+class SQLiteBackend(SearchBackend):
+    """Search backend using an SQLite FTS5 full-text index."""
+
+    name = "sqlite"
+
+    def _fetch(
+        self, query: str, parameters: tuple, **details: int | str
+    ) -> list[tuple] | dict[str, str]:
+        cursor = self.connection_factory().cursor()
+        try:
+            with timed_query("db-query", query, parameters, **details):
+                cursor.execute(query, parameters)
+                return cursor.fetchall()
+        except ProgrammingError:
+            return {"error": "ProgrammingError"}
+        except DatabaseError:
+            return {"error": "DatabaseError"}
+        finally:
+            cursor.close()
+
+    def search(
+        self,
+        search_query: str,
+        search_mode: SearchMode,
+        results_per_page: int,
+        offset: int,
+        seek: SeekPosition | None = None,
+    ) -> dict[str, int | list[Clip]] | None:
+        """Search clips, returning results in the format of search_clips."""
+        if not search_query or results_per_page is None or offset is None:
+            return None
+
+        if results_per_page <= 0 or offset < 0:
+            return None
+
+        match_query = fts5_query(search_query, search_mode)
+        if not match_query:
+            return {"total_count": 0, "returned_count": 0, "results": []}
+
+        details: dict[str, int | str] = {
+            "operation": "search",
+            "mode": search_mode.name.lower(),
+        }
+        if seek:
+            if seek.before:
+                seek_condition = "WHERE m.score > ? OR (m.score = ? AND c.id < ?) "
+                order = "ORDER BY m.score ASC, c.id DESC "
+            else:
+                seek_condition = "WHERE m.score < ? OR (m.score = ? AND c.id > ?) "
+                order = "ORDER BY m.score DESC, c.id "
+
+            query = (
+                f"{_SQLITE_MATCHES}"
+                f"SELECT {CLIP_COLUMNS}, m.score "
+                "FROM matches m "
+                "JOIN tags t ON t.id = m.tag_id "
+                "JOIN clips c ON c.id = t.clip_id "
+                f"{seek_condition}"
+                f"{order}"
+                "LIMIT ?"
+            )
+            parameters: tuple = (
+                match_query,
+                seek.score,
+                seek.score,
+                seek.clip_id,
+                results_per_page,
+            )
+        else:
+            query = (
+                f"{_SQLITE_MATCHES}"
+                f"SELECT {CLIP_COLUMNS}, m.score, COUNT(*) OVER () AS total_count "
+                "FROM matches m "
+                "JOIN tags t ON t.id = m.tag_id "
+                "JOIN clips c ON c.id = t.clip_id "
+                "ORDER BY m.score DESC, c.id "
+                "LIMIT ? OFFSET ?"
+            )
+            parameters = (match_query, results_per_page, offset)
+            details["page"] = offset // results_per_page + 1
+            details["offset"] = offset
+
+        results = self._fetch(query, parameters, **details)
+        if isinstance(results, dict):
+            return results
+
+        if not results:
+            return {"total_count": 0, "returned_count": 0, "results": []}
+
+        if seek:
+            if seek.before:
+                results.reverse()
+            return build_results(results, total_count=seek.total_count)
+
+        return build_results(results, total_count=results[0][TOTAL_COUNT_COLUMN])
+
+    def count(self, search_query: str, search_mode: SearchMode) -> int | dict[str, str]:
+        """Count the clips that match a search query."""
+        match_query = fts5_query(search_query, search_mode)
+        if not match_query:
+            return 0
+
+        query = (
+            "SELECT COUNT(c.id) AS total_count "
+            "FROM tags_fts "
+            "JOIN tags t ON t.id = tags_fts.rowid "
+            "JOIN clips c ON c.id = t.clip_id "
+            "WHERE tags_fts MATCH ?"
+        )
+        results = self._fetch(
+            query, (match_query,), operation="count", mode=search_mode.name.lower()
+        )
+        if isinstance(results, dict):
+            return results
+
+        return int(results[0][0]) if results else 0
+
+    def lookup(self, clip_key: str) -> Clip | dict[str, str] | None:
+        """Retrieve a clip by clip key."""
+        if not clip_key:
+            return None
+
+        query = (
+            f"SELECT {CLIP_COLUMNS} "
+            "FROM clips c "
+            "JOIN tags t ON t.clip_id = c.id "
+            "WHERE c.key = ? "
+            "LIMIT 1"
+        )
+        results = self._fetch(query, (clip_key,), operation="clip")
+        if isinstance(results, dict):
+            return results
+
+        return Clip.from_row(results[0]) if results else None
+
+    def stream(
+        self, search_query: str, search_mode: SearchMode, batch_size: int = 500
+    ) -> Iterator[Clip]:
+        """Yield every clip that matches a search query in relevance order."""
+        match_query = fts5_query(search_query, search_mode)
+        if not match_query:
+            return
+
+        query = (
+            f"{_SQLITE_MATCHES}"
+            f"SELECT {CLIP_COLUMNS}, m.score "
+            "FROM matches m "
+            "JOIN tags t ON t.id = m.tag_id "
+            "JOIN clips c ON c.id = t.clip_id "
+            "ORDER BY m.score DESC, c.id"
+        )
+        cursor = self.connection_factory().cursor()
+        try:
+            cursor.execute(query, (match_query,))
+            while rows := cursor.fetchmany(batch_size):
+                for row in rows:
+                    yield Clip.from_row(row)
+        finally:
+            with contextlib.suppress(Error):
+                cursor.close()
+
+
+def create_backend(
+    backend: str, search_strategy: SearchStrategy = SearchStrategy.WINDOW
+) -> SearchBackend:
+    """Create the search backend for a backend database setting value."""
+    if backend == "sqlite":
+        return SQLiteBackend()
+
+    return MySQLBackend(search_strategy=search_strategy)
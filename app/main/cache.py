@@ -0,0 +1,220 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Search Result Cache Functions."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import Error
+from mysql.connector.pooling import PooledMySQLConnection
+
+from app.database import ConnectionPool
+
+
+def normalize_query(search_query: str) -> str:
+    """Normalize a search query string for use in a cache key.
+
+    Whitespace is collapsed and the query is case folded, which
+    matches the case-insensitive collation used by the database.
+    """
+    return " ".join(search_query.split()).casefold()
+
+
+def retrieve_data_version(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> tuple[int, ...] | None:
+    """Retrieve a data version for the clips and tags tables.
+
+    The data version changes when clips or tags are added or removed.
+    """
+    query = (
+        "SELECT (SELECT COALESCE(MAX(id), 0) FROM clips) AS max_clip_id, "
+        "(SELECT COUNT(*) FROM clips) AS clip_count, "
+        "(SELECT COUNT(*) FROM tags) AS tag_count"
+    )
+    cursor = database_connection.cursor()
+    try:
+        cursor.execute(query)
+        result = cursor.fetchone()
+    except Error:
+        return None
+    finally:
+        cursor.close()
+
+    if not result:
+        return None
+
+    return tuple(int(value) for value in result)
+
+
+class DataVersionMonitor:
+    """Tracks the data version of the clips and tags tables.
+
+    After the first check, the data version is checked by a background
+    thread once every ``interval`` seconds, so reading the current data
+    version does not require a database query.
+    """
+
+    def __init__(self, pool: ConnectionPool, interval: float = 5.0) -> None:
+        self.pool = pool
+        self.interval = interval
+        self.value: tuple[int, ...] | None = None
+
+        self._lock = threading.Lock()
+        self._checked: float = 0.0
+        self._thread_pid: int | None = None
+
+    def check(self) -> tuple[int, ...] | None:
+        """Retrieve the data version from the database."""
+        try:
+            database_connection = self.pool.get_connection()
+        except Error:
+            return self.value
+
+        try:
+            data_version = retrieve_data_version(database_connection)
+        finally:
+            self.pool.release(database_connection)
+
+        with self._lock:
+            self._checked = time.monotonic()
+            if data_version is not None and data_version != self.value:
+                self.value = data_version
+
+        return self.value
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def current(self) -> tuple[int, ...] | None:
+        """Return the current data version.
+
+        The database is only queried if the data version has not been
+        retrieved yet, or if the check interval is set to 0.
+        """
+        if self.interval <= 0:
+            return self.check()
+
+        if self._thread_pid != os.getpid():
+            with self._lock:
+                if self._thread_pid != os.getpid():
+                    self._thread_pid = os.getpid()
+                    threading.Thread(
+                        target=self._run, name="data-version-monitor", daemon=True
+                    ).start()
+
+        if self.value is None and time.monotonic() - self._checked >= self.interval:
+            return self.check()
+
+        return self.value
+
+
+class SearchCache:
+    """In-process LRU cache for search results.
+
+    Entries expire after ``ttl`` seconds and the least recently used
+    entry is evicted once ``max_entries`` is reached. All entries are
+    invalidated when a different data version is passed to validate().
+    Expired and invalidated entries are kept until they are evicted or
+    replaced, so they can be served by get_stale() while the database
+    is unavailable or while the entry is being refreshed.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.data_version: tuple[int, ...] | None = None
+
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return a cached value, or None if missing, expired or invalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_at, generation, value = entry
+            if generation != self._generation:
+                self._misses += 1
+                return None
+
+            if time.monotonic() - stored_at > self.ttl:
+                self._entries[key] = (stored_at, -1, value)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def get_stale(self, key: Hashable) -> Any | None:
+        """Return a cached value even if expired or invalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._stale_hits += 1
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), self._generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def validate(self, data_version: tuple[int, ...] | None) -> None:
+        """Invalidate the cache if the data version has changed."""
+        if data_version is None:
+            return
+
+        with self._lock:
+            if self.data_version is not None and data_version != self.data_version:
+                self._generation += 1
+                self._invalidations += 1
+            self.data_version = data_version
+
+    def stats(self) -> dict[str, int | list | None]:
+        """Return cache usage statistics for this worker."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale_hits": self._stale_hits,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "data_version": list(self.data_version) if self.data_version else None,
+            }
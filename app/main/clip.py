@@ -5,39 +5,176 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Clip Information Functions."""
 
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any
+
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import MySQLCursor
 from mysql.connector.errors import DatabaseError, ProgrammingError
 from mysql.connector.pooling import PooledMySQLConnection
 from slugify import slugify
 
+from app.slow_queries import timed_query
+
+# Clip columns selected by clip and search queries, in the order that
+# Clip.from_row expects them
+CLIP_COLUMNS: str = (
+    "c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, t.title, t.year"
+)
+
+# Maximum number of clip key slugs kept by slugify_key in each worker
+KEY_SLUG_CACHE_SIZE: int = 65536
+
+
+@lru_cache(maxsize=KEY_SLUG_CACHE_SIZE)
+def slugify_key(key: str) -> str:
+    """Return the slug for a clip key.
+
+    Clip keys never change, so slugs are kept in a bounded cache shared
+    by clip information and search results to avoid running slugify for
+    the same key on every request.
+    """
+    return slugify(key)
+
+
+class Clip:
+    """Audio clip record with parsed audio tag metadata.
+
+    Clips are built from database rows in CLIP_COLUMNS order. File paths
+    are derived from the clip key when accessed and the key slug is
+    computed on first access, unless it is provided when the clip is
+    created.
+    """
+
+    __slots__ = (
+        "id",
+        "key",
+        "mp3",
+        "m4a",
+        "m4r",
+        "artist",
+        "album",
+        "title",
+        "year",
+        "_key_slug",
+    )
+
+    def __init__(
+        self,
+        clip_id: int,
+        key: str,
+        mp3: bool | int,
+        m4a: bool | int,
+        m4r: bool | int,
+        artist: str | None,
+        album: str | None,
+        title: str | None,
+        year: int | None,
+        key_slug: str | None = None,
+    ) -> None:
+        self.id = clip_id
+        self.key = key
+        self.mp3 = bool(mp3)
+        self.m4a = bool(m4a)
+        self.m4r = bool(m4r)
+        self.artist = artist
+        self.album = album
+        self.title = title
+        self.year = year
+        self._key_slug = key_slug
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Clip":
+        """Build a clip from a tuple row that starts with CLIP_COLUMNS."""
+        return cls(*row[:9])
+
+    @property
+    def key_slug(self) -> str:
+        """Slugified clip key."""
+        if self._key_slug is None:
+            self._key_slug = slugify_key(self.key)
+        return self._key_slug
+
+    @property
+    def mp3_path(self) -> str | None:
+        """Path of the MP3 file, or None if there is no MP3 file."""
+        return f"{self.key}.mp3" if self.mp3 else None
+
+    @property
+    def m4a_path(self) -> str | None:
+        """Path of the M4A file, or None if there is no M4A file."""
+        return f"{self.key}.m4a" if self.m4a else None
+
+    @property
+    def m4r_path(self) -> str | None:
+        """Path of the M4R file, or None if there is no M4R file."""
+        return f"{self.key}.m4r" if self.m4r else None
+
+    def _fields(self) -> tuple:
+        return (
+            self.id,
+            self.key,
+            self.mp3,
+            self.m4a,
+            self.m4r,
+            self.artist,
+            self.album,
+            self.title,
+            self.year,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Clip):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Clip(id={self.id!r}, key={self.key!r}, title={self.title!r})"
+
+    def as_dict(self) -> dict[str, int | str | None]:
+        """Return the clip as a dictionary for JSON responses."""
+        return {
+            "id": self.id,
+            "key": self.key,
+            "key_slug": self.key_slug,
+            "mp3_path": self.mp3_path,
+            "m4a_path": self.m4a_path,
+            "m4r_path": self.m4r_path,
+            "artist": self.artist,
+            "album": self.album,
+            "title": self.title,
+            "year": self.year,
+        }
+
 
 def retrieve_clip_info(
     clip_key: str, database_connection: MySQLConnection | PooledMySQLConnection
-) -> dict[str, int | str | bool | None] | None:
+) -> Clip | dict[str, str] | None:
     """Retrieve clip information for a requested clip key ID.
 
-    Returns a dictionary with clip information, including path,
-    available file extensions and parsed audio tag metadata.
+    Returns a Clip with clip information, including path, available
+    file extensions and parsed audio tag metadata, or a dictionary with
+    an error key if the database query fails.
     """
     if not clip_key:
         return None
 
-    if not database_connection.is_connected():
-        database_connection.reconnect()
+    query = (
+        f"SELECT {CLIP_COLUMNS} "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE c.key = %s "
+        "LIMIT 1"
+    )
 
+    cursor: MySQLCursor = database_connection.cursor()
     try:
-        query = (
-            "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, "
-            "t.title, t.year "
-            "FROM clips c "
-            "JOIN tags t ON t.clip_id = c.id "
-            "WHERE c.key = %s "
-            "LIMIT 1"
-        )
-        cursor: MySQLCursor = database_connection.cursor(dictionary=True)
-        cursor.execute(query, (clip_key,))
-        result = cursor.fetchone()
+        with timed_query("db-query", query, (clip_key,), operation="clip"):
+            cursor.execute(query, (clip_key,))
+            result = cursor.fetchone()
     except ProgrammingError:
         return {"error": "ProgrammingError"}
     except DatabaseError:
@@ -48,15 +185,4 @@ def retrieve_clip_info(
     if not result:
         return None
 
-    return {
-        "id": result["id"],
-        "key": result["key"],
-        "key_slug": slugify(result["key"]),
-        "mp3_path": f"{result['key']}.mp3" if bool(result["mp3"]) else None,
-        "m4a_path": f"{result['key']}.m4a" if bool(result["m4a"]) else None,
-        "m4r_path": f"{result['key']}.m4r" if bool(result["m4r"]) else None,
-        "artist": result["artist"],
-        "album": result["album"],
-        "title": result["title"],
-        "year": result["year"],
-    }
+    return Clip.from_row(result)
@@ -0,0 +1,508 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Memory-Resident Clip Search Index Functions."""
+
+import bisect
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import Error
+from mysql.connector.pooling import PooledMySQLConnection
+
+from app.main.cache import DataVersionMonitor, retrieve_data_version
+from app.main.clip import Clip
+from app.main.search import SearchMode, build_clip
+
+# Tokenization rules follow the InnoDB full-text parser defaults:
+# innodb_ft_min_token_size = 3 and the default InnoDB stopword list
+MIN_TOKEN_SIZE: int = 3
+MAX_TOKEN_SIZE: int = 84
+STOPWORDS: frozenset[str] = frozenset(
+    {
+        "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en",
+        "for", "from", "how", "i", "in", "is", "it", "la", "of", "on", "or",
+        "that", "the", "this", "to", "was", "what", "when", "where", "who",
+        "will", "with", "und", "www",
+    }
+)  # fmt: skip
+
+# Gap inserted between the positions of indexed columns so that quoted
+# phrases cannot match across the title, album and artist columns
+FIELD_POSITION_GAP: int = 100
+
+# BM25 ranking parameters
+BM25_K1: float = 1.2
+BM25_B: float = 0.75
+
+# Number of top ranked clips used for blind query expansion
+EXPANSION_DOCUMENTS: int = 3
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Boolean mode search clauses, made up of optional operators followed by
+# a quoted phrase or a word
+BOOLEAN_CLAUSE_PATTERN = re.compile(r'([+\-~<>]*)(?:"([^"]*)"?|([^\s"()]+))')
+
+
+def tokenize(text: str | None, start: int = 0) -> list[tuple[str, int]]:
+    """Split text into case folded tokens with their word positions."""
+    if not text:
+        return []
+
+    return [
+        (match.group().casefold(), position)
+        for position, match in enumerate(_WORD_PATTERN.finditer(text), start=start)
+    ]
+
+
+def is_indexed(token: str) -> bool:
+    """Return True if a token would be stored in the full-text index."""
+    return MIN_TOKEN_SIZE <= len(token) <= MAX_TOKEN_SIZE and token not in STOPWORDS
+
+
+class SearchIndex:
+    """Inverted index over clip titles, albums and artists.
+
+    Postings map each indexed term to the clip documents that contain
+    it, along with the word positions of the term in each document.
+    """
+
+    def __init__(
+        self,
+        documents: list[Clip],
+        postings: dict[str, dict[int, tuple[int, ...]]],
+        document_lengths: list[int],
+    ) -> None:
+        self.documents = documents
+        self.document_lengths = document_lengths
+        self._postings = postings
+        self._vocabulary: list[str] = sorted(postings)
+        self.average_length: float = (
+            sum(document_lengths) / len(document_lengths) if document_lengths else 0.0
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict[str, Any]]) -> "SearchIndex":
+        """Build an index from clip and tag database rows."""
+        documents: list[Clip] = []
+        postings: dict[str, dict[int, list[int]]] = {}
+        document_lengths: list[int] = []
+
+        for document, row in enumerate(rows):
+            documents.append(build_clip(row))
+            length = 0
+            position = 0
+            for field in ("title", "album", "artist"):
+                tokens = tokenize(row[field], start=position)
+                for token, token_position in tokens:
+                    if not is_indexed(token):
+                        continue
+                    postings.setdefault(token, {}).setdefault(document, []).append(
+                        token_position
+                    )
+                    length += 1
+                position += len(tokens) + FIELD_POSITION_GAP
+            document_lengths.append(length)
+
+        return cls(
+            documents=documents,
+            postings={
+                term: {
+                    document: tuple(positions)
+                    for document, positions in term_postings.items()
+                }
+                for term, term_postings in postings.items()
+            },
+            document_lengths=document_lengths,
+        )
+
+    @property
+    def document_count(self) -> int:
+        """Number of clips in the index."""
+        return len(self.documents)
+
+    def postings(self, term: str) -> dict[int, tuple[int, ...]]:
+        """Return the documents and positions for a term."""
+        return self._postings.get(term, {})
+
+    def prefix_terms(self, prefix: str) -> list[str]:
+        """Return all indexed terms that start with a prefix."""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", lo=start)
+        return self._vocabulary[start:end]
+
+    def document_terms(self, document: int) -> list[str]:
+        """Return the indexed terms for a document."""
+        clip = self.documents[document]
+        return [
+            token
+            for field in ("title", "album", "artist")
+            for token, _ in tokenize(getattr(clip, field))
+            if is_indexed(token)
+        ]
+
+
+def _term_scores(index: SearchIndex, term: str) -> dict[int, float]:
+    """Calculate BM25 scores for every document containing a term."""
+    postings = index.postings(term)
+    if not postings:
+        return {}
+
+    document_frequency = len(postings)
+    idf = math.log(
+        1
+        + (index.document_count - document_frequency + 0.5) / (document_frequency + 0.5)
+    )
+    average_length = index.average_length or 1.0
+    scores: dict[int, float] = {}
+    for document, positions in postings.items():
+        frequency = len(positions)
+        length_norm = (
+            1 - BM25_B + BM25_B * index.document_lengths[document] / average_length
+        )
+        scores[document] = (
+            idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+        )
+    return scores
+
+
+def _phrase_scores(index: SearchIndex, phrase: str) -> dict[int, float]:
+    """Calculate scores for documents that contain an exact phrase."""
+    terms = [
+        (token, position) for token, position in tokenize(phrase) if is_indexed(token)
+    ]
+    if not terms:
+        return {}
+
+    if len(terms) == 1:
+        return _term_scores(index, terms[0][0])
+
+    term_postings = [(index.postings(token), position) for token, position in terms]
+    candidates = set(term_postings[0][0])
+    for postings, _ in term_postings[1:]:
+        candidates &= postings.keys()
+
+    first_offset = terms[0][1]
+    matches: set[int] = set()
+    for document in candidates:
+        for start in term_postings[0][0][document]:
+            if all(
+                start + offset - first_offset in postings[document]
+                for postings, offset in term_postings[1:]
+            ):
+                matches.add(document)
+                break
+
+    scores: dict[int, float] = {}
+    for token, _ in terms:
+        for document, score in _term_scores(index, token).items():
+            if document in matches:
+                scores[document] = scores.get(document, 0.0) + score
+    return scores
+
+
+def _clause_scores(index: SearchIndex, text: str, phrase: bool) -> dict[int, float]:
+    """Calculate scores for a single boolean search clause."""
+    if phrase:
+        return _phrase_scores(index, text)
+
+    scores: dict[int, float] = {}
+    if text.endswith("*"):
+        prefix = text.rstrip("*").casefold()
+        if not prefix or not _WORD_PATTERN.fullmatch(prefix):
+            return scores
+        for term in index.prefix_terms(prefix):
+            for document, score in _term_scores(index, term).items():
+                scores[document] = scores.get(document, 0.0) + score
+        return scores
+
+    for token, _ in tokenize(text):
+        if not is_indexed(token):
+            continue
+        for document, score in _term_scores(index, token).items():
+            scores[document] = scores.get(document, 0.0) + score
+    return scores
+
+
+def _natural_scores(index: SearchIndex, search_query: str) -> dict[int, float]:
+    """Score documents for a natural language search query."""
+    scores: dict[int, float] = {}
+    for token in {token for token, _ in tokenize(search_query) if is_indexed(token)}:
+        for document, score in _term_scores(index, token).items():
+            scores[document] = scores.get(document, 0.0) + score
+    return scores
+
+
+def _boolean_scores(index: SearchIndex, search_query: str) -> dict[int, float]:
+    """Score documents for a boolean mode search query.
+
+    Supports required (+) and excluded (-) clauses, trailing wildcard
+    (*) prefix terms and quoted phrases. Other boolean operators are
+    accepted but do not change ranking.
+    """
+    required: list[dict[int, float]] = []
+    excluded: set[int] = set()
+    optional: list[dict[int, float]] = []
+
+    for match in BOOLEAN_CLAUSE_PATTERN.finditer(search_query):
+        operators, phrase, word = match.groups()
+        is_phrase = phrase is not None
+        text = phrase if is_phrase else word
+        if not text:
+            continue
+
+        # Clauses made up of only stopwords or short words are ignored
+        if not text.endswith("*") and not any(
+            is_indexed(token) for token, _ in tokenize(text)
+        ):
+            continue
+
+        scores = _clause_scores(index, text, is_phrase)
+        if "-" in operators:
+            excluded.update(scores)
+        elif "+" in operators:
+            required.append(scores)
+        else:
+            optional.append(scores)
+
+    if required:
+        candidates = set(required[0])
+        for scores in required[1:]:
+            candidates &= scores.keys()
+    else:
+        candidates = set()
+        for scores in optional:
+            candidates.update(scores)
+
+    candidates -= excluded
+    return {
+        document: sum(scores.get(document, 0.0) for scores in required + optional)
+        for document in candidates
+    }
+
+
+def _expanded_scores(index: SearchIndex, search_query: str) -> dict[int, float]:
+    """Score documents using blind query expansion."""
+    scores = _natural_scores(index, search_query)
+    top_documents = heapq.nsmallest(
+        EXPANSION_DOCUMENTS, scores, key=lambda document: (-scores[document], document)
+    )
+    expansion_terms = [
+        term for document in top_documents for term in index.document_terms(document)
+    ]
+    return _natural_scores(index, " ".join([search_query, *expansion_terms]))
+
+
+def search_index(
+    index: SearchIndex,
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+) -> dict[str, int | list[Clip]]:
+    """Search audio clips from a search index.
+
+    Returns dictionary with three keys: total_count, returned_count, and
+    results, matching the dictionary returned by search_clips.
+    """
+    if not search_query or results_per_page is None or offset is None:
+        return None
+
+    if results_per_page <= 0 or offset < 0:
+        return None
+
+    match search_mode:
+        case SearchMode.NATURAL:
+            scores = _natural_scores(index, search_query)
+        case SearchMode.BOOLEAN:
+            scores = _boolean_scores(index, search_query)
+        case SearchMode.EXPANDED:
+            scores = _expanded_scores(index, search_query)
+
+    if not scores:
+        return {"total_count": 0, "returned_count": 0, "results": []}
+
+    ranked = heapq.nsmallest(
+        offset + results_per_page,
+        scores,
+        key=lambda document: (-scores[document], index.documents[document].id),
+    )
+    clips: list[Clip] = [index.documents[document] for document in ranked[offset:]]
+    if not clips:
+        return {"total_count": 0, "returned_count": 0, "results": []}
+
+    return {"total_count": len(scores), "returned_count": len(clips), "results": clips}
+
+
+def retrieve_index_rows(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> list[dict[str, Any]]:
+    """Retrieve every clip and its tags for building a search index."""
+    query = (
+        "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, "
+        "t.title, t.year "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "ORDER BY c.id"
+    )
+    cursor = database_connection.cursor(dictionary=True)
+    try:
+        cursor.execute(query)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class MemorySearchEngine:
+    """Search engine that serves queries from a memory-resident index.
+
+    The index is rebuilt by a background thread when the data version
+    reported by the data version monitor changes, which is checked once
+    every ``refresh_interval`` seconds, so requests only ever read the
+    current index.
+
+    If a snapshot path is set, the index is memory-mapped from the
+    snapshot file instead and is reopened when the snapshot file is
+    replaced, without querying the database.
+    """
+
+    def __init__(
+        self,
+        data_version_monitor: DataVersionMonitor | None = None,
+        refresh_interval: float = 60.0,
+        snapshot_path: str | None = None,
+    ) -> None:
+        self.data_version_monitor = data_version_monitor
+        self.refresh_interval = refresh_interval
+        self.snapshot_path = snapshot_path
+        self.index: SearchIndex | None = None
+        self.data_version: tuple[int, ...] | None = None
+
+        self._lock = threading.Lock()
+        self._thread_pid: int | None = None
+        self._snapshot_stat: tuple[int, int] | None = None
+
+    def load(
+        self, database_connection: MySQLConnection | PooledMySQLConnection
+    ) -> bool:
+        """Build a new index from the database and swap it in."""
+        try:
+            data_version = retrieve_data_version(database_connection)
+            rows = retrieve_index_rows(database_connection)
+        except Error:
+            return False
+
+        self.index = SearchIndex.from_rows(rows)
+        self.data_version = data_version
+        return True
+
+    def load_snapshot(self) -> bool:
+        """Memory-map the snapshot file if it has been replaced."""
+        # Imported here as the snapshot module depends on this module
+        from app.main.snapshot import MappedSearchIndex
+
+        try:
+            snapshot_stat = Path(self.snapshot_path).stat()
+        except OSError:
+            return False
+
+        _snapshot_stat = (snapshot_stat.st_ino, snapshot_stat.st_mtime_ns)
+        if self.index and _snapshot_stat == self._snapshot_stat:
+            return True
+
+        try:
+            index = MappedSearchIndex(self.snapshot_path)
+        except (OSError, ValueError):
+            return False
+
+        self.index = index
+        self.data_version = index.data_version
+        self._snapshot_stat = _snapshot_stat
+        return True
+
+    def refresh(self) -> None:
+        """Rebuild the index if it is missing or the data has changed.
+
+        Called when the application is created and by the background
+        refresh thread, never while handling a request.
+        """
+        if self.snapshot_path:
+            self.load_snapshot()
+            return
+
+        if not self.data_version_monitor:
+            return
+
+        if self.index:
+            data_version = self.data_version_monitor.current()
+            if data_version is None or data_version == self.data_version:
+                return
+
+        pool = self.data_version_monitor.pool
+        try:
+            database_connection = pool.get_connection()
+        except Error:
+            return
+
+        try:
+            self.load(database_connection)
+        finally:
+            pool.release(database_connection)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def _start_refresh(self) -> None:
+        """Start the background refresh thread in this process."""
+        if self.refresh_interval <= 0 or self._thread_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="search-index-refresh", daemon=True
+                ).start()
+
+    def search(
+        self,
+        search_query: str,
+        search_mode: SearchMode,
+        results_per_page: int,
+        offset: int,
+    ) -> dict[str, int | list[Clip]] | None:
+        """Search the current index, or return None if it is not loaded."""
+        self._start_refresh()
+        index = self.index
+        if index is None:
+            return None
+
+        return search_index(
+            index,
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+        )
+
+    def stats(self) -> dict[str, int | list | str | None]:
+        """Return search index statistics for this worker."""
+        index = self.index
+        return {
+            "documents": index.document_count if index else 0,
+            "data_version": list(self.data_version) if self.data_version else None,
+            "snapshot": self.snapshot_path,
+            "generation": getattr(index, "generation", None),
+        }
@@ -0,0 +1,520 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Related Clip Functions.
+
+Related clips are found offline by comparing TF-IDF vectors of the
+words and character trigrams in clip titles, albums and artists using
+cosine similarity. The most similar clips for every clip are computed
+in batches using sparse matrix products built from NumPy array
+operations, and are written to a NumPy archive file along with the clip
+keys, titles and artists needed to display them. Each worker loads the
+file into memory, so finding related clips is a dictionary lookup with
+no database query.
+
+The file is updated incrementally when clips are added: neighbours are
+computed for the new clips, and the new clips are merged into the
+neighbours of existing clips where they are more similar. The file is
+rebuilt if clips were removed or their tags changed.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.pooling import PooledMySQLConnection
+
+from app.main.cache import retrieve_data_version
+from app.main.memory_index import is_indexed, retrieve_index_rows, tokenize
+
+RELATED_VERSION: int = 1
+
+# Number of related clips stored for each clip
+RELATED_NEIGHBOURS: int = 10
+
+# Features found in more than this fraction of clips, such as common
+# character trigrams, carry little information and are dropped, unless
+# they are found in no more than MIN_DOCUMENT_FREQUENCY_LIMIT clips
+MAX_DOCUMENT_FREQUENCY: float = 0.2
+MIN_DOCUMENT_FREQUENCY_LIMIT: int = 50
+
+# Clips are rebuilt in full instead of incrementally if more than this
+# fraction of clips were added since the last build
+INCREMENTAL_MAX_FRACTION: float = 0.1
+
+# Number of clips compared against every other clip at a time. Each
+# batch holds a float64 similarity row for every clip.
+BATCH_SIZE: int = 128
+
+# Minimum number of seconds between checks for a replaced file
+RELOAD_INTERVAL: float = 60.0
+
+_FIELDS: tuple[str, ...] = ("key", "title", "album", "artist")
+
+
+class FeatureMatrix:
+    """L2 normalized TF-IDF feature vectors in compressed sparse form.
+
+    Rows are stored in compressed sparse row form, and a compressed
+    sparse column copy is kept for finding the clips that share each
+    feature.
+    """
+
+    def __init__(self, features: list[dict[str, float]]) -> None:
+        self.row_count = len(features)
+
+        document_frequency: dict[str, int] = {}
+        for row_features in features:
+            for feature in row_features:
+                document_frequency[feature] = document_frequency.get(feature, 0) + 1
+
+        # Features found in one clip cannot relate two clips
+        max_frequency = max(
+            MAX_DOCUMENT_FREQUENCY * self.row_count, MIN_DOCUMENT_FREQUENCY_LIMIT
+        )
+        vocabulary: dict[str, int] = {}
+        idf: list[float] = []
+        for feature, frequency in document_frequency.items():
+            if 2 <= frequency <= max_frequency:
+                vocabulary[feature] = len(idf)
+                idf.append(math.log((1 + self.row_count) / (1 + frequency)) + 1)
+
+        indptr: list[int] = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for row_features in features:
+            for feature, weight in row_features.items():
+                column = vocabulary.get(feature)
+                if column is not None:
+                    indices.append(column)
+                    data.append(weight * idf[column])
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+
+        # Normalize each row to unit length
+        rows = np.repeat(np.arange(self.row_count), np.diff(self.indptr))
+        norms = np.sqrt(np.bincount(rows, self.data**2, minlength=self.row_count))
+        norms[norms == 0] = 1.0
+        self.data /= norms[rows]
+
+        order = np.argsort(self.indices, kind="stable")
+        self.column_rows = rows[order]
+        self.column_data = self.data[order]
+        self.column_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.indices, minlength=len(vocabulary)),
+            out=self.column_indptr[1:],
+        )
+
+    def similarities(self, rows: np.ndarray) -> np.ndarray:
+        """Return the cosine similarity of rows with every row.
+
+        The product of the selected rows and the transposed matrix is
+        computed by pairing each non-zero value of the selected rows
+        with the non-zero values in the same column, then summing the
+        products for each pair of rows.
+        """
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        positions = _ranges(starts, lengths)
+        batch_rows = np.repeat(np.arange(len(rows)), lengths)
+        columns = self.indices[positions]
+        weights = self.data[positions]
+
+        column_starts = self.column_indptr[columns]
+        column_lengths = self.column_indptr[columns + 1] - column_starts
+        column_positions = _ranges(column_starts, column_lengths)
+        pair_rows = np.repeat(batch_rows, column_lengths)
+        pair_columns = self.column_rows[column_positions]
+        pair_weights = (
+            np.repeat(weights, column_lengths) * self.column_data[column_positions]
+        )
+
+        return np.bincount(
+            pair_rows * self.row_count + pair_columns,
+            weights=pair_weights,
+            minlength=len(rows) * self.row_count,
+        ).reshape(len(rows), self.row_count)
+
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Return the concatenated ranges for each start and length."""
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
+
+def clip_features(row: dict[str, Any]) -> dict[str, float]:
+    """Return the weighted words and character trigrams for a clip.
+
+    Words are weighted above trigrams, which match words that differ
+    in spelling or are joined together. Term frequencies are dampened
+    using 1 + log(frequency).
+    """
+    counts: dict[str, float] = {}
+    for field in ("title", "album", "artist"):
+        for token, _ in tokenize(row[field]):
+            if is_indexed(token):
+                feature = f"w:{token}"
+                counts[feature] = counts.get(feature, 0) + 2
+            padded = f"#{token}#"
+            for start in range(len(padded) - 2):
+                feature = f"c:{padded[start : start + 3]}"
+                counts[feature] = counts.get(feature, 0) + 1
+
+    return {feature: 1 + math.log(count) for feature, count in counts.items()}
+
+
+def _top_neighbours(
+    similarities: np.ndarray, count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the columns and values of the highest values in each row.
+
+    Columns are ordered by descending value, then by column. Columns
+    with a value of zero are returned as -1.
+    """
+    count = min(count, similarities.shape[1])
+    if count == 0:
+        empty = np.zeros((similarities.shape[0], 0))
+        return empty.astype(np.int32), empty.astype(np.float32)
+
+    # Values are negated so that the highest values are partitioned first
+    candidates = np.argpartition(-similarities, count - 1, axis=1)[:, :count]
+    values = np.take_along_axis(similarities, candidates, axis=1)
+    order = np.lexsort((candidates, -values), axis=1)
+    columns = np.take_along_axis(candidates, order, axis=1).astype(np.int32)
+    values = np.take_along_axis(values, order, axis=1).astype(np.float32)
+    columns[values <= 0] = -1
+    values[values <= 0] = 0
+    return columns, values
+
+
+def _merge_neighbours(
+    columns: np.ndarray,
+    values: np.ndarray,
+    new_columns: np.ndarray,
+    new_values: np.ndarray,
+    count: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge two sets of neighbours, keeping the highest values."""
+    merged_columns = np.concatenate((columns, new_columns), axis=1)
+    merged_values = np.concatenate((values, new_values), axis=1)
+    merged_values[merged_columns < 0] = 0
+    order = np.lexsort((merged_columns, -merged_values), axis=1)[:, :count]
+    columns = np.take_along_axis(merged_columns, order, axis=1)
+    values = np.take_along_axis(merged_values, order, axis=1)
+    columns[values <= 0] = -1
+    return columns, values
+
+
+def compute_neighbours(
+    matrix: FeatureMatrix,
+    rows: np.ndarray,
+    count: int = RELATED_NEIGHBOURS,
+    existing_rows: int = 0,
+    batch_size: int = BATCH_SIZE,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the most similar rows for each of a set of rows.
+
+    Returns the neighbours and similarities for each row, and the most
+    similar of the given rows for each of the first ``existing_rows``
+    rows, which is used to merge new clips into the neighbours of
+    existing clips.
+    """
+    neighbours = np.full((len(rows), count), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), count), dtype=np.float32)
+    existing_neighbours = np.full((existing_rows, count), -1, dtype=np.int32)
+    existing_scores = np.zeros((existing_rows, count), dtype=np.float32)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        similarities = matrix.similarities(batch)
+        similarities[np.arange(len(batch)), batch] = 0
+
+        columns, values = _top_neighbours(similarities, count)
+        neighbours[start : start + len(batch), : columns.shape[1]] = columns
+        scores[start : start + len(batch), : values.shape[1]] = values
+
+        if existing_rows:
+            # Similarity is symmetric, so the columns for existing rows
+            # are the similarity of each existing row with the batch
+            batch_columns, batch_values = _top_neighbours(
+                similarities[:, :existing_rows].T, count
+            )
+            batch_columns[batch_columns >= 0] = batch[batch_columns[batch_columns >= 0]]
+            existing_neighbours, existing_scores = _merge_neighbours(
+                existing_neighbours,
+                existing_scores,
+                batch_columns,
+                batch_values,
+                count,
+            )
+
+    return neighbours, scores, existing_neighbours, existing_scores
+
+
+def _tag_hashes(rows: list[dict[str, Any]]) -> np.ndarray:
+    """Return a hash of the key and tags of each clip."""
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(
+                    "\0".join(str(row[field] or "") for field in _FIELDS).encode(
+                        "utf-8"
+                    ),
+                    digest_size=8,
+                ).digest(),
+                "little",
+            )
+            for row in rows
+        ],
+        dtype=np.uint64,
+    )
+
+
+def _encode_strings(rows: Iterable[dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Encode the key, title, album and artist of each clip.
+
+    Returns a UTF-8 byte array and the offsets of each string in it.
+    """
+    encoded: list[bytes] = [
+        (row[field] or "").encode("utf-8") for row in rows for field in _FIELDS
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def read_related_clips(related_path: str | Path) -> dict[str, Any] | None:
+    """Read a related clips file, or return None if it is missing or invalid."""
+    try:
+        with np.load(related_path, allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+        metadata = json.loads(str(arrays["metadata"]))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if metadata.get("version") != RELATED_VERSION:
+        return None
+    arrays["metadata"] = metadata
+    return arrays
+
+
+def build_related_clips(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+    related_path: str | Path,
+    neighbours: int = RELATED_NEIGHBOURS,
+    full: bool = False,
+) -> dict[str, Any]:
+    """Build or update the related clips file.
+
+    If only new clips with higher clip IDs were added since the last
+    build, and they make up no more than ``INCREMENTAL_MAX_FRACTION`` of
+    all clips, only the new clips are compared against every clip.
+    Otherwise, or if ``full`` is True, every clip is compared against
+    every other clip. The file is written to a temporary file and
+    renamed over the existing file. Returns the file metadata.
+    """
+    related_path = Path(related_path)
+    data_version = retrieve_data_version(database_connection)
+    rows = retrieve_index_rows(database_connection)
+    clip_ids = np.array([row["id"] for row in rows], dtype=np.int64)
+    hashes = _tag_hashes(rows)
+    matrix = FeatureMatrix([clip_features(row) for row in rows])
+
+    previous = None if full else read_related_clips(related_path)
+    existing = len(previous["clip_ids"]) if previous else 0
+    incremental = (
+        previous is not None
+        and previous["metadata"]["neighbours"] == neighbours
+        and 0 < existing <= len(rows)
+        and len(rows) - existing <= INCREMENTAL_MAX_FRACTION * len(rows)
+        and np.array_equal(previous["clip_ids"], clip_ids[:existing])
+        and np.array_equal(previous["hashes"], hashes[:existing])
+    )
+
+    if incremental:
+        new_neighbours, new_scores, existing_neighbours, existing_scores = (
+            compute_neighbours(
+                matrix,
+                np.arange(existing, len(rows)),
+                count=neighbours,
+                existing_rows=existing,
+            )
+        )
+        merged_neighbours, merged_scores = _merge_neighbours(
+            previous["neighbours"],
+            previous["scores"],
+            existing_neighbours,
+            existing_scores,
+            neighbours,
+        )
+        all_neighbours = np.concatenate((merged_neighbours, new_neighbours))
+        all_scores = np.concatenate((merged_scores, new_scores))
+    else:
+        all_neighbours, all_scores, _, _ = compute_neighbours(
+            matrix, np.arange(len(rows)), count=neighbours
+        )
+
+    strings, string_offsets = _encode_strings(rows)
+    metadata: dict[str, Any] = {
+        "version": RELATED_VERSION,
+        "neighbours": neighbours,
+        "clips": len(rows),
+        "added": len(rows) - existing if incremental else len(rows),
+        "incremental": bool(incremental),
+        "data_version": list(data_version) if data_version else None,
+        "built": int(time.time()),
+    }
+
+    related_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{related_path.name}.", suffix=".npz", dir=related_path.parent
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            np.savez(
+                temp_file,
+                metadata=np.array(json.dumps(metadata)),
+                clip_ids=clip_ids,
+                hashes=hashes,
+                neighbours=all_neighbours.astype(np.int32),
+                scores=all_scores.astype(np.float32),
+                strings=strings,
+                string_offsets=string_offsets,
+            )
+        Path(temp_path).chmod(0o644)
+        Path(temp_path).replace(related_path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return metadata
+
+
+class RelatedClips:
+    """Per-worker related clips loaded from a related clips file.
+
+    The file is loaded again when it is replaced, which is checked at
+    most once every ``RELOAD_INTERVAL`` seconds.
+    """
+
+    def __init__(self, related_path: str, limit: int = 5) -> None:
+        self.related_path = related_path
+        self.limit = limit
+
+        self._lock = threading.Lock()
+        self._arrays: dict[str, Any] | None = None
+        self._rows: dict[str, int] = {}
+        self._file_stat: tuple[int, int] | None = None
+        self._reload_checked: float | None = None
+        self._lookups = 0
+        self._hits = 0
+
+    def load(self) -> bool:
+        """Load the related clips file if it has been replaced."""
+        try:
+            file_stat = Path(self.related_path).stat()
+        except OSError:
+            return False
+
+        _file_stat = (file_stat.st_ino, file_stat.st_mtime_ns)
+        if self._arrays and _file_stat == self._file_stat:
+            return True
+
+        arrays = read_related_clips(self.related_path)
+        if arrays is None:
+            return False
+
+        strings: bytes = arrays["strings"].tobytes()
+        offsets: list[int] = arrays["string_offsets"].tolist()
+        keys = [
+            strings[offsets[index] : offsets[index + 1]].decode("utf-8")
+            for index in range(0, len(offsets) - 1, len(_FIELDS))
+        ]
+        arrays["strings"] = strings
+        arrays["string_offsets"] = offsets
+        self._arrays = arrays
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._file_stat = _file_stat
+        return True
+
+    def _reload(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._reload_checked is not None
+                and now - self._reload_checked < RELOAD_INTERVAL
+            ):
+                return
+            self._reload_checked = now
+
+        self.load()
+
+    def related(self, clip_key: str) -> list[dict[str, str | float]]:
+        """Return the clips most related to a clip, most related first."""
+        self._reload()
+        arrays, rows = self._arrays, self._rows
+        with self._lock:
+            self._lookups += 1
+
+        row = rows.get(clip_key)
+        if arrays is None or row is None:
+            return []
+
+        strings: bytes = arrays["strings"]
+        offsets: list[int] = arrays["string_offsets"]
+        related: list[dict[str, str | float]] = []
+        for neighbour, score in zip(
+            arrays["neighbours"][row][: self.limit].tolist(),
+            arrays["scores"][row][: self.limit].tolist(),
+            strict=True,
+        ):
+            if neighbour < 0:
+                break
+
+            start = neighbour * len(_FIELDS)
+            related.append(
+                {
+                    "score": round(score, 4),
+                    **{
+                        field: strings[
+                            offsets[start + position] : offsets[start + position + 1]
+                        ].decode("utf-8")
+                        for position, field in enumerate(_FIELDS)
+                    },
+                }
+            )
+
+        if related:
+            with self._lock:
+                self._hits += 1
+        return related
+
+    def stats(self) -> dict[str, int | list | None]:
+        """Return related clips statistics for this worker."""
+        arrays = self._arrays
+        metadata: dict[str, Any] = arrays["metadata"] if arrays else {}
+        with self._lock:
+            return {
+                "clips": metadata.get("clips", 0),
+                "neighbours": metadata.get("neighbours"),
+                "data_version": metadata.get("data_version"),
+                "built": metadata.get("built"),
+                "lookups": self._lookups,
+                "hits": self._hits,
+            }
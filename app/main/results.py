@@ -0,0 +1,277 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Search Result and Clip Information Retrieval Functions."""
+
+from collections.abc import Callable
+from dataclasses import replace
+from typing import Any
+
+from flask import current_app, g
+from mysql.connector.errors import Error
+
+from app.circuit_breaker import CircuitBreaker
+from app.main.backends import SearchBackend
+from app.main.cache import SearchCache, normalize_query
+from app.main.clip import Clip
+from app.main.memory_index import MemorySearchEngine
+from app.main.search import SearchMode, SeekPosition
+from app.main.single_flight import SingleFlight
+from app.metrics import record_database_error, record_result_count
+
+
+def _stale_result(search_cache: SearchCache | None, key: tuple) -> Any | None:
+    """Return an expired or invalidated cached result, if available.
+
+    Responses that use a stale result are marked as stale and are not
+    cacheable.
+    """
+    if not search_cache:
+        return None
+
+    value = search_cache.get_stale(key)
+    if value is not None:
+        g.stale_results = True
+        g.response_cacheable = False
+    return value
+
+
+def _retrieve_from_backend(
+    key: tuple, function: Callable[[], Any], search_cache: SearchCache | None
+) -> Any:
+    """Run a search backend function for a search result cache key.
+
+    Identical concurrent calls are coalesced, and database errors are
+    counted by the circuit breaker. A stale cached result is returned
+    instead of waiting if a call for the same key is in progress, and
+    instead of a database error if the circuit is open or the call
+    fails. Database errors are returned as an error dictionary.
+    """
+    circuit_breaker: CircuitBreaker | None = current_app.extensions.get(
+        "circuit_breaker"
+    )
+    single_flight: SingleFlight | None = current_app.extensions.get("single_flight")
+
+    circuit_open = bool(circuit_breaker) and not circuit_breaker.allow_request()
+    if circuit_open or (single_flight and single_flight.in_flight(key)):
+        stale_result = _stale_result(search_cache, key)
+        if stale_result is not None:
+            return stale_result
+
+    if circuit_open:
+        return {"error": "DatabaseError"}
+
+    def _call() -> Any:
+        try:
+            result = function()
+        except Error:
+            if circuit_breaker:
+                circuit_breaker.record_failure()
+            raise
+
+        if circuit_breaker:
+            if isinstance(result, dict) and result.get("error") == "DatabaseError":
+                circuit_breaker.record_failure()
+            else:
+                circuit_breaker.record_success()
+        return result
+
+    try:
+        result = single_flight.do(key, _call) if single_flight else _call()
+    except Error:
+        result = {"error": "DatabaseError"}
+
+    if isinstance(result, dict) and result.get("error") == "DatabaseError":
+        stale_result = _stale_result(search_cache, key)
+        if stale_result is not None:
+            return stale_result
+
+    return result
+
+
+def retrieve_clip(clip_key: str) -> Clip | dict[str, str] | None:
+    """Return clip information for a clip key from the cache or backend.
+
+    Clips are cached in the search result cache, and concurrent lookups
+    for the same clip key share one backend lookup.
+    """
+    search_cache: SearchCache | None = current_app.extensions.get("search_cache")
+    cache_key: tuple[str, str] = ("clip", clip_key)
+    if search_cache:
+        search_cache.validate(current_app.extensions["data_version"].current())
+        cached_clip: Clip | None = search_cache.get(cache_key)
+        if cached_clip is not None:
+            return cached_clip
+
+    search_backend: SearchBackend = current_app.extensions["search_backend"]
+    clip: Clip | dict[str, str] | None = _retrieve_from_backend(
+        cache_key, lambda: search_backend.lookup(clip_key), search_cache
+    )
+
+    if isinstance(clip, dict):
+        record_database_error(clip["error"], "clip")
+    elif clip and search_cache and not g.get("stale_results"):
+        search_cache.set(cache_key, clip)
+
+    return clip
+
+
+def _search_cache_key(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+    seek: SeekPosition | None = None,
+) -> tuple:
+    """Return the search result cache key for a page of search results.
+
+    Pages retrieved from a seek position are cached under a key that
+    includes the seek position, as a pagination cursor can point to any
+    position in the results, not only the start of the requested page.
+    """
+    key: tuple = (
+        normalize_query(search_query),
+        search_mode.value,
+        offset,
+        results_per_page,
+    )
+    if seek:
+        return (*key, seek.score, seek.clip_id, seek.before)
+    return key
+
+
+def _search_count_key(search_query: str, search_mode: SearchMode) -> tuple:
+    return ("count", normalize_query(search_query), search_mode.value)
+
+
+def cached_search_results(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+    seek: SeekPosition | None = None,
+) -> dict[str, int | list[Clip]] | None:
+    """Return search results from the search index or result cache.
+
+    Returns None if the results can only be retrieved from the search
+    backend. The search index does not use the seek position.
+    """
+    search_engine: MemorySearchEngine | None = current_app.extensions.get(
+        "search_engine"
+    )
+    if search_engine:
+        index_results: dict[str, int | list[Clip]] | None = search_engine.search(
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+        )
+        if index_results is not None:
+            record_result_count(search_mode, index_results["total_count"])
+            return index_results
+
+    search_cache: SearchCache | None = current_app.extensions.get("search_cache")
+    if search_cache:
+        search_cache.validate(current_app.extensions["data_version"].current())
+        cached_results: dict[str, int | list[Clip]] | None = search_cache.get(
+            _search_cache_key(
+                search_query, search_mode, results_per_page, offset, seek=seek
+            )
+        )
+        if cached_results is not None:
+            record_result_count(search_mode, cached_results["total_count"])
+            return cached_results
+
+    return None
+
+
+def _trusted_seek_position(
+    search_query: str,
+    search_mode: SearchMode,
+    seek: SeekPosition,
+    search_cache: SearchCache | None,
+) -> SeekPosition | None:
+    """Return the seek position with the total count set by the server.
+
+    The total count is taken from the search result cache or counted by
+    the search backend. Returns None if the clips could not be counted,
+    so the page is retrieved using the offset instead.
+    """
+    count_key: tuple = _search_count_key(search_query, search_mode)
+    total_count: int | dict[str, str] | None = (
+        search_cache.get(count_key) if search_cache else None
+    )
+    if total_count is None:
+        search_backend: SearchBackend = current_app.extensions["search_backend"]
+        total_count = _retrieve_from_backend(
+            count_key,
+            lambda: search_backend.count(search_query, search_mode),
+            search_cache,
+        )
+
+    if not isinstance(total_count, int):
+        return None
+
+    return replace(seek, total_count=total_count)
+
+
+def retrieve_backend_search_results(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+    seek: SeekPosition | None = None,
+) -> dict[str, int | list[Clip]]:
+    """Return search results from the search backend and cache them.
+
+    Backend searches use the seek position, if provided, instead of the
+    offset and fall back to the offset if no results are found from the
+    seek position. The total count of seek position searches is never
+    taken from the pagination cursor. Concurrent backend searches for
+    the same normalized query, search mode and page share one backend
+    search.
+    """
+    search_cache: SearchCache | None = current_app.extensions.get("search_cache")
+    if seek:
+        seek = _trusted_seek_position(search_query, search_mode, seek, search_cache)
+
+    cache_key: tuple = _search_cache_key(
+        search_query, search_mode, results_per_page, offset, seek=seek
+    )
+    search_backend: SearchBackend = current_app.extensions["search_backend"]
+
+    def _search() -> dict[str, int | list[Clip]]:
+        results: dict[str, int | list[Clip]] = search_backend.search(
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+            seek=seek,
+        )
+        if seek and "error" not in results and not results["results"]:
+            return search_backend.search(
+                search_query=search_query,
+                search_mode=search_mode,
+                results_per_page=results_per_page,
+                offset=offset,
+            )
+        return results
+
+    results_info: dict[str, int | list[Clip]] = _retrieve_from_backend(
+        cache_key, _search, search_cache
+    )
+
+    if "error" in results_info:
+        record_database_error(results_info["error"], "search")
+        return results_info
+
+    record_result_count(search_mode, results_info["total_count"])
+    if search_cache and not g.get("stale_results"):
+        search_cache.set(cache_key, results_info)
+        search_cache.set(
+            _search_count_key(search_query, search_mode), results_info["total_count"]
+        )
+
+    return results_info
@@ -5,9 +5,10 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Main Application Routes."""
 
+import hashlib
 import math
-import random
 from pathlib import Path
+from typing import Any
 
 from flask import (
     Blueprint,
@@ -15,34 +16,210 @@ from flask import (
     current_app,
     g,
     render_template,
+    request,
     send_file,
 )
-from mysql.connector import connect
-from mysql.connector.connection import MySQLConnection
-from mysql.connector.pooling import PooledMySQLConnection
 
-from app.main.clip import retrieve_clip_info
-from app.main.search import SearchMode, search_clips
-from app.utilities import gurgle_name, pagination_list
+from app.admission import (
+    CLIP_COST,
+    acquire_search_slot,
+    admission_control,
+    search_cost,
+)
+from app.caching import clip_surrogate_keys, conditional_response
+from app.main.cache import normalize_query
+from app.main.clip import Clip
+from app.main.related import RelatedClips
+from app.main.results import (
+    cached_search_results,
+    retrieve_backend_search_results,
+    retrieve_clip,
+)
+from app.main.search import SearchMode, SeekPosition, parse_search_mode
+from app.prerender import prerendered_response
+from app.streaming import streamed_response
+from app.utilities import (
+    GURGLE_NAMES,
+    decode_cursor,
+    encode_cursor,
+    gurgle_name,
+    pagination_list,
+)
 
 blueprint = Blueprint("main", __name__)
 
 
+def _clip_surrogate_keys() -> str:
+    """Return surrogate keys used to purge cached clip pages."""
+    return clip_surrogate_keys("clips clip", "clip")
+
+
+def _search_surrogate_keys() -> str:
+    """Return surrogate keys used to purge cached search result pages."""
+    _mode: str = request.args.get("mode", "1")
+    if not _mode.isdigit():
+        _mode = "1"
+
+    return f"clips search search-mode-{_mode}"
+
+
+def _query_signature(search_query: str, search_mode: SearchMode) -> str:
+    """Return a short signature used to tie pagination cursors to a query."""
+    _query = f"{search_mode.value}:{normalize_query(search_query)}"
+    return hashlib.sha256(_query.encode("utf-8")).hexdigest()[:16]
+
+
+def _pagination_cursor(
+    search_query: str,
+    search_mode: SearchMode,
+    page: int,
+    seek_key: tuple[float, int] | None,
+    before: bool,
+) -> str | None:
+    """Build a pagination cursor for the page before or after a seek key."""
+    if not seek_key:
+        return None
+
+    return encode_cursor(
+        {
+            "q": _query_signature(search_query, search_mode),
+            "p": page,
+            "s": seek_key[0],
+            "i": seek_key[1],
+            "b": int(before),
+        },
+        current_app.secret_key,
+    )
+
+
+def _seek_position(
+    cursor: str | None, search_query: str, search_mode: SearchMode, page: int
+) -> SeekPosition | None:
+    """Return the seek position from a pagination cursor.
+
+    Returns None if the cursor is not valid, was not signed by this
+    application or does not belong to the requested search query,
+    search mode and page.
+    """
+    data: dict | None = decode_cursor(cursor, current_app.secret_key)
+    if not data or data.get("q") != _query_signature(search_query, search_mode):
+        return None
+
+    try:
+        if int(data["p"]) != page:
+            return None
+
+        return SeekPosition(
+            score=float(data["s"]),
+            clip_id=int(data["i"]),
+            before=bool(data["b"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _clip_cost() -> float:
+    """Return the admission control cost of a clip page request."""
+    return CLIP_COST if (g.sanitized_args.get("key") or "").strip() else 0
+
+
+def _search_cost() -> float:
+    """Return the admission control cost of a search results request."""
+    request_data = g.sanitized_args
+    if not (request_data.get("query") or "").strip():
+        return 0
+
+    try:
+        page: int = int(request_data.get("page", 1))
+    except ValueError:
+        page = 1
+
+    search_mode, _ = parse_search_mode(
+        request_data.get("mode", 1),
+        enable_query_expansion_mode=current_app.config["app_settings"][
+            "enable_query_expansion_mode"
+        ],
+    )
+    return search_cost(search_mode, page)
+
+
+def _search_results_context(
+    results_info: dict[str, int | list[Clip]],
+    search_query: str,
+    search_mode: SearchMode,
+    page: int,
+    results_per_page: int,
+) -> dict[str, Any]:
+    """Return the search results template context for retrieved results.
+
+    Responses for search errors are marked as not cacheable.
+    """
+    if "error" in results_info:
+        g.response_cacheable = False
+        return {"error": results_info["error"]}
+
+    results: list[Clip] = results_info["results"]
+    if not results:
+        return {}
+
+    total_count: int = results_info["total_count"]
+    total_pages: int = math.ceil(total_count / results_per_page)
+    previous_cursor: str | None = None
+    next_cursor: str | None = None
+    if page > 1:
+        previous_cursor = _pagination_cursor(
+            search_query=search_query,
+            search_mode=search_mode,
+            page=page - 1,
+            seek_key=results_info.get("seek_start"),
+            before=True,
+        )
+    if page < total_pages:
+        next_cursor = _pagination_cursor(
+            search_query=search_query,
+            search_mode=search_mode,
+            page=page + 1,
+            seek_key=results_info.get("seek_end"),
+            before=False,
+        )
+
+    return {
+        "current_page": page,
+        "total_count": total_count,
+        "total_pages": total_pages,
+        "pagination_list": pagination_list(current_page=page, total_pages=total_pages),
+        "previous_cursor": previous_cursor,
+        "next_cursor": next_cursor,
+        "returned_count": results_info["returned_count"],
+        "search_results": results,
+        "stale": g.get("stale_results", False),
+    }
+
+
 @blueprint.route("/")
-def index() -> str:
+def index() -> Response:
     """View: Landing Page."""
-    return render_template(
-        "pages/index.html", exclude_footer_links=False, gurgle=gurgle_name()
+    return prerendered_response(
+        "pages/index.html",
+        variants={"gurgle": GURGLE_NAMES},
+        exclude_footer_links=False,
+        gurgle=gurgle_name(),
     )
 
 
 @blueprint.route("/about")
-def about() -> str:
+def about() -> Response:
     """View: About Page."""
-    return render_template("pages/about.html", gurgle=gurgle_name())
+    return prerendered_response(
+        "pages/about.html", variants={"gurgle": GURGLE_NAMES}, gurgle=gurgle_name()
+    )
 
 
 @blueprint.route("/clip")
+@conditional_response(
+    max_age=300, shared_max_age=3600, surrogate_keys=_clip_surrogate_keys
+)
+@admission_control(cost=_clip_cost)
 def clip_info() -> str:
     """View: Individual Clip Page."""
     request_data = g.sanitized_args
@@ -55,34 +232,40 @@ def clip_info() -> str:
     _key = _key.strip()
     _key = _key[:254]
 
-    database_connection: MySQLConnection | PooledMySQLConnection = connect(
-        **current_app.config["database_settings"]
-    )
-    clip: dict[str, int | str | bool | None] | None = retrieve_clip_info(
-        clip_key=_key, database_connection=database_connection
-    )
+    clip: Clip | dict[str, str] | None = retrieve_clip(_key)
 
-    if clip and "error" in clip:
+    if isinstance(clip, dict):
+        g.response_cacheable = False
         return render_template(
-            "pages/clip.html", clip_key=_key, error=clip["error"], gurgle=gurgle_name()
+            "pages/clip.html",
+            clip_key=_key,
+            error=clip["error"],
+            gurgle=gurgle_name(request.full_path),
         )
 
     if clip:
+        related_clips: RelatedClips | None = current_app.extensions.get("related_clips")
         return render_template(
             "pages/clip.html",
             clip_key=_key,
             clip=clip,
             expand_info=True,
-            gurgle=gurgle_name(),
+            related_clips=related_clips.related(clip.key) if related_clips else None,
+            stale=g.get("stale_results", False),
+            gurgle=gurgle_name(request.full_path),
         )
 
-    return render_template("pages/clip.html", clip_key=_key, gurgle=gurgle_name())
+    return render_template(
+        "pages/clip.html", clip_key=_key, gurgle=gurgle_name(request.full_path)
+    )
 
 
 @blueprint.route("/help")
-def help_page() -> str:
+def help_page() -> Response:
     """View: Help Page."""
-    return render_template("pages/help.html", gurgle=gurgle_name())
+    return prerendered_response(
+        "pages/help.html", variants={"gurgle": GURGLE_NAMES}, gurgle=gurgle_name()
+    )
 
 
 @blueprint.route("/robots.txt")
@@ -98,13 +281,19 @@ def robots_txt() -> Response:
 
 
 @blueprint.route("/search")
-def search() -> str:
+@conditional_response(
+    max_age=60, shared_max_age=300, surrogate_keys=_search_surrogate_keys
+)
+@admission_control(cost=_search_cost)
+def search() -> str | Response:
     """View: Search Results."""
     request_data = g.sanitized_args
     query: str | None = request_data.get("query")
 
     if not query:
-        return render_template("pages/search.html", gurgle=gurgle_name())
+        return render_template(
+            "pages/search.html", gurgle=gurgle_name(request.full_path)
+        )
 
     # Strip whitespaces from and enforce length limit on query string
     query = query.strip()
@@ -116,73 +305,90 @@ def search() -> str:
     except ValueError:
         page = 1
 
-    valid_search_mode: bool = False
-    try:
-        search_mode: SearchMode = SearchMode(int(request_data.get("mode", 1)))
-
-        # Only allow query expansion mode if the feature flag is enabled,
-        # otherwise use the default natural language search mode instead
-        if (
-            not current_app.config["app_settings"]["enable_query_expansion_mode"]
-            and search_mode == SearchMode.EXPANDED
-        ):
-            search_mode = SearchMode.NATURAL
-        else:
-            valid_search_mode = True
-    except ValueError:
-        search_mode: SearchMode = SearchMode.NATURAL
+    search_mode, valid_search_mode = parse_search_mode(
+        request_data.get("mode", 1),
+        enable_query_expansion_mode=current_app.config["app_settings"][
+            "enable_query_expansion_mode"
+        ],
+    )
+    g.search_mode = search_mode
 
     results_per_page: int = current_app.config["app_settings"]["results_per_page"]
     offset: int = (page - 1) * results_per_page
 
-    database_connection: MySQLConnection | PooledMySQLConnection = connect(
-        **current_app.config["database_settings"]
+    # Use the pagination cursor seek position, if valid, for previous
+    # and next page links and fall back to an offset for page jumps
+    seek: SeekPosition | None = _seek_position(
+        cursor=request_data.get("cursor"),
+        search_query=query,
+        search_mode=search_mode,
+        page=page,
     )
-    results_info: dict[str, int | list[dict]] = search_clips(
+
+    template_context: dict[str, Any] = {
+        "search_query": query,
+        "search_mode": search_mode.value,
+        "valid_search_mode": valid_search_mode,
+        "gurgle": gurgle_name(request.full_path),
+    }
+
+    results_info: dict[str, int | list[Clip]] | None = cached_search_results(
         search_query=query,
         search_mode=search_mode,
         results_per_page=results_per_page,
         offset=offset,
-        database_connection=database_connection,
+        seek=seek,
     )
-    database_connection.close()
 
-    if "error" in results_info:
-        return render_template(
+    # Searches that query the search backend need a free search slot,
+    # which is held until the response has been sent
+    if results_info is None:
+        acquire_search_slot()
+
+    # Stream the page when the results need to be retrieved from the
+    # search backend, so the page head and navigation are sent before
+    # the search query runs. Response headers are sent before the
+    # results are retrieved, so streamed pages are not cacheable.
+    if (
+        results_info is None
+        and current_app.config["app_settings"]["stream_search_results"]
+    ):
+        g.response_cacheable = False
+        return streamed_response(
             "pages/search.html",
-            search_query=query,
-            search_mode=search_mode.value,
-            error=results_info["error"],
-            gurgle=gurgle_name(),
+            search_results_context=lambda: _search_results_context(
+                retrieve_backend_search_results(
+                    search_query=query,
+                    search_mode=search_mode,
+                    results_per_page=results_per_page,
+                    offset=offset,
+                    seek=seek,
+                ),
+                search_query=query,
+                search_mode=search_mode,
+                page=page,
+                results_per_page=results_per_page,
+            ),
+            **template_context,
         )
 
-    total_count: int = results_info["total_count"]
-    total_pages: int = math.ceil(total_count / results_per_page)
-    returned_count: int = results_info["returned_count"]
-    results: list[dict | None] = results_info["results"]
-    _pagination_list: list[int | None] | None = pagination_list(
-        current_page=page, total_pages=total_pages
-    )
-
-    if results:
-        return render_template(
-            "pages/search.html",
+    if results_info is None:
+        results_info = retrieve_backend_search_results(
             search_query=query,
-            search_mode=search_mode.value,
-            valid_search_mode=valid_search_mode,
-            current_page=page,
-            total_count=total_count,
-            total_pages=total_pages,
-            pagination_list=_pagination_list,
-            returned_count=returned_count,
-            search_results=results,
-            gurgle=gurgle_name(),
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+            seek=seek,
         )
 
     return render_template(
         "pages/search.html",
-        search_query=query,
-        search_mode=search_mode.value,
-        valid_search_mode=valid_search_mode,
-        gurgle=gurgle_name(),
+        **template_context,
+        **_search_results_context(
+            results_info,
+            search_query=query,
+            search_mode=search_mode,
+            page=page,
+            results_per_page=results_per_page,
+        ),
     )
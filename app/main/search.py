@@ -5,14 +5,20 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Clip Search Functions."""
 
+import contextlib
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
 from enum import Enum
 from typing import Any
 
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import MySQLCursor
-from mysql.connector.errors import DatabaseError, ProgrammingError
+from mysql.connector.errors import DatabaseError, Error, ProgrammingError
 from mysql.connector.pooling import PooledMySQLConnection
-from slugify import slugify
+
+from app.main.clip import CLIP_COLUMNS, Clip
+from app.metrics import timed
+from app.slow_queries import timed_query
 
 
 class SearchMode(Enum):
@@ -23,17 +29,137 @@ class SearchMode(Enum):
     EXPANDED = 3
 
 
+class SearchStrategy(Enum):
+    """Search query execution strategy."""
+
+    WINDOW = "window"
+    TWO_QUERY = "two_query"
+
+
+def parse_search_mode(
+    mode: int | str | None, enable_query_expansion_mode: bool = False
+) -> tuple[SearchMode, bool]:
+    """Parse a requested search mode value.
+
+    Returns the search mode to use and whether the requested search
+    mode was valid. Invalid search modes, and the query expansion search
+    mode if it is not enabled, are replaced with the natural language
+    search mode.
+    """
+    try:
+        search_mode: SearchMode = SearchMode(int(mode))
+    except (TypeError, ValueError):
+        return SearchMode.NATURAL, False
+
+    # Only allow query expansion mode if the feature flag is enabled,
+    # otherwise use the default natural language search mode instead
+    if not enable_query_expansion_mode and search_mode == SearchMode.EXPANDED:
+        return SearchMode.NATURAL, False
+
+    return search_mode, True
+
+
+# Full-text search modifiers used for each search mode
+_MATCH_MODIFIERS: dict[SearchMode, str] = {
+    SearchMode.NATURAL: "IN NATURAL LANGUAGE MODE",
+    SearchMode.BOOLEAN: "IN BOOLEAN MODE",
+    SearchMode.EXPANDED: "WITH QUERY EXPANSION",
+}
+
+
+# Positions of the score and total count columns that follow the clip
+# columns in search query rows
+SCORE_COLUMN: int = 9
+TOTAL_COUNT_COLUMN: int = 10
+
+
+@dataclass(frozen=True)
+class SeekPosition:
+    """Keyset pagination position within ordered search results.
+
+    Results are ordered by descending score and then ascending clip ID.
+    If before is True, the page of results that come before the
+    position is requested, otherwise the page of results after it.
+    Pagination cursors do not carry the total count, which is set from a
+    count retrieved by the server before the backend is searched.
+    """
+
+    score: float
+    clip_id: int
+    total_count: int | None = None
+    before: bool = False
+
+
+def build_clip(row: Mapping[str, Any]) -> Clip:
+    """Build a clip search result from a database row with named columns."""
+    return Clip(
+        row["id"],
+        row["key"],
+        row["mp3"],
+        row["m4a"],
+        row["m4r"],
+        row["artist"],
+        row["album"],
+        row["title"],
+        row["year"],
+    )
+
+
+def build_results(
+    rows: list[tuple], total_count: int
+) -> dict[str, int | list[Clip] | tuple[float, int]]:
+    """Build a search results dictionary from ordered database rows."""
+    with timed("build"):
+        clips: list[Clip] = [Clip.from_row(row) for row in rows]
+    return {
+        "total_count": total_count,
+        "returned_count": len(clips),
+        "results": clips,
+        "seek_start": (float(rows[0][SCORE_COLUMN]), rows[0][0]),
+        "seek_end": (float(rows[-1][SCORE_COLUMN]), rows[-1][0]),
+    }
+
+
+def _query_details(
+    search_mode: SearchMode, results_per_page: int, offset: int | None = None
+) -> dict[str, int | str]:
+    """Return search details recorded in the slow query log."""
+    details: dict[str, int | str] = {
+        "operation": "search",
+        "mode": search_mode.name.lower(),
+    }
+    if offset is not None:
+        details["page"] = offset // results_per_page + 1
+        details["offset"] = offset
+
+    return details
+
+
 def search_clips(
     search_query: str,
     search_mode: SearchMode,
     results_per_page: int,
     offset: int,
     database_connection: MySQLConnection | PooledMySQLConnection,
-) -> dict[str, int | list[dict]]:
+    search_strategy: SearchStrategy = SearchStrategy.WINDOW,
+    seek: SeekPosition | None = None,
+) -> dict[str, int | list[Clip]]:
     """Search audio clips from the database.
 
     Returns dictionary with three keys: total_count, returned_count, and
-    results. The results value includes a list of search results.
+    results. The results value includes a list of search results. The
+    dictionary also includes seek_start and seek_end keys with the
+    score and clip ID of the first and last results, which are used to
+    build keyset pagination cursors.
+
+    The window search strategy retrieves the total count and the
+    requested page of results in a single query. The two query
+    strategy runs a separate count query before retrieving the
+    requested page of results.
+
+    If a seek position is provided, the page of results before or after
+    that position is retrieved without using an offset and the total
+    count is taken from the seek position.
     """
     if not search_query or results_per_page is None or offset is None:
         return None
@@ -41,38 +167,68 @@ def search_clips(
     if results_per_page <= 0 or offset is None or offset < 0:
         return None
 
-    if not database_connection.is_connected():
-        database_connection.reconnect()
+    if seek:
+        return _search_clips_seek(
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            seek=seek,
+            database_connection=database_connection,
+        )
+
+    if search_strategy == SearchStrategy.TWO_QUERY:
+        return _search_clips_two_query(
+            search_query=search_query,
+            search_mode=search_mode,
+            results_per_page=results_per_page,
+            offset=offset,
+            database_connection=database_connection,
+        )
+
+    return _search_clips_window(
+        search_query=search_query,
+        search_mode=search_mode,
+        results_per_page=results_per_page,
+        offset=offset,
+        database_connection=database_connection,
+    )
+
+
+def _search_clips_window(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> dict[str, int | list[Clip]]:
+    """Search audio clips using a single windowed query."""
+    # MySQL evaluates identical MATCH expressions in the select list and
+    # the WHERE clause once, and COUNT(*) OVER () is computed before the
+    # LIMIT is applied, which returns the total count with every row
+    modifier: str = _MATCH_MODIFIERS[search_mode]
+    query = (
+        f"SELECT {CLIP_COLUMNS}, "
+        f"MATCH (t.title, t.album, t.artist) AGAINST (%s {modifier}) AS score, "
+        "COUNT(*) OVER () AS total_count "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE MATCH (t.title, t.album, t.artist) "
+        f"AGAINST (%s {modifier}) "
+        "ORDER BY score DESC, c.id "
+        "LIMIT %s OFFSET %s"
+    )
+    parameters = (search_query, search_query, results_per_page, offset)
 
-    cursor = database_connection.cursor(dictionary=True)
+    cursor: MySQLCursor | Any = database_connection.cursor()
     try:
-        match search_mode:
-            case SearchMode.NATURAL:
-                query = (
-                    "SELECT COUNT(c.id) AS total_count "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s IN NATURAL LANGUAGE MODE)"
-                )
-            case SearchMode.BOOLEAN:
-                query = (
-                    "SELECT COUNT(c.id) AS total_count "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s IN BOOLEAN MODE)"
-                )
-            case SearchMode.EXPANDED:
-                query = (
-                    "SELECT COUNT(c.id) AS total_count "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s WITH QUERY EXPANSION)"
-                )
-        cursor.execute(query, (search_query,))
-        result = cursor.fetchone()
+        with timed_query(
+            "db-query",
+            query,
+            parameters,
+            **_query_details(search_mode, results_per_page, offset),
+        ):
+            cursor.execute(query, parameters)
+            results = cursor.fetchall()
     except ProgrammingError:
         return {"error": "ProgrammingError"}
     except DatabaseError:
@@ -80,75 +236,155 @@ def search_clips(
     finally:
         cursor.close()
 
-    if result is None:
+    if not results:
         return {"total_count": 0, "returned_count": 0, "results": []}
 
-    total_count: int = result["total_count"]
+    return build_results(results, total_count=results[0][TOTAL_COUNT_COLUMN])
+
+
+def _search_clips_seek(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    seek: SeekPosition,
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> dict[str, int | list[Clip]]:
+    """Search audio clips using a keyset pagination seek position."""
+    # Previous pages are retrieved in reverse order and flipped back so
+    # that both directions only read the rows for the requested page
+    modifier: str = _MATCH_MODIFIERS[search_mode]
+    if seek.before:
+        seek_condition = "HAVING score > %s OR (score = %s AND c.id < %s) "
+        order = "ORDER BY score ASC, c.id DESC "
+    else:
+        seek_condition = "HAVING score < %s OR (score = %s AND c.id > %s) "
+        order = "ORDER BY score DESC, c.id "
+
+    query = (
+        f"SELECT {CLIP_COLUMNS}, "
+        f"MATCH (t.title, t.album, t.artist) AGAINST (%s {modifier}) AS score "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE MATCH (t.title, t.album, t.artist) "
+        f"AGAINST (%s {modifier}) "
+        f"{seek_condition}"
+        f"{order}"
+        "LIMIT %s"
+    )
+    parameters = (
+        search_query,
+        search_query,
+        seek.score,
+        seek.score,
+        seek.clip_id,
+        results_per_page,
+    )
+
+    cursor: MySQLCursor | Any = database_connection.cursor()
+    try:
+        with timed_query(
+            "db-query",
+            query,
+            parameters,
+            **_query_details(search_mode, results_per_page),
+        ):
+            cursor.execute(query, parameters)
+            results = cursor.fetchall()
+    except ProgrammingError:
+        return {"error": "ProgrammingError"}
+    except DatabaseError:
+        return {"error": "DatabaseError"}
+    finally:
+        cursor.close()
+
+    if not results:
+        return {"total_count": 0, "returned_count": 0, "results": []}
+
+    if seek.before:
+        results.reverse()
+
+    return build_results(results, total_count=seek.total_count)
+
+
+def count_clips(
+    search_query: str,
+    search_mode: SearchMode,
+    database_connection: MySQLConnection | PooledMySQLConnection,
+    **details: int | str,
+) -> int | dict[str, str]:
+    """Count the audio clips that match a search query.
+
+    Returns the number of matching clips, or a dictionary with an error
+    key if the query fails. Details are recorded in the slow query log.
+    """
+    modifier: str = _MATCH_MODIFIERS[search_mode]
+    query = (
+        "SELECT COUNT(c.id) AS total_count "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE MATCH (t.title, t.album, t.artist) "
+        f"AGAINST (%s {modifier})"
+    )
+    parameters: tuple = (search_query,)
+
+    cursor = database_connection.cursor()
+    try:
+        with timed_query(
+            "db-count",
+            query,
+            parameters,
+            **(details or {"operation": "count", "mode": search_mode.name.lower()}),
+        ):
+            cursor.execute(query, parameters)
+            result = cursor.fetchone()
+    except ProgrammingError:
+        return {"error": "ProgrammingError"}
+    except DatabaseError:
+        return {"error": "DatabaseError"}
+    finally:
+        cursor.close()
+
+    return int(result[0]) if result else 0
+
+
+def _search_clips_two_query(
+    search_query: str,
+    search_mode: SearchMode,
+    results_per_page: int,
+    offset: int,
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> dict[str, int | list[Clip]]:
+    """Search audio clips using separate count and results queries."""
+    modifier: str = _MATCH_MODIFIERS[search_mode]
+    details: dict[str, int | str] = _query_details(
+        search_mode, results_per_page, offset
+    )
+    total_count: int | dict[str, str] = count_clips(
+        search_query, search_mode, database_connection, **details
+    )
+    if isinstance(total_count, dict):
+        return total_count
+
     if total_count == 0:
         return {"total_count": 0, "returned_count": 0, "results": []}
 
-    cursor: MySQLCursor | Any = database_connection.cursor(dictionary=True)
+    query = (
+        f"SELECT {CLIP_COLUMNS}, "
+        f"MATCH (t.title, t.album, t.artist) AGAINST (%s {modifier}) AS score "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE MATCH (t.title, t.album, t.artist) "
+        f"AGAINST (%s {modifier}) "
+        "ORDER BY score DESC, c.id "
+        "LIMIT %s OFFSET %s"
+    )
+    parameters = (search_query, search_query, results_per_page, offset)
+
+    cursor: MySQLCursor | Any = database_connection.cursor()
     try:
-        match search_mode:
-            case SearchMode.NATURAL:
-                query = (
-                    "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, "
-                    "t.title, t.year "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s IN NATURAL LANGUAGE MODE) "
-                    "LIMIT %s OFFSET %s"
-                )
-                cursor.execute(
-                    query,
-                    (
-                        search_query,
-                        results_per_page,
-                        offset,
-                    ),
-                )
-            case SearchMode.BOOLEAN:
-                query = (
-                    "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, "
-                    "t.title, t.year, MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s IN BOOLEAN MODE) AS score "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s IN BOOLEAN MODE) "
-                    "ORDER BY score DESC "
-                    "LIMIT %s OFFSET %s"
-                )
-                cursor.execute(
-                    query,
-                    (
-                        search_query,
-                        search_query,
-                        results_per_page,
-                        offset,
-                    ),
-                )
-            case SearchMode.EXPANDED:
-                query = (
-                    "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r, t.artist, t.album, "
-                    "t.title, t.year "
-                    "FROM clips c "
-                    "JOIN tags t ON t.clip_id = c.id "
-                    "WHERE MATCH (t.title, t.album, t.artist) "
-                    "AGAINST (%s WITH QUERY EXPANSION) "
-                    "LIMIT %s OFFSET %s"
-                )
-                cursor.execute(
-                    query,
-                    (
-                        search_query,
-                        results_per_page,
-                        offset,
-                    ),
-                )
-
-        results = cursor.fetchall()
+        with timed_query("db-query", query, parameters, **details):
+            cursor.execute(query, parameters)
+            results = cursor.fetchall()
     except ProgrammingError:
         return {"error": "ProgrammingError"}
     except DatabaseError:
@@ -159,21 +395,41 @@ def search_clips(
     if not results:
         return {"total_count": 0, "returned_count": 0, "results": []}
 
-    clips: list[dict] = []
-    for row in results:
-        clips.append(
-            {
-                "id": row["id"],
-                "key": row["key"],
-                "key_slug": slugify(row["key"]),
-                "mp3_path": f"{row['key']}.mp3" if bool(row["mp3"]) else None,
-                "m4a_path": f"{row['key']}.m4a" if bool(row["m4a"]) else None,
-                "m4r_path": f"{row['key']}.m4r" if bool(row["m4r"]) else None,
-                "artist": row["artist"],
-                "album": row["album"],
-                "title": row["title"],
-                "year": row["year"],
-            }
-        )
+    return build_results(results, total_count=total_count)
+
+
+def stream_clips(
+    search_query: str,
+    search_mode: SearchMode,
+    database_connection: MySQLConnection | PooledMySQLConnection,
+    batch_size: int = 500,
+) -> Iterator[Clip]:
+    """Yield every clip that matches a search query in relevance order.
+
+    Rows are read from an unbuffered cursor, which leaves the result set
+    on the database server, in batches of ``batch_size`` rows so that
+    the full result set is never held in memory.
+    """
+    modifier: str = _MATCH_MODIFIERS[search_mode]
+    query = (
+        f"SELECT {CLIP_COLUMNS}, "
+        f"MATCH (t.title, t.album, t.artist) AGAINST (%s {modifier}) AS score "
+        "FROM clips c "
+        "JOIN tags t ON t.clip_id = c.id "
+        "WHERE MATCH (t.title, t.album, t.artist) "
+        f"AGAINST (%s {modifier}) "
+        "ORDER BY score DESC, c.id"
+    )
 
-    return {"total_count": total_count, "returned_count": len(clips), "results": clips}
+    cursor: MySQLCursor | Any = database_connection.cursor(buffered=False)
+    try:
+        cursor.execute(query, (search_query, search_query))
+        while rows := cursor.fetchmany(batch_size):
+            for row in rows:
+                yield Clip.from_row(row)
+    finally:
+        # Discard any unread rows if the stream is closed early so the
+        # connection can be reused
+        with contextlib.suppress(Error):
+            database_connection.consume_results()
+        cursor.close()
@@ -0,0 +1,117 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Request Coalescing Functions."""
+
+import os
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from mysql.connector.errors import OperationalError
+
+
+class _Call:
+    """A function call that is in progress."""
+
+    __slots__ = ("done", "error", "result", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls within a worker.
+
+    The first thread to call do() for a key runs the function, and
+    threads that call do() for the same key while it is running wait for
+    it and share its result. If the function raises an exception, the
+    exception is raised in every waiting thread. Threads that wait for
+    longer than ``timeout`` seconds raise an OperationalError instead of
+    running the function themselves, so a slow query is not repeated by
+    every waiting thread.
+    """
+
+    def __init__(self, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._executions = 0
+        self._coalesced = 0
+        self._timeouts = 0
+        self._errors = 0
+
+    def _check_fork(self) -> None:
+        """Drop calls inherited from a parent process."""
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._calls = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Run a function, or wait for the call in progress for the key."""
+        self._check_fork()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise OperationalError(
+                    msg=f"Timed out waiting {self.timeout}s for an identical query"
+                )
+
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return True if a call for the key is in progress."""
+        return key in self._calls
+
+    def stats(self) -> dict[str, int | float]:
+        """Return request coalescing statistics for this worker."""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "timeout": self.timeout,
+            }
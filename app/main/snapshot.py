@@ -0,0 +1,306 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Memory-Mapped Search Index Snapshot Functions.
+
+A snapshot file stores the clip catalogue and search index postings in
+a compact binary format that is memory-mapped read-only by each worker,
+so the pages are shared between workers through the OS page cache.
+
+All integers are little-endian. The file is made up of a fixed size
+header followed by these sections, each aligned to 8 bytes:
+
+- Document lengths: uint32 indexed term count per document
+- Documents: fixed size records with the clip ID, year, file flags
+  and offsets into the string section
+- Terms: four uint32 values per term (string offset, string length,
+  postings offset and document count), sorted by term
+- Postings: uint32 values with the document number, the number of
+  positions and the positions for each document containing a term
+- Strings: UTF-8 encoded clip keys, slugs, titles, albums, artists
+  and terms
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+from app.main.clip import Clip
+from app.main.memory_index import SearchIndex
+
+SNAPSHOT_MAGIC: bytes = b"MGSIDX01"
+SNAPSHOT_VERSION: int = 1
+
+# magic, version, document count, term count, generation, average
+# document length, data version (3) and section offsets (5)
+_HEADER = struct.Struct("<8sIIIxxxxQd3Q5Q")
+
+# clip ID, year, file flags, then offset and length pairs for the key,
+# key slug, title, album and artist strings
+_DOCUMENT = struct.Struct("<qiB3x10I")
+
+_FLAG_MP3: int = 1
+_FLAG_M4A: int = 2
+_FLAG_M4R: int = 4
+_NO_YEAR: int = -1
+
+
+def _align(buffer: bytearray) -> None:
+    """Pad a buffer to the next 8 byte boundary."""
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def _uint32_bytes(values: array) -> bytes:
+    """Return little-endian bytes for an array of uint32 values."""
+    if sys.byteorder != "little":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(
+    snapshot_path: str | Path,
+    index: SearchIndex,
+    data_version: tuple[int, ...] | None = None,
+) -> int:
+    """Write a search index to a snapshot file.
+
+    The snapshot is written to a temporary file in the same directory
+    and renamed over the existing snapshot file, so workers never see a
+    partially written snapshot. Returns the snapshot generation.
+    """
+    strings = bytearray()
+    string_offsets: dict[str, tuple[int, int]] = {}
+
+    def _string(value: str | None) -> tuple[int, int]:
+        value = value or ""
+        if value not in string_offsets:
+            encoded = value.encode("utf-8")
+            string_offsets[value] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return string_offsets[value]
+
+    documents = bytearray()
+    for clip in index.documents:
+        try:
+            year = int(clip.year)
+        except (TypeError, ValueError):
+            year = _NO_YEAR
+
+        flags = (
+            (_FLAG_MP3 if clip.mp3 else 0)
+            | (_FLAG_M4A if clip.m4a else 0)
+            | (_FLAG_M4R if clip.m4r else 0)
+        )
+        documents.extend(
+            _DOCUMENT.pack(
+                clip.id,
+                year,
+                flags,
+                *_string(clip.key),
+                *_string(clip.key_slug),
+                *_string(clip.title),
+                *_string(clip.album),
+                *_string(clip.artist),
+            )
+        )
+
+    terms = array("I")
+    postings = array("I")
+    for term in index.prefix_terms(""):
+        term_postings = index.postings(term)
+        terms.extend((*_string(term), len(postings), len(term_postings)))
+        for document in sorted(term_postings):
+            positions = term_postings[document]
+            postings.extend((document, len(positions), *positions))
+
+    body = bytearray()
+    offsets: list[int] = []
+    for section in (
+        _uint32_bytes(array("I", index.document_lengths)),
+        documents,
+        _uint32_bytes(terms),
+        _uint32_bytes(postings),
+        strings,
+    ):
+        offsets.append(_HEADER.size + len(body))
+        body.extend(section)
+        _align(body)
+
+    generation = time.time_ns()
+    _data_version = tuple(data_version or (0, 0, 0))
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        index.document_count,
+        len(terms) // 4,
+        generation,
+        index.average_length,
+        *_data_version,
+        *offsets,
+    )
+
+    snapshot_path = Path(snapshot_path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{snapshot_path.name}.", dir=snapshot_path.parent
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(body)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        Path(temp_path).chmod(0o644)
+        Path(temp_path).replace(snapshot_path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return generation
+
+
+class _MappedDocuments:
+    """Sequence of clips decoded from a snapshot."""
+
+    def __init__(self, snapshot: "MappedSearchIndex") -> None:
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return self._snapshot.document_count
+
+    def __getitem__(self, document: int) -> Clip:
+        return self._snapshot.document(document)
+
+
+class MappedSearchIndex(SearchIndex):
+    """Search index read from a memory-mapped snapshot file."""
+
+    def __init__(self, snapshot_path: str | Path) -> None:
+        if sys.byteorder != "little":
+            raise ValueError("Search index snapshots require a little-endian host")
+
+        with Path(snapshot_path).open("rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            document_count,
+            term_count,
+            self.generation,
+            self.average_length,
+            *fields,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{snapshot_path} is not a supported index snapshot")
+
+        self.data_version: tuple[int, ...] = tuple(fields[:3])
+        (
+            lengths_offset,
+            self._documents_offset,
+            terms_offset,
+            postings_offset,
+            self._strings_offset,
+        ) = fields[3:]
+        self._document_count = document_count
+        self._term_count = term_count
+
+        view = memoryview(self._mmap)
+        self.document_lengths = view[
+            lengths_offset : lengths_offset + 4 * document_count
+        ].cast("I")
+        self._terms = view[terms_offset : terms_offset + 16 * term_count].cast("I")
+        self._postings = view[postings_offset : self._strings_offset].cast("I")
+        self.documents = _MappedDocuments(self)
+
+    @property
+    def document_count(self) -> int:
+        """Number of clips in the index."""
+        return self._document_count
+
+    def _read_string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._mmap[start : start + length].decode("utf-8")
+
+    def _term(self, position: int) -> str:
+        return self._read_string(
+            self._terms[position * 4], self._terms[position * 4 + 1]
+        )
+
+    def _term_position(self, term: str) -> int:
+        """Return the position of the first term that is not less than a term."""
+        low, high = 0, self._term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def document(self, document: int) -> Clip:
+        """Decode the clip for a document."""
+        if not 0 <= document < self._document_count:
+            raise IndexError(document)
+
+        (
+            clip_id,
+            year,
+            flags,
+            *string_fields,
+        ) = _DOCUMENT.unpack_from(
+            self._mmap, self._documents_offset + document * _DOCUMENT.size
+        )
+        key, key_slug, title, album, artist = (
+            self._read_string(string_fields[i], string_fields[i + 1])
+            for i in range(0, 10, 2)
+        )
+        return Clip(
+            clip_id,
+            key,
+            flags & _FLAG_MP3,
+            flags & _FLAG_M4A,
+            flags & _FLAG_M4R,
+            artist or None,
+            album or None,
+            title or None,
+            None if year == _NO_YEAR else year,
+            key_slug=key_slug,
+        )
+
+    def postings(self, term: str) -> dict[int, tuple[int, ...]]:
+        """Return the documents and positions for a term."""
+        position = self._term_position(term)
+        if position >= self._term_count or self._term(position) != term:
+            return {}
+
+        offset = self._terms[position * 4 + 2]
+        document_count = self._terms[position * 4 + 3]
+        postings: dict[int, tuple[int, ...]] = {}
+        for _ in range(document_count):
+            document = self._postings[offset]
+            position_count = self._postings[offset + 1]
+            postings[document] = tuple(
+                self._postings[offset + 2 : offset + 2 + position_count]
+            )
+            offset += 2 + position_count
+        return postings
+
+    def prefix_terms(self, prefix: str) -> list[str]:
+        """Return all indexed terms that start with a prefix."""
+        terms: list[str] = []
+        for position in range(self._term_position(prefix), self._term_count):
+            term = self._term(position)
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
@@ -0,0 +1,218 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Search Query Suggestion Functions."""
+
+import bisect
+import heapq
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import Error
+from mysql.connector.pooling import PooledMySQLConnection
+
+from app.main.cache import (
+    DataVersionMonitor,
+    normalize_query,
+    retrieve_data_version,
+)
+from app.main.memory_index import is_indexed, tokenize
+
+# Completions for prefixes up to this length are computed when the
+# index is built, as short prefixes match the largest ranges of terms
+PRECOMPUTED_PREFIX_LENGTH: int = 2
+
+
+class SuggestionIndex:
+    """Sorted array index of search terms and their frequencies.
+
+    Terms are the case folded titles, artists and albums, along with
+    each word in them that is stored in the full-text index. Terms that
+    start with a prefix are a contiguous range of the sorted array, and
+    the most frequent terms for short prefixes are precomputed.
+    """
+
+    def __init__(self, terms: Counter[str], labels: dict[str, str], limit: int) -> None:
+        self.limit = limit
+        self.terms: list[str] = sorted(terms)
+        self.labels: list[str] = [labels[term] for term in self.terms]
+        self.counts: list[int] = [terms[term] for term in self.terms]
+
+        self._top: dict[str, list[int]] = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            for prefix in {term[:length] for term in self.terms if len(term) >= length}:
+                self._top[prefix] = self._rank(*self._range(prefix), limit)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[dict[str, Any]], limit: int = 10
+    ) -> "SuggestionIndex":
+        """Build an index from rows with title, artist and album columns."""
+        terms: Counter[str] = Counter()
+        labels: dict[str, str] = {}
+        for row in rows:
+            for field in ("title", "artist", "album"):
+                value: str | None = row[field]
+                if not value or not value.strip():
+                    continue
+
+                label = " ".join(value.split())
+                term = normalize_query(label)
+                terms[term] += 1
+                labels.setdefault(term, label)
+                for token, _ in tokenize(label):
+                    if is_indexed(token) and token != term:
+                        terms[token] += 1
+                        labels.setdefault(token, token)
+
+        return cls(terms, labels, limit)
+
+    @property
+    def term_count(self) -> int:
+        """Number of distinct terms in the index."""
+        return len(self.terms)
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def _rank(self, start: int, end: int, limit: int) -> list[int]:
+        """Return the positions of the most frequent terms in a range."""
+        # Ties are broken by term order, which keeps completions stable
+        return heapq.nsmallest(
+            limit, range(start, end), key=lambda position: -self.counts[position]
+        )
+
+    def suggest(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Return the most frequent completions for a prefix."""
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+
+        limit = self.limit if limit is None else min(limit, self.limit)
+        positions: list[int] | None = self._top.get(prefix)
+        if positions is None:
+            positions = self._rank(*self._range(prefix), limit)
+
+        return [self.labels[position] for position in positions[:limit]]
+
+
+def retrieve_suggestion_rows(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+) -> list[dict[str, Any]]:
+    """Retrieve the titles, artists and albums of every clip."""
+    query = (
+        "SELECT t.title, t.artist, t.album FROM clips c JOIN tags t ON t.clip_id = c.id"
+    )
+    cursor = database_connection.cursor(dictionary=True)
+    try:
+        cursor.execute(query)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class SuggestionEngine:
+    """Serves search query completions from a memory-resident index.
+
+    The index is rebuilt by a background thread when the data version
+    reported by the data version monitor changes, which is checked once
+    every ``refresh_interval`` seconds, so requests only ever read the
+    current index.
+    """
+
+    def __init__(
+        self,
+        data_version_monitor: DataVersionMonitor | None = None,
+        refresh_interval: float = 300.0,
+        limit: int = 10,
+    ) -> None:
+        self.data_version_monitor = data_version_monitor
+        self.refresh_interval = refresh_interval
+        self.limit = limit
+        self.index: SuggestionIndex | None = None
+        self.data_version: tuple[int, ...] | None = None
+
+        self._lock = threading.Lock()
+        self._thread_pid: int | None = None
+
+    def load(
+        self, database_connection: MySQLConnection | PooledMySQLConnection
+    ) -> bool:
+        """Build a new index from the database and swap it in."""
+        try:
+            data_version = retrieve_data_version(database_connection)
+            rows = retrieve_suggestion_rows(database_connection)
+        except Error:
+            return False
+
+        self.index = SuggestionIndex.from_rows(rows, limit=self.limit)
+        self.data_version = data_version
+        return True
+
+    def refresh(self) -> None:
+        """Rebuild the index if it is missing or the data has changed.
+
+        Called when the application is created and by the background
+        refresh thread, never while handling a request.
+        """
+        if not self.data_version_monitor:
+            return
+
+        if self.index:
+            data_version = self.data_version_monitor.current()
+            if data_version is None or data_version == self.data_version:
+                return
+
+        pool = self.data_version_monitor.pool
+        try:
+            database_connection = pool.get_connection()
+        except Error:
+            return
+
+        try:
+            self.load(database_connection)
+        finally:
+            pool.release(database_connection)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def _start_refresh(self) -> None:
+        """Start the background refresh thread in this process."""
+        if self.refresh_interval <= 0 or self._thread_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="suggestion-index-refresh", daemon=True
+                ).start()
+
+    def suggest(self, prefix: str, limit: int | None = None) -> list[str] | None:
+        """Return completions for a prefix, or None if the index is not loaded."""
+        self._start_refresh()
+        index = self.index
+        if index is None:
+            return None
+
+        return index.suggest(prefix, limit=limit)
+
+    def stats(self) -> dict[str, int | list | None]:
+        """Return suggestion index statistics for this worker."""
+        index = self.index
+        return {
+            "terms": index.term_count if index else 0,
+            "data_version": list(self.data_version) if self.data_version else None,
+        }
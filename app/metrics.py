@@ -0,0 +1,195 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Request Timing and Prometheus Metrics Functions.
+
+Request stages are timed using timed() and reported through the
+Server-Timing response header and Prometheus histograms. When the
+PROMETHEUS_MULTIPROC_DIR environment variable is set, metrics from all
+Gunicorn workers are aggregated by the /metrics endpoint.
+"""
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from flask import Flask, Response, current_app, g, has_app_context, request
+from flask.signals import before_render_template, template_rendered
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+if TYPE_CHECKING:
+    from app.main.search import SearchMode
+
+REQUEST_DURATION = Histogram(
+    "mg_search_request_duration_seconds",
+    "Request duration by route and search mode",
+    ["route", "mode"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+STAGE_DURATION = Histogram(
+    "mg_search_stage_duration_seconds",
+    "Request stage duration by stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5),
+)
+DATABASE_ERRORS = Counter(
+    "mg_search_database_errors",
+    "Database errors by error type and operation",
+    ["error", "operation"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "mg_search_admission_rejections",
+    "Requests rejected by admission control by reason and route",
+    ["reason", "route"],
+)
+RESULT_COUNT = Histogram(
+    "mg_search_result_count",
+    "Total search result count by search mode",
+    ["mode"],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000),
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block of code as a request stage.
+
+    Nothing is recorded outside of a request or if request timing is
+    not enabled.
+    """
+    timings: dict[str, float] | None = (
+        g.get("server_timing") if has_app_context() else None
+    )
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def _metrics_enabled() -> bool:
+    return has_app_context() and current_app.config["app_settings"]["enable_metrics"]
+
+
+def record_database_error(error: str, operation: str) -> None:
+    """Count a database error for an operation."""
+    if _metrics_enabled():
+        DATABASE_ERRORS.labels(error, operation).inc()
+
+
+def record_admission_rejection(reason: str, route: str) -> None:
+    """Count a request rejected by admission control."""
+    if _metrics_enabled():
+        ADMISSION_REJECTIONS.labels(reason, route).inc()
+
+
+def record_result_count(search_mode: "SearchMode", total_count: int) -> None:
+    """Record the total result count for a search."""
+    if _metrics_enabled():
+        RESULT_COUNT.labels(search_mode.name.lower()).observe(total_count)
+
+
+def _start_request() -> None:
+    g.request_started = time.perf_counter()
+    g.server_timing = {}
+
+
+def _start_render(_app: Flask, **_extra: object) -> None:
+    if "server_timing" in g:
+        g.render_started = time.perf_counter()
+
+
+def _end_render(_app: Flask, **_extra: object) -> None:
+    started: float | None = g.pop("render_started", None)
+    if started is not None:
+        timings: dict[str, float] = g.server_timing
+        timings["render"] = timings.get("render", 0.0) + time.perf_counter() - started
+
+
+def _observe_request(
+    route: str, mode: str, started: float, timings: dict[str, float]
+) -> None:
+    REQUEST_DURATION.labels(route, mode).observe(time.perf_counter() - started)
+    for stage, stage_duration in timings.items():
+        STAGE_DURATION.labels(stage).observe(stage_duration)
+
+
+def _end_request(response: Response) -> Response:
+    started: float | None = g.get("request_started")
+    if started is None:
+        return response
+
+    duration = time.perf_counter() - started
+    timings: dict[str, float] = g.server_timing
+    app_settings = current_app.config["app_settings"]
+
+    if app_settings["enable_metrics"]:
+        search_mode: SearchMode | None = g.get("search_mode")
+        labels = (
+            request.url_rule.rule if request.url_rule else "unmatched",
+            search_mode.name.lower() if search_mode else "none",
+        )
+        if response.is_streamed:
+            # Streamed responses are rendered after the view returns, so
+            # durations are observed once the response has been sent
+            response.call_on_close(lambda: _observe_request(*labels, started, timings))
+        else:
+            _observe_request(*labels, started, timings)
+
+    # Server-Timing for streamed responses only includes the stages timed
+    # before the headers are sent
+    if app_settings["enable_server_timing"]:
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                *(
+                    f"{stage};dur={stage_duration * 1000:.2f}"
+                    for stage, stage_duration in timings.items()
+                ),
+                f"total;dur={duration * 1000:.2f}",
+            ]
+        )
+
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Register request timing hooks if metrics or Server-Timing are enabled."""
+    app_settings = app.config["app_settings"]
+    if not app_settings["enable_metrics"] and not app_settings["enable_server_timing"]:
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_end_request)
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_end_render, app)
+
+
+def metrics_response() -> Response:
+    """Return metrics in the Prometheus text format.
+
+    If the PROMETHEUS_MULTIPROC_DIR environment variable is set, metrics
+    are aggregated across every worker process.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
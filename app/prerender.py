@@ -0,0 +1,180 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Pre-rendered Page Functions.
+
+Pages that do not depend on the request, such as the landing, about and
+help pages and the error pages, are rendered once per worker for each
+variation of their template context and served from memory along with
+compressed copies. Pages are rendered again when the current year
+changes, or when a template changes if template auto reloading is
+enabled.
+"""
+
+import hashlib
+import itertools
+import threading
+from collections.abc import Hashable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, current_app, render_template, request
+
+from app.compression import compress, negotiate_encoding
+from app.utilities import current_year
+
+
+class PrerenderedPage:
+    """A rendered page and its compressed copies."""
+
+    __slots__ = ("body", "encoded", "etag")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.encoded: dict[str, bytes] = {}
+
+    def encode(self, encoding: str) -> bytes:
+        """Return the page compressed using a content encoding."""
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            self.encoded[encoding] = data
+        return data
+
+
+class PageCache:
+    """Per-worker cache of pre-rendered pages."""
+
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+
+        self._pages: dict[Hashable, PrerenderedPage] = {}
+        self._version: tuple | None = None
+        self._lock = threading.Lock()
+        self._renders = 0
+        self._hits = 0
+
+    def _templates_version(self) -> float:
+        """Return the latest template modification time.
+
+        Templates are only reloaded by Jinja if template auto reloading
+        is enabled, so otherwise 0 is returned.
+        """
+        if not self.app.jinja_env.auto_reload:
+            return 0
+
+        jinja_env = self.app.jinja_env
+        modified: float = 0
+        for template_name in jinja_env.list_templates():
+            _, filename, _ = jinja_env.loader.get_source(jinja_env, template_name)
+            if filename:
+                modified = max(modified, Path(filename).stat().st_mtime)
+        return modified
+
+    def page(self, template_name: str, **context: Any) -> PrerenderedPage:
+        """Return a pre-rendered page, rendering it if needed."""
+        version = (
+            current_year(self.app.config["app_settings"]["app_time_zone"]),
+            self._templates_version(),
+        )
+        key = (template_name, tuple(sorted(context.items())))
+        with self._lock:
+            if version != self._version:
+                self._pages.clear()
+                self._version = version
+
+            page = self._pages.get(key)
+            if page is not None:
+                self._hits += 1
+                return page
+
+        page = PrerenderedPage(
+            render_template(template_name, **context).encode("utf-8")
+        )
+        with self._lock:
+            self._pages[key] = page
+            self._renders += 1
+        return page
+
+    def variants(
+        self,
+        template_name: str,
+        variants: Mapping[str, Sequence[Any]],
+        **context: Any,
+    ) -> list[PrerenderedPage]:
+        """Return the pre-rendered page for every combination of variant values.
+
+        Each value of a variant replaces the value of the template context
+        variable with the same name, and pages are rendered if needed.
+        """
+        names = list(variants)
+        return [
+            self.page(template_name, **{**context, **dict(zip(names, values))})
+            for values in itertools.product(*variants.values())
+        ]
+
+    def stats(self) -> dict[str, int]:
+        """Return pre-rendered page cache statistics for this worker."""
+        with self._lock:
+            return {
+                "pages": len(self._pages),
+                "renders": self._renders,
+                "hits": self._hits,
+            }
+
+
+def _page_etag(page: PrerenderedPage, encoding: str | None) -> str:
+    return f"{page.etag}-{encoding}" if encoding else page.etag
+
+
+def prerendered_response(
+    template_name: str,
+    status_code: int = 200,
+    variants: Mapping[str, Sequence[Any]] | None = None,
+    **context: Any,
+) -> Response:
+    """Return a response for a pre-rendered page.
+
+    The response is compressed using the best encoding the client
+    accepts, and successful responses can be revalidated using the
+    entity tag of the page.
+
+    If variants are given, every variation of the page is pre-rendered
+    and the template context chooses the variation sent. Each variation
+    has its own entity tag, and a conditional request that matches any
+    variation is answered for that variation, so clients keep using the
+    variation they have cached.
+    """
+    page_cache: PageCache = current_app.extensions["page_cache"]
+    encoding = negotiate_encoding(request.accept_encodings)
+
+    page: PrerenderedPage | None = None
+    if variants:
+        page = next(
+            (
+                variant
+                for variant in page_cache.variants(template_name, variants, **context)
+                if status_code == 200
+                and request.if_none_match.contains(_page_etag(variant, encoding))
+            ),
+            None,
+        )
+    if page is None:
+        page = page_cache.page(template_name, **context)
+
+    response = current_app.response_class(
+        page.encode(encoding) if encoding else page.body,
+        status=status_code,
+        mimetype="text/html",
+    )
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+
+    if status_code == 200:
+        response.set_etag(_page_etag(page, encoding))
+        response.make_conditional(request)
+    return response
@@ -0,0 +1,343 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Clip Sitemap Generation Functions.
+
+Clip sitemaps list the clip information page for every clip and are
+written as gzipped files of up to 50,000 URLs each, along with a gzipped
+sitemap index and a JSON manifest. Clips are read in clip ID order from
+an unbuffered cursor, so the sitemaps can be updated by only rewriting
+the last, partially filled, sitemap and adding sitemaps for new clips.
+"""
+
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+from xml.sax.saxutils import escape
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import Error
+from mysql.connector.pooling import PooledMySQLConnection
+
+from app.main.cache import retrieve_data_version
+
+SITEMAP_MAX_URLS: int = 50000
+MANIFEST_NAME: str = "sitemaps.json"
+INDEX_NAME: str = "sitemap-index.xml.gz"
+
+# Only clips with tags have a clip information page
+_CLIPS_WITH_TAGS: str = (
+    "FROM clips c WHERE EXISTS (SELECT 1 FROM tags t WHERE t.clip_id = c.id) "
+)
+
+
+def sitemap_name(number: int) -> str:
+    """Return the file name of a clip sitemap."""
+    return f"clips-{number}.xml.gz"
+
+
+def stream_clip_keys(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+    after_id: int = 0,
+    batch_size: int = 5000,
+) -> Iterator[tuple[int, str]]:
+    """Yield the ID and key of each clip after a clip ID in clip ID order.
+
+    Rows are read from an unbuffered cursor in batches of ``batch_size``
+    rows so that the full result set is never held in memory.
+    """
+    # The clip ID is formatted into the query, rather than passed as a
+    # parameter, as the MySQL and SQLite parameter styles differ
+    query = (
+        f"SELECT c.id, c.key {_CLIPS_WITH_TAGS}AND c.id > {int(after_id)} ORDER BY c.id"
+    )
+    cursor = database_connection.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        while rows := cursor.fetchmany(batch_size):
+            for clip_id, clip_key in rows:
+                yield int(clip_id), clip_key
+    finally:
+        with contextlib.suppress(Error):
+            database_connection.consume_results()
+        cursor.close()
+
+
+def count_clip_keys(
+    database_connection: MySQLConnection | PooledMySQLConnection, up_to_id: int
+) -> int:
+    """Return the number of clips with a clip ID up to and including an ID."""
+    cursor = database_connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) {_CLIPS_WITH_TAGS}AND c.id <= {int(up_to_id)}")
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def read_manifest(directory: str | Path) -> dict[str, Any] | None:
+    """Read the sitemap manifest, or return None if it is missing or invalid."""
+    try:
+        with (Path(directory) / MANIFEST_NAME).open(encoding="utf-8") as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write a file using a temporary file renamed over the existing file."""
+    file_descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{path.name}.", dir=path.parent
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(data)
+        Path(temp_path).chmod(0o644)
+        Path(temp_path).replace(path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _write_gzip(path: Path, document: str) -> str:
+    """Write a gzipped XML document and return its entity tag.
+
+    The gzip header timestamp is fixed, so unchanged documents are
+    written with identical bytes.
+    """
+    data = gzip.compress(document.encode("utf-8"), compresslevel=9, mtime=0)
+    _write_file(path, data)
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _urlset(locations: list[str]) -> str:
+    urls = "".join(
+        f"<url><loc>{escape(location)}</loc></url>\n" for location in locations
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"{urls}</urlset>\n"
+    )
+
+
+def _sitemap_index(site_url: str, sitemaps: list[dict[str, Any]]) -> str:
+    entries = "".join(
+        f"<sitemap><loc>{escape(site_url)}/sitemaps/"
+        f"{escape(sitemap['file'].removesuffix('.gz'))}</loc>"
+        f"<lastmod>{_w3c_datetime(sitemap['modified'])}</lastmod></sitemap>\n"
+        for sitemap in sitemaps
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"<sitemap><loc>{escape(site_url)}/sitemap.xml</loc></sitemap>\n"
+        f"{entries}</sitemapindex>\n"
+    )
+
+
+def _w3c_datetime(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def build_clip_sitemaps(
+    database_connection: MySQLConnection | PooledMySQLConnection,
+    directory: str | Path,
+    site_url: str,
+    max_urls: int = SITEMAP_MAX_URLS,
+    full: bool = False,
+) -> dict[str, Any]:
+    """Build or update the clip sitemaps, sitemap index and manifest.
+
+    Sitemaps that are full and only contain clips that still exist are
+    kept as is. The last sitemap is rewritten and sitemaps are added for
+    clips added since the previous build. All sitemaps are rebuilt if
+    ``full`` is True, if the site URL or sitemap size has changed, or if
+    clips listed in the previous build have since been removed. Returns
+    the new manifest.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    site_url = site_url.rstrip("/")
+    data_version = retrieve_data_version(database_connection)
+
+    manifest = None if full else read_manifest(directory)
+    previous: dict[str, dict[str, Any]] = {
+        sitemap["file"]: sitemap for sitemap in (manifest or {}).get("sitemaps", [])
+    }
+    sitemaps: list[dict[str, Any]] = []
+    if (
+        manifest
+        and manifest.get("site_url") == site_url
+        and manifest.get("max_urls") == max_urls
+        and manifest.get("sitemaps")
+    ):
+        last_id = manifest["sitemaps"][-1]["last_id"]
+        clip_count = sum(sitemap["count"] for sitemap in manifest["sitemaps"])
+        if count_clip_keys(database_connection, last_id) == clip_count:
+            sitemaps = [
+                sitemap
+                for sitemap in manifest["sitemaps"]
+                if sitemap["count"] == max_urls
+            ]
+
+    def _flush(locations: list[str], last_id: int) -> None:
+        file_name = sitemap_name(len(sitemaps) + 1)
+        etag = _write_gzip(directory / file_name, _urlset(locations))
+
+        # Sitemaps that were rewritten without changes keep their last
+        # modified time
+        modified = int(time.time())
+        if previous.get(file_name, {}).get("etag") == etag:
+            modified = previous[file_name]["modified"]
+
+        sitemaps.append(
+            {
+                "file": file_name,
+                "count": len(locations),
+                "last_id": last_id,
+                "etag": etag,
+                "modified": modified,
+            }
+        )
+
+    after_id: int = sitemaps[-1]["last_id"] if sitemaps else 0
+    locations: list[str] = []
+    last_id = after_id
+    for last_id, clip_key in stream_clip_keys(database_connection, after_id):
+        locations.append(f"{site_url}/clip?{urlencode({'key': clip_key})}")
+        if len(locations) == max_urls:
+            _flush(locations, last_id)
+            locations = []
+
+    if locations:
+        _flush(locations, last_id)
+
+    index_etag = _write_gzip(directory / INDEX_NAME, _sitemap_index(site_url, sitemaps))
+    new_manifest = {
+        "site_url": site_url,
+        "max_urls": max_urls,
+        "data_version": list(data_version) if data_version else None,
+        "index_etag": index_etag,
+        "modified": (
+            manifest["modified"]
+            if manifest and manifest.get("index_etag") == index_etag
+            else int(time.time())
+        ),
+        "sitemaps": sitemaps,
+    }
+    _write_file(
+        directory / MANIFEST_NAME, json.dumps(new_manifest, indent=2).encode("utf-8")
+    )
+
+    # Remove sitemaps left over from a previous build with more sitemaps
+    number = len(sitemaps) + 1
+    while (directory / sitemap_name(number)).exists():
+        (directory / sitemap_name(number)).unlink()
+        number += 1
+
+    return new_manifest
+
+
+class ClipSitemaps:
+    """Keeps the clip sitemaps in a directory up to date.
+
+    When the data version of the clips and tags tables differs from the
+    data version of the last build, the sitemaps are updated by the
+    first worker to take the build lock, while other workers continue to
+    serve the existing sitemaps. The data version is checked at most once
+    every ``refresh_interval`` seconds.
+    """
+
+    def __init__(
+        self, directory: str, site_url: str, refresh_interval: int = 300
+    ) -> None:
+        self.directory = Path(directory).absolute()
+        self.site_url = site_url
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._refresh_checked: float | None = None
+        self._builds = 0
+
+    def refresh(
+        self,
+        connection_factory: Callable[[], MySQLConnection | PooledMySQLConnection],
+    ) -> None:
+        """Update the sitemaps if they are missing or the data has changed."""
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._refresh_checked is not None
+                and now - self._refresh_checked < self.refresh_interval
+            ):
+                return
+            self._refresh_checked = now
+
+        try:
+            database_connection = connection_factory()
+            data_version = retrieve_data_version(database_connection)
+            manifest = read_manifest(self.directory)
+            if (
+                manifest
+                and data_version is not None
+                and manifest.get("data_version") == list(data_version)
+                and manifest.get("site_url") == self.site_url.rstrip("/")
+            ):
+                return
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with (self.directory / ".lock").open("w") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+
+                build_clip_sitemaps(database_connection, self.directory, self.site_url)
+                with self._lock:
+                    self._builds += 1
+        except (Error, OSError):
+            return
+
+    def lookup(self, file_name: str) -> tuple[Path, str, int] | None:
+        """Return the path, entity tag and last modified time of a sitemap.
+
+        Returns None for files that are not listed in the manifest.
+        """
+        manifest = read_manifest(self.directory)
+        if not manifest:
+            return None
+
+        if file_name == INDEX_NAME:
+            return (
+                self.directory / file_name,
+                manifest["index_etag"],
+                manifest["modified"],
+            )
+        for sitemap in manifest["sitemaps"]:
+            if sitemap["file"] == file_name:
+                return self.directory / file_name, sitemap["etag"], sitemap["modified"]
+        return None
+
+    def stats(self) -> dict[str, int | list | None]:
+        """Return clip sitemap statistics for this worker."""
+        manifest = read_manifest(self.directory) or {}
+        return {
+            "sitemaps": len(manifest.get("sitemaps", [])),
+            "clips": sum(sitemap["count"] for sitemap in manifest.get("sitemaps", [])),
+            "data_version": manifest.get("data_version"),
+            "builds": self._builds,
+        }
@@ -5,13 +5,70 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Sitemap Routes."""
 
-from flask import Blueprint, Response, render_template
+import gzip
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    render_template,
+    request,
+    send_file,
+)
+
+from app.database import get_connection
+from app.sitemaps.clips import INDEX_NAME, ClipSitemaps, sitemap_name
 
 blueprint = Blueprint("sitemaps", __name__, template_folder="templates")
 
 
+def _clip_sitemap_response(file_name: str) -> Response:
+    """Return a pre-gzipped clip sitemap file.
+
+    Files are sent as is to clients that accept gzip encoded responses
+    and are decompressed for other clients.
+    """
+    clip_sitemaps: ClipSitemaps | None = current_app.extensions.get("clip_sitemaps")
+    if not clip_sitemaps:
+        abort(404)
+
+    clip_sitemaps.refresh(get_connection)
+    sitemap = clip_sitemaps.lookup(file_name)
+    if not sitemap:
+        abort(404)
+
+    path, etag, modified = sitemap
+    if "gzip" in request.accept_encodings:
+        response: Response = send_file(
+            path, mimetype="text/xml", etag=etag, last_modified=modified
+        )
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(gzip.decompress(path.read_bytes()), mimetype="text/xml")
+        response.set_etag(f"{etag}-identity")
+        response.last_modified = modified
+        response.make_conditional(request)
+
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
 @blueprint.route("/sitemap.xml")
 def primary() -> Response:
     """View: Primary Sitemap XML."""
     sitemap = render_template("sitemaps/sitemap.xml")
     return Response(sitemap, mimetype="text/xml")
+
+
+@blueprint.route("/sitemap-index.xml")
+def sitemap_index() -> Response:
+    """View: Sitemap Index XML."""
+    return _clip_sitemap_response(INDEX_NAME)
+
+
+@blueprint.route("/sitemaps/clips-<int:number>.xml")
+def clips(number: int) -> Response:
+    """View: Clip Sitemap XML."""
+    return _clip_sitemap_response(sitemap_name(number))
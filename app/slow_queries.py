@@ -0,0 +1,263 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Slow Query Log Functions.
+
+Queries that take longer than the slow query threshold are written to a
+rotating JSON lines log file by a background thread. A sample of slow
+queries is also run using EXPLAIN ANALYZE through a separate database
+connection, so requests are never delayed by writing the log or
+capturing query plans.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from flask import current_app, has_app_context
+from mysql.connector import connect
+from mysql.connector.errors import Error
+
+from app.database import POOL_SETTINGS_KEYS
+from app.metrics import timed
+
+_logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between EXPLAIN ANALYZE captures of the same
+# query text and parameters
+EXPLAIN_COOLDOWN: float = 600.0
+
+
+class SlowQueryLog:
+    """Records queries that exceed a threshold to a rotating log file."""
+
+    def __init__(
+        self,
+        log_path: str,
+        database_settings: dict[str, Any],
+        threshold: float = 0.5,
+        explain_rate: float = 0.1,
+        max_bytes: int = 10485760,
+        backup_count: int = 5,
+        queue_size: int = 1000,
+    ) -> None:
+        self.log_path = log_path
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.connection_settings = {
+            key: value
+            for key, value in database_settings.items()
+            if key not in POOL_SETTINGS_KEYS
+        }
+
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread_pid: int | None = None
+        self._explained: dict[tuple, float] = {}
+        self._dropped = 0
+        self._handler: RotatingFileHandler | None = None
+
+    def record(
+        self, query: str, parameters: tuple, elapsed: float, **details: Any
+    ) -> None:
+        """Queue a query for the slow query log if it exceeded the threshold."""
+        if elapsed < self.threshold:
+            return
+
+        self._start()
+        entry: dict[str, Any] = {
+            "time": datetime.now(tz=UTC).isoformat(timespec="milliseconds"),
+            "pid": os.getpid(),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            **details,
+            "query": query,
+            "parameters": list(parameters),
+            "explain": random.random() < self.explain_rate,  # noqa: S311
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _start(self) -> None:
+        """Start the writer thread for the current process."""
+        if self._thread_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="slow-query-log", daemon=True
+                ).start()
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry.pop("explain"):
+                    entry["explain"] = self._explain(
+                        entry["query"], entry["parameters"]
+                    )
+                self._write(entry)
+            except Exception:
+                _logger.exception("Unable to write slow query log entry")
+
+    def _explain(self, query: str, parameters: list) -> str | None:
+        """Run EXPLAIN ANALYZE for a query through a separate connection."""
+        key = (query, tuple(parameters))
+        now = time.monotonic()
+        if now - self._explained.get(key, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+            return None
+
+        if len(self._explained) >= 1000:
+            self._explained = {
+                explained_key: explained_at
+                for explained_key, explained_at in self._explained.items()
+                if now - explained_at < EXPLAIN_COOLDOWN
+            }
+        self._explained[key] = now
+
+        try:
+            database_connection = connect(**self.connection_settings)
+        except Error as error:
+            return f"Unable to connect: {error}"
+
+        try:
+            cursor = database_connection.cursor()
+            try:
+                cursor.execute(f"EXPLAIN ANALYZE {query}", parameters)
+                return "\n".join(str(row[0]) for row in cursor.fetchall())
+            finally:
+                cursor.close()
+        except Error as error:
+            return f"Unable to run EXPLAIN ANALYZE: {error}"
+        finally:
+            with contextlib.suppress(Error):
+                database_connection.close()
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        # Workers share the log file and each worker rotates it once the
+        # file reaches max_bytes, so entries written by another worker
+        # during a rotation may end up in the previous log file
+        if self._handler is None:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                self.log_path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding="utf-8",
+            )
+
+        self._handler.emit(
+            logging.makeLogRecord({"msg": json.dumps(entry), "levelno": logging.INFO})
+        )
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return slow query log statistics for this worker."""
+        with self._lock:
+            return {
+                "log": self.log_path,
+                "threshold": self.threshold,
+                "queued": self._queue.qsize(),
+                "dropped": self._dropped,
+            }
+
+
+@contextmanager
+def timed_query(
+    stage: str, query: str, parameters: tuple, **details: Any
+) -> Iterator[None]:
+    """Time a database query as a request stage and for the slow query log."""
+    slow_query_log: SlowQueryLog | None = (
+        current_app.extensions.get("slow_query_log") if has_app_context() else None
+    )
+    start = time.perf_counter()
+    try:
+        with timed(stage):
+            yield
+    finally:
+        if slow_query_log:
+            slow_query_log.record(
+                query, parameters, time.perf_counter() - start, stage=stage, **details
+            )
+
+
+def read_slow_query_log(log_path: str) -> Iterator[dict[str, Any]]:
+    """Yield entries from a slow query log and its rotated files."""
+    paths = [Path(log_path)]
+    paths.extend(sorted(Path(log_path).parent.glob(f"{Path(log_path).name}.*")))
+    for path in paths:
+        if not path.is_file():
+            continue
+
+        with path.open(mode="r", encoding="utf-8") as log_file:
+            for line in log_file:
+                with contextlib.suppress(json.JSONDecodeError):
+                    yield json.loads(line)
+
+
+def summarize_slow_queries(
+    entries: Iterator[dict[str, Any]], limit: int = 10
+) -> list[dict[str, Any]]:
+    """Group slow query log entries by query and return the top offenders.
+
+    Queries are grouped by operation, search mode, query text and
+    parameters, and ordered by total elapsed time.
+    """
+    groups: dict[tuple, dict[str, Any]] = {}
+    for entry in entries:
+        key = (
+            entry.get("operation"),
+            entry.get("mode"),
+            entry.get("query"),
+            tuple(entry.get("parameters", [])),
+        )
+        group = groups.setdefault(
+            key,
+            {
+                "operation": entry.get("operation"),
+                "mode": entry.get("mode"),
+                "query": entry.get("query"),
+                "parameters": entry.get("parameters", []),
+                "timings": [],
+                "explain": None,
+                "last_seen": None,
+            },
+        )
+        group["timings"].append(entry["elapsed_ms"])
+        group["last_seen"] = max(group["last_seen"] or "", entry.get("time", ""))
+        if entry.get("explain"):
+            group["explain"] = entry["explain"]
+
+    summary: list[dict[str, Any]] = []
+    for group in groups.values():
+        timings = sorted(group.pop("timings"))
+        summary.append(
+            {
+                **group,
+                "count": len(timings),
+                "total_ms": round(sum(timings), 2),
+                "mean_ms": round(sum(timings) / len(timings), 2),
+                "max_ms": timings[-1],
+            }
+        )
+
+    summary.sort(key=lambda group: group["total_ms"], reverse=True)
+    return summary[:limit]
@@ -0,0 +1,256 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""SQLite Database Connection and Loader Functions.
+
+SQLite databases contain copies of the clips and tags tables along with
+an FTS5 full-text index over tag titles, albums and artists. They are
+opened read-only by the application, and connections raise the same
+mysql.connector exception types as MySQL connections so that database
+errors are handled the same way for both backends.
+"""
+
+import contextlib
+import os
+import sqlite3
+import tempfile
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.errors import DatabaseError, ProgrammingError
+
+from app.database import ConnectionPool
+
+SQLITE_SCHEMA: str = """
+CREATE TABLE clips (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    mp3 INTEGER NOT NULL DEFAULT 0,
+    m4a INTEGER NOT NULL DEFAULT 0,
+    m4r INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE tags (
+    id INTEGER PRIMARY KEY,
+    clip_id INTEGER NOT NULL REFERENCES clips (id),
+    title TEXT,
+    album TEXT,
+    artist TEXT,
+    year INTEGER
+);
+CREATE INDEX tags_clip_id ON tags (clip_id);
+CREATE VIRTUAL TABLE tags_fts USING fts5 (
+    title, album, artist,
+    content = 'tags',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@contextlib.contextmanager
+def _translate_errors() -> Iterator[None]:
+    """Raise sqlite3 errors as mysql.connector errors."""
+    try:
+        yield
+    except sqlite3.ProgrammingError as error:
+        raise ProgrammingError(msg=str(error)) from error
+    except sqlite3.Error as error:
+        raise DatabaseError(msg=str(error)) from error
+
+
+class SQLiteCursor:
+    """Cursor for a SQLite connection.
+
+    If ``dictionary`` is True, rows are returned as dictionaries, like
+    rows returned by a mysql.connector dictionary cursor.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False) -> None:
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _row(self, row: tuple | None) -> tuple | dict[str, Any] | None:
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def execute(self, query: str, parameters: Sequence[Any] = ()) -> None:
+        """Execute a query."""
+        with _translate_errors():
+            self._cursor.execute(query, parameters)
+
+    def executemany(self, query: str, parameters: Sequence[Sequence[Any]]) -> None:
+        """Execute a query for each set of parameters."""
+        with _translate_errors():
+            self._cursor.executemany(query, parameters)
+
+    def fetchone(self) -> tuple | dict[str, Any] | None:
+        """Fetch the next row."""
+        with _translate_errors():
+            return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int) -> list[tuple | dict[str, Any]]:
+        """Fetch up to ``size`` rows."""
+        with _translate_errors():
+            return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> list[tuple | dict[str, Any]]:
+        """Fetch all remaining rows."""
+        with _translate_errors():
+            return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self) -> None:
+        """Close the cursor."""
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Read-only connection to a SQLite database file."""
+
+    def __init__(self, database_path: str) -> None:
+        self.database_path = database_path
+        self.file_stat = _file_stat(database_path)
+        with _translate_errors():
+            self._connection = sqlite3.connect(
+                f"{Path(database_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+
+    @property
+    def in_transaction(self) -> bool:
+        """True if a transaction is open."""
+        return self._connection.in_transaction
+
+    def cursor(
+        self, dictionary: bool = False, buffered: bool | None = None
+    ) -> SQLiteCursor:
+        """Return a cursor. ``buffered`` is accepted for compatibility."""
+        return SQLiteCursor(self._connection.cursor(), dictionary=dictionary)
+
+    def consume_results(self) -> None:
+        """Accepted for compatibility, as SQLite has no unread results."""
+
+    def rollback(self) -> None:
+        """Roll back the current transaction."""
+        self._connection.rollback()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._connection.close()
+
+
+def _file_stat(database_path: str) -> tuple[int, int] | None:
+    try:
+        stat = Path(database_path).stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class SQLiteConnectionPool(ConnectionPool):
+    """Per-worker pool of read-only SQLite database connections.
+
+    Idle connections to a database file that has since been replaced
+    are closed, so connections always read the current database file.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        pool_name: str = "mg_search",
+        pool_size: int = 10,
+        timeout: float = 5.0,
+    ) -> None:
+        super().__init__(
+            {},
+            pool_name=pool_name,
+            pool_size=pool_size,
+            pre_ping=False,
+            max_idle_time=0,
+            timeout=timeout,
+        )
+        self.database_path = database_path
+
+    def _open(self) -> SQLiteConnection:
+        connection = SQLiteConnection(self.database_path)
+        with self._lock:
+            self._opened += 1
+        return connection
+
+    def _checkout_idle(self) -> SQLiteConnection | None:
+        file_stat = _file_stat(self.database_path)
+        while (connection := super()._checkout_idle()) is not None:
+            if connection.file_stat == file_stat:
+                return connection
+
+            self._discard(connection)
+            with self._lock:
+                self._replaced += 1
+
+        return None
+
+
+def load_sqlite_database(
+    source_connection: MySQLConnection,
+    database_path: str | Path,
+    batch_size: int = 5000,
+) -> int:
+    """Copy the clips and tags tables into a new SQLite database file.
+
+    The database is written to a temporary file in the same directory
+    and renamed over the existing database file, so workers never see a
+    partially written database. Returns the number of clips copied.
+    """
+    database_path = Path(database_path)
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{database_path.name}.", dir=database_path.parent
+    )
+    os.close(file_descriptor)
+
+    try:
+        database = sqlite3.connect(temp_path)
+        try:
+            database.executescript(SQLITE_SCHEMA)
+            source_cursor = source_connection.cursor()
+            try:
+                for query, insert in (
+                    (
+                        "SELECT c.id, c.key, c.mp3, c.m4a, c.m4r FROM clips c",
+                        "INSERT INTO clips (id, key, mp3, m4a, m4r) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                    ),
+                    (
+                        "SELECT t.id, t.clip_id, t.title, t.album, t.artist, t.year "
+                        "FROM tags t",
+                        "INSERT INTO tags (id, clip_id, title, album, artist, year) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                    ),
+                ):
+                    source_cursor.execute(query)
+                    while rows := source_cursor.fetchmany(batch_size):
+                        database.executemany(insert, rows)
+            finally:
+                source_cursor.close()
+
+            database.execute("INSERT INTO tags_fts (tags_fts) VALUES ('rebuild')")
+            database.commit()
+            clip_count: int = database.execute("SELECT COUNT(*) FROM clips").fetchone()[
+                0
+            ]
+            database.execute("VACUUM")
+        finally:
+            database.close()
+
+        Path(temp_path).chmod(0o644)
+        Path(temp_path).replace(database_path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return clip_count
@@ -78,3 +78,62 @@
             })
     })
 })()
+
+/*!
+ * Search query suggestions
+ * Copyright 2025-2026 Linh Pham
+ */
+
+(() => {
+    'use strict'
+
+    const suggestDelay = 150
+
+    const debounce = (callback, delay) => {
+        let timer = null
+        return (...args) => {
+            clearTimeout(timer)
+            timer = setTimeout(() => callback(...args), delay)
+        }
+    }
+
+    const showSuggestions = (input, suggestions) => {
+        const datalist = document.getElementById(input.getAttribute('list'))
+        if (!datalist) {
+            return
+        }
+
+        datalist.replaceChildren(...suggestions.map(suggestion => {
+            const option = document.createElement('option')
+            option.value = suggestion
+            return option
+        }))
+    }
+
+    window.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('input[data-suggest-url]')
+            .forEach(input => {
+                let controller = null
+
+                const fetchSuggestions = prefix => {
+                    if (controller) {
+                        controller.abort()
+                    }
+
+                    if (prefix.trim().length < 2) {
+                        showSuggestions(input, [])
+                        return
+                    }
+
+                    controller = new AbortController()
+                    const url = `${input.dataset.suggestUrl}?prefix=${encodeURIComponent(prefix)}`
+                    fetch(url, { signal: controller.signal })
+                        .then(response => response.ok ? response.json() : { suggestions: [] })
+                        .then(data => showSuggestions(input, data.suggestions))
+                        .catch(() => {})
+                }
+
+                input.addEventListener('input', debounce(() => fetchSuggestions(input.value), suggestDelay))
+            })
+    })
+})()
@@ -0,0 +1,69 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Status Routes."""
+
+from flask import Blueprint, Response, abort, current_app, jsonify
+
+from app.main.clip import slugify_key
+from app.metrics import metrics_response
+
+blueprint = Blueprint("status", __name__)
+
+
+@blueprint.route("/status")
+def status() -> Response:
+    """View: Worker Status JSON."""
+    if not current_app.config["app_settings"]["enable_status"]:
+        abort(404)
+
+    _status: dict[str, dict] = {
+        "database_pool": current_app.extensions["database_pool"].stats(),
+        "key_slug_cache": slugify_key.cache_info()._asdict(),
+        "page_cache": current_app.extensions["page_cache"].stats(),
+    }
+    if "search_cache" in current_app.extensions:
+        _status["search_cache"] = current_app.extensions["search_cache"].stats()
+
+    if "circuit_breaker" in current_app.extensions:
+        _status["circuit_breaker"] = current_app.extensions["circuit_breaker"].stats()
+
+    if "admission_control" in current_app.extensions:
+        _status["admission_control"] = current_app.extensions[
+            "admission_control"
+        ].stats()
+
+    if "single_flight" in current_app.extensions:
+        _status["single_flight"] = current_app.extensions["single_flight"].stats()
+
+    if "search_engine" in current_app.extensions:
+        _status["search_index"] = current_app.extensions["search_engine"].stats()
+
+    if "suggest_engine" in current_app.extensions:
+        _status["suggest_index"] = current_app.extensions["suggest_engine"].stats()
+
+    if "related_clips" in current_app.extensions:
+        _status["related_clips"] = current_app.extensions["related_clips"].stats()
+
+    if "clip_sitemaps" in current_app.extensions:
+        _status["clip_sitemaps"] = current_app.extensions["clip_sitemaps"].stats()
+
+    if "slow_query_log" in current_app.extensions:
+        _status["slow_query_log"] = current_app.extensions["slow_query_log"].stats()
+
+    response: Response = jsonify(_status)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@blueprint.route("/metrics")
+def metrics() -> Response:
+    """View: Prometheus Metrics."""
+    if not current_app.config["app_settings"]["enable_metrics"]:
+        abort(404)
+
+    response: Response = metrics_response()
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,59 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Streamed Template Rendering Functions.
+
+Streamed pages are sent in parts, so the browser can start loading the
+stylesheets, fonts and scripts referenced in the page head while the
+rest of the page is rendered. Templates mark the end of each part by
+outputting the ``flush`` template variable, which is removed from the
+response. Output between flush points is sent as a single chunk, rather
+than as the many small strings produced by Jinja.
+"""
+
+from collections.abc import Iterator
+from typing import Any
+
+from flask import Response, current_app, stream_template
+from markupsafe import Markup
+
+# Flush point marker output by templates
+FLUSH: Markup = Markup("<!-- flush -->")
+
+
+def _flush_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """Join rendered template output into one chunk per flush point."""
+    buffer: list[str] = []
+    try:
+        for chunk in chunks:
+            if chunk != FLUSH:
+                buffer.append(chunk)
+            elif buffer:
+                yield "".join(buffer)
+                buffer = []
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        # Close the template stream, which also pops the request
+        # context kept for streaming, if the response is closed early
+        chunks.close()
+
+
+def streamed_response(template_name: str, **context: Any) -> Response:
+    """Return a response that renders and sends a template in parts.
+
+    Response headers are sent with the first part, so views need to set
+    any headers, and mark responses as not cacheable, before returning.
+    """
+    response = current_app.response_class(
+        _flush_chunks(stream_template(template_name, flush=FLUSH, **context)),
+        mimetype="text/html",
+    )
+
+    # Disable NGINX proxy buffering, which would otherwise hold the
+    # first part until the full response is received
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -5,6 +5,11 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Search Utility Functions."""
 
+import base64
+import binascii
+import hashlib
+import hmac
+import json
 import random
 from datetime import datetime
 
@@ -20,10 +25,61 @@ def current_year(time_zone: pytz.timezone = _utc_timezone):
     return now.strftime("%Y")
 
 
-def gurgle_name() -> str:
-    """Return a random variation of the word 'Gurgle'."""
-    random.seed()
-    random_number: int = random.randint(0, 100)  # noqa: S311 (not used for cryptography)
+def _cursor_signature(payload: str, key: str | bytes) -> str:
+    """Return the HMAC signature of an encoded pagination cursor payload."""
+    _key = key.encode("utf-8") if isinstance(key, str) else key
+    digest = hmac.new(_key, payload.encode("ascii"), hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None, key: str | bytes) -> dict | None:
+    """Decode and verify a signed pagination cursor string.
+
+    Returns None if the cursor is missing, is not valid or was not
+    signed with the key.
+    """
+    if not cursor:
+        return None
+
+    payload, _, signature = cursor.rpartition(".")
+    try:
+        if not payload or not hmac.compare_digest(
+            signature, _cursor_signature(payload, key)
+        ):
+            return None
+
+        padded_payload = payload + "=" * (-len(payload) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded_payload.encode("ascii")))
+    except (UnicodeError, binascii.Error, TypeError, ValueError):
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def encode_cursor(data: dict, key: str | bytes) -> str:
+    """Encode pagination cursor data into a signed, URL-safe string."""
+    _json = json.dumps(data, separators=(",", ":"), sort_keys=True)
+    payload = base64.urlsafe_b64encode(_json.encode("utf-8")).decode("ascii")
+    payload = payload.rstrip("=")
+    return f"{payload}.{_cursor_signature(payload, key)}"
+
+
+# Every variation of the word "Gurgle" returned by gurgle_name()
+GURGLE_NAMES: tuple[str, ...] = ("Gurgle", "Gorgle", "Gürgle", "Grgle")
+
+
+def gurgle_name(seed: str | None = None) -> str:
+    """Return a random variation of the word 'Gurgle'.
+
+    If a seed is provided, the same variation is always returned for
+    that seed, which keeps cacheable responses byte-for-byte identical.
+    """
+    if seed is not None:
+        _digest = hashlib.sha256(seed.encode("utf-8")).digest()
+        random_number: int = int.from_bytes(_digest[:4], "big") % 101
+    else:
+        random_number: int = random.randint(0, 100)  # noqa: S311 (not used for cryptography)
+
     if random_number <= 15:
         return "Gurgle"
     elif random_number > 15 and random_number <= 40:
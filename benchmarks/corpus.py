@@ -0,0 +1,242 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Synthetic Clip Corpus Generator.
+
+Generates a deterministic corpus of clips and tags for a given size and
+seed, and loads it into a benchmark database created from schema.sql.
+
+Usage: python -m benchmarks.corpus --size 100000 [--seed 1]
+    [--database-settings benchmarks/database_settings.json]
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from mysql.connector import connect
+from mysql.connector.connection import MySQLConnection
+from slugify import slugify
+
+from app.database import POOL_SETTINGS_KEYS
+
+SCHEMA_PATH: Path = Path(__file__).parent / "schema.sql"
+DEFAULT_SEED: int = 1
+DEFAULT_SETTINGS_PATH: str = "benchmarks/database_settings.json"
+
+# Words that appear in real clip titles are mixed into the generated
+# vocabulary so that queries used by the test suite also match
+_SEED_WORDS: tuple[str, ...] = (
+    "andrew", "luke", "gurgle", "gorgle", "gobble", "hey", "drop", "year",
+    "show", "news", "phone", "call", "song", "radio", "morning", "night",
+    "marsupial", "archive", "segment", "intro", "outro", "theme", "bonus",
+    "episode", "listener", "voicemail", "birthday", "holiday", "summer",
+)  # fmt: skip
+_VOCABULARY_SIZE: int = 20000
+
+
+def vocabulary(seed: int = DEFAULT_SEED) -> list[str]:
+    """Return the corpus vocabulary, ordered from most to least frequent."""
+    generator = random.Random(seed)  # noqa: S311
+    words: list[str] = list(_SEED_WORDS)
+    seen: set[str] = set(words)
+    while len(words) < _VOCABULARY_SIZE:
+        word = "".join(
+            generator.choices(string.ascii_lowercase, k=generator.randint(3, 10))
+        )
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+
+    return words
+
+
+def _phrase(generator: random.Random, words: list[str], weights: list[float]) -> str:
+    count = generator.randint(2, 7)
+    return " ".join(generator.choices(words, cum_weights=weights, k=count)).title()
+
+
+def generate_rows(size: int, seed: int = DEFAULT_SEED) -> Iterator[dict[str, Any]]:
+    """Yield ``size`` synthetic clip rows with tags.
+
+    Word frequencies follow a Zipf distribution, so the corpus has a
+    small number of very common terms and a long tail of rare terms.
+    """
+    generator = random.Random(seed)  # noqa: S311
+    words = vocabulary(seed)
+    cum_weights: list[float] = []
+    total = 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    artists = [_phrase(generator, words, cum_weights) for _ in range(size // 100 + 1)]
+    albums = [_phrase(generator, words, cum_weights) for _ in range(size // 50 + 1)]
+
+    for clip_id in range(1, size + 1):
+        title = _phrase(generator, words, cum_weights)
+        yield {
+            "id": clip_id,
+            "key": f"audio/{slugify(title, separator='')[:200]}-{clip_id}",
+            "mp3": 1,
+            "m4a": int(generator.random() < 0.7),
+            "m4r": int(generator.random() < 0.2),
+            "title": title,
+            "album": generator.choice(albums) if generator.random() < 0.9 else None,
+            "artist": generator.choice(artists),
+            "year": generator.randint(1950, 2025) if generator.random() < 0.9 else None,
+        }
+
+
+def benchmark_queries(seed: int = DEFAULT_SEED) -> dict[int, list[str]]:
+    """Return search queries by search mode value.
+
+    Queries cover common, mid-frequency and rare terms, along with
+    boolean operators, wildcard prefixes and quoted phrases.
+    """
+    words = vocabulary(seed)
+    common, mid, rare = words[len(_SEED_WORDS)], words[200], words[5000]
+    return {
+        1: ["andrew", common, f"{mid} {rare}", "hey gurgle"],
+        2: [f"+{common} -{mid}", f"{mid[:3]}*", f'"{words[0]} {words[1]}"', "luke"],
+        3: ["gobble", mid],
+    }
+
+
+def database_connection(settings_path: str) -> MySQLConnection:
+    """Connect to the benchmark database using a database settings file."""
+    with Path(settings_path).open(mode="r", encoding="utf-8") as settings_file:
+        settings: dict[str, Any] = json.load(settings_file)
+
+    settings = {
+        key: value for key, value in settings.items() if key not in POOL_SETTINGS_KEYS
+    }
+    settings["raise_on_warnings"] = False
+    return connect(**settings)
+
+
+def clip_count(connection: MySQLConnection) -> int:
+    """Return the number of clips in a database, or 0 if there are none."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = 'clips'"
+        )
+        if not cursor.fetchone()[0]:
+            return 0
+
+        cursor.execute("SELECT COUNT(*) FROM clips")
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def load_corpus(
+    connection: MySQLConnection,
+    size: int,
+    seed: int = DEFAULT_SEED,
+    batch_size: int = 5000,
+) -> None:
+    """Recreate the benchmark tables and load a synthetic corpus."""
+    cursor = connection.cursor()
+    try:
+        for statement in SCHEMA_PATH.read_text(encoding="utf-8").split(";"):
+            lines = [
+                line
+                for line in statement.splitlines()
+                if line.strip() and not line.strip().startswith("--")
+            ]
+            if lines:
+                cursor.execute("\n".join(lines))
+
+        clips: list[tuple] = []
+        tags: list[tuple] = []
+        for row in generate_rows(size, seed):
+            clips.append((row["id"], row["key"], row["mp3"], row["m4a"], row["m4r"]))
+            tags.append(
+                (row["id"], row["title"], row["album"], row["artist"], row["year"])
+            )
+            if len(clips) >= batch_size:
+                _insert(cursor, clips, tags)
+                connection.commit()
+                clips.clear()
+                tags.clear()
+
+        if clips:
+            _insert(cursor, clips, tags)
+
+        cursor.execute(
+            "ALTER TABLE tags ADD FULLTEXT INDEX tags_fulltext (title, album, artist)"
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def _insert(cursor: Any, clips: list[tuple], tags: list[tuple]) -> None:
+    cursor.executemany(
+        "INSERT INTO clips (id, `key`, mp3, m4a, m4r) VALUES (%s, %s, %s, %s, %s)",
+        clips,
+    )
+    cursor.executemany(
+        "INSERT INTO tags (clip_id, title, album, artist, year) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        tags,
+    )
+
+
+def main() -> int:
+    """Generate and load a synthetic corpus into the benchmark database."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000, help="number of clips")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--database-settings", default=DEFAULT_SETTINGS_PATH)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="drop and replace existing clips and tags tables",
+    )
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    connection = database_connection(arguments.database_settings)
+    try:
+        # Guard against pointing the generator at a real clips database
+        existing_clips = clip_count(connection)
+        if existing_clips and not arguments.replace:
+            print(
+                f"Database already contains {existing_clips} clips. Use --replace "
+                "to drop and replace the clips and tags tables.",
+                file=sys.stderr,
+            )
+            return 1
+
+        load_corpus(
+            connection,
+            size=arguments.size,
+            seed=arguments.seed,
+            batch_size=arguments.batch_size,
+        )
+    finally:
+        connection.close()
+
+    print(
+        f"Loaded {arguments.size} clips (seed {arguments.seed}) in "
+        f"{time.perf_counter() - start:.1f} seconds",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
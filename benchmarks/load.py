@@ -0,0 +1,489 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Access Log Load Test Runner.
+
+Replays search and clip requests taken from Gunicorn access logs against
+a locally started application backed by a benchmark database loaded with
+benchmarks.corpus, and writes throughput, latency percentiles and error
+rates for each route and search mode as JSON.
+
+Only the path and the query, search mode, page and clip key parameters
+of each request are kept, so client addresses, user agents, referrers
+and timestamps are never read from the access log. Use --extract to
+write anonymized requests that can be copied off a production server.
+
+Usage: python -m benchmarks.load access.log [access.log.1 ...]
+    [--concurrency 16] [--rate 50] [--duration 60]
+    [--gunicorn-args "--workers 4 --worker-class gthread --threads 4"]
+    [--url http://127.0.0.1:8000] [--output results.json]
+    [--database-settings benchmarks/database_settings.json]
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import http.client
+import itertools
+import json
+import os
+import platform
+import queue
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from app.main.search import parse_search_mode
+from app.sqlite import SQLiteConnection
+from benchmarks.corpus import DEFAULT_SETTINGS_PATH, database_connection
+from benchmarks.run import _git_commit
+
+RESULTS_VERSION: int = 1
+
+# Request line and status of the default Gunicorn access log format
+_ACCESS_LOG_PATTERN: re.Pattern = re.compile(
+    r'"(?P<method>[A-Z]+) (?P<target>\S+) HTTP/[\d.]+" (?P<status>\d{3}) '
+)
+
+# Replayed paths and the request parameters kept for each path
+REPLAYED_PARAMETERS: dict[str, tuple[str, ...]] = {
+    "/search": ("query", "mode", "page"),
+    "/clip": ("key",),
+}
+
+
+def anonymized_request(line: str) -> str | None:
+    """Return the anonymized request target of a request line or access log line.
+
+    Lines that are already anonymized request targets are accepted, so
+    the output of --extract can be replayed. Returns None for requests
+    that are not replayed.
+    """
+    line = line.strip()
+    if line.startswith("/"):
+        target = line
+    else:
+        match = _ACCESS_LOG_PATTERN.search(line)
+        if not match or match.group("method") != "GET":
+            return None
+        target = match.group("target")
+
+    parts = urlsplit(target)
+    path = parts.path.rstrip("/") or "/"
+    parameters = REPLAYED_PARAMETERS.get(path)
+    if not parameters:
+        return None
+
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name in parameters
+    ]
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+def read_requests(paths: Iterable[str]) -> list[str]:
+    """Return anonymized request targets read from access log files."""
+    requests: list[str] = []
+    for path in paths:
+        with Path(path).open(mode="r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                target = anonymized_request(line)
+                if target:
+                    requests.append(target)
+
+    return requests
+
+
+def map_clip_keys(requests: list[str], clip_keys: list[str]) -> list[str]:
+    """Replace clip keys in requests with clip keys from the benchmark corpus.
+
+    Each logged clip key is always replaced with the same corpus clip key,
+    so repeated requests for a clip stay repeated.
+    """
+    if not clip_keys:
+        return requests
+
+    mapped: list[str] = []
+    for target in requests:
+        parts = urlsplit(target)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if parts.path != "/clip" or not query:
+            mapped.append(target)
+            continue
+
+        query = [
+            (
+                name,
+                clip_keys[
+                    int.from_bytes(hashlib.sha256(value.encode("utf-8")).digest()[:8])
+                    % len(clip_keys)
+                ],
+            )
+            if name == "key"
+            else (name, value)
+            for name, value in query
+        ]
+        mapped.append(f"{parts.path}?{urlencode(query)}")
+
+    return mapped
+
+
+def corpus_clip_keys(settings_path: str, limit: int = 100000) -> list[str]:
+    """Return clip keys from the benchmark database or SQLite database."""
+    if _app_setting(settings_path, "backend") == "sqlite":
+        connection = SQLiteConnection(_app_setting(settings_path, "sqlite_path"))
+    else:
+        connection = database_connection(settings_path)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT `key` FROM clips ORDER BY id LIMIT {int(limit)}")
+        keys = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return keys
+    finally:
+        connection.close()
+
+
+def request_group(target: str, enable_query_expansion_mode: bool = True) -> str:
+    """Return the route and search mode group a request is reported under."""
+    parts = urlsplit(target)
+    if parts.path != "/search":
+        return parts.path
+
+    query = dict(parse_qsl(parts.query))
+    if not query.get("query", "").strip():
+        return "/search[empty]"
+
+    search_mode, _ = parse_search_mode(
+        query.get("mode", 1), enable_query_expansion_mode=enable_query_expansion_mode
+    )
+    return f"/search[{search_mode.name.lower()}]"
+
+
+def _percentile(timings: list[float], percentile: float) -> float:
+    """Return a percentile of sorted timings using the nearest rank."""
+    rank = max(int(-(-percentile * len(timings) // 100)), 1)
+    return timings[rank - 1]
+
+
+def summarize(
+    samples: list[tuple[str, int | None, float]], duration: float
+) -> dict[str, dict[str, Any]]:
+    """Summarize request samples for each group and for all requests.
+
+    Each sample is the request group, response status, or None if the
+    request failed, and latency in seconds. Server errors and failed
+    requests count as errors.
+    """
+    groups: dict[str, list[tuple[int | None, float]]] = defaultdict(list)
+    for group, status, latency in samples:
+        groups[group].append((status, latency))
+        groups["all"].append((status, latency))
+
+    summary: dict[str, dict[str, Any]] = {}
+    for group, group_samples in sorted(groups.items()):
+        timings = sorted(latency for _, latency in group_samples)
+        statuses: dict[str, int] = defaultdict(int)
+        errors = 0
+        for status, _ in group_samples:
+            statuses[str(status) if status else "failed"] += 1
+            if not status or status >= 500:
+                errors += 1
+
+        summary[group] = {
+            "requests": len(group_samples),
+            "requests_per_second": round(len(group_samples) / duration, 1)
+            if duration
+            else None,
+            "p50_ms": round(_percentile(timings, 50) * 1e3, 2),
+            "p95_ms": round(_percentile(timings, 95) * 1e3, 2),
+            "p99_ms": round(_percentile(timings, 99) * 1e3, 2),
+            "max_ms": round(timings[-1] * 1e3, 2),
+            "error_rate": round(errors / len(group_samples), 4),
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+    return summary
+
+
+def replay(
+    requests: Iterable[str],
+    send: Callable[[str], int],
+    concurrency: int,
+    rate: float | None = None,
+    duration: float | None = None,
+    group: Callable[[str], str] = request_group,
+) -> tuple[list[tuple[str, int | None, float]], float]:
+    """Send requests from concurrent workers and return samples and duration.
+
+    Without a rate, each worker sends its next request as soon as the
+    previous response is received. With a rate, requests are scheduled at
+    fixed intervals and latency is measured from the scheduled time, so
+    time spent waiting for a free worker while the server is saturated is
+    included rather than hidden. Replay stops when the requests run out or
+    the duration in seconds has passed.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=concurrency * 2)
+    samples: list[tuple[str, int | None, float]] = []
+    samples_lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def _worker() -> None:
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+
+            target, scheduled = item
+            try:
+                status: int | None = send(target)
+            except (OSError, http.client.HTTPException):
+                status = None
+            latency = time.perf_counter() - scheduled
+            with samples_lock:
+                samples.append((group(target), status, latency))
+
+    workers = [
+        threading.Thread(target=_worker, daemon=True) for _ in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+
+    for index, target in enumerate(requests):
+        now = time.perf_counter()
+        if deadline and now >= deadline:
+            break
+
+        if rate:
+            scheduled = start + index / rate
+            if scheduled > now:
+                time.sleep(scheduled - now)
+        else:
+            scheduled = now
+        pending.put((target, scheduled))
+
+    for _ in workers:
+        pending.put(None)
+    for worker in workers:
+        worker.join()
+
+    return samples, time.perf_counter() - start
+
+
+class _Client(threading.local):
+    """Per-thread persistent HTTP connection to the application."""
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.connection: http.client.HTTPConnection | None = None
+
+    def send(self, target: str) -> int:
+        """Send a request, read the response and return its status."""
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30
+            )
+        try:
+            self.connection.request(
+                "GET", target, headers={"Accept-Encoding": "gzip, br"}
+            )
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+
+        if response.will_close:
+            self.connection.close()
+            self.connection = None
+        return response.status
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(
+    app_settings_path: str,
+    database_settings_path: str,
+    gunicorn_args: list[str],
+    timeout: float = 30,
+) -> tuple[subprocess.Popen, str]:
+    """Start the application using Gunicorn and wait until it responds."""
+    port = _free_port()
+    application = (
+        f"app:create_app(app_settings_path={app_settings_path!r}, "
+        f"database_settings_path={database_settings_path!r})"
+    )
+    process = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *gunicorn_args,
+            "--bind",
+            f"127.0.0.1:{port}",
+            application,
+        ]
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    client = _Client(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Gunicorn exited with status {process.returncode}")
+        try:
+            if client.send("/") == 200:
+                return process, url
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"Gunicorn did not respond within {timeout} seconds")
+
+
+def _app_setting(settings_path: str, key: str, default: Any = None) -> Any:
+    """Return a setting from an application or database settings file."""
+    try:
+        with Path(settings_path).open(mode="r", encoding="utf-8") as settings_file:
+            return json.load(settings_file).get(key, default)
+    except (OSError, ValueError):
+        return default
+
+
+def _request_cycle(requests: list[str], loop: bool) -> Iterator[str]:
+    return itertools.cycle(requests) if loop else iter(requests)
+
+
+def main() -> int:
+    """Replay access log requests against the application."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="access log or extracted request files")
+    parser.add_argument(
+        "--extract",
+        action="store_true",
+        help="write anonymized requests to standard output and exit",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="requests per second; send requests as fast as possible if not set",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="seconds to run for, looping over the requests if needed",
+    )
+    parser.add_argument("--warmup", type=int, default=100, help="requests to discard")
+    parser.add_argument("--url", help="replay against an already running application")
+    parser.add_argument("--app-settings", default="app_settings.json")
+    parser.add_argument("--database-settings", default=DEFAULT_SETTINGS_PATH)
+    parser.add_argument(
+        "--gunicorn-args",
+        default="--workers 4",
+        help="Gunicorn options, such as workers, worker class and threads",
+    )
+    parser.add_argument(
+        "--keep-clip-keys",
+        action="store_true",
+        help="do not replace logged clip keys with benchmark corpus clip keys",
+    )
+    parser.add_argument("--output", help="write JSON results to a file")
+    arguments = parser.parse_args()
+
+    requests = read_requests(arguments.logs)
+    if arguments.extract:
+        for target in requests:
+            print(target)
+        return 0
+
+    if not requests:
+        print("No search or clip requests found.", file=sys.stderr)
+        return 1
+
+    if not arguments.keep_clip_keys:
+        requests = map_clip_keys(
+            requests, corpus_clip_keys(arguments.database_settings)
+        )
+
+    process: subprocess.Popen | None = None
+    url: str = arguments.url
+    if not url:
+        process, url = start_gunicorn(
+            arguments.app_settings,
+            arguments.database_settings,
+            shlex.split(arguments.gunicorn_args),
+        )
+
+    try:
+        client = _Client(url)
+        for target in requests[: arguments.warmup]:
+            with contextlib.suppress(OSError, http.client.HTTPException):
+                client.send(target)
+
+        samples, duration = replay(
+            _request_cycle(requests, loop=bool(arguments.duration)),
+            send=client.send,
+            concurrency=arguments.concurrency,
+            rate=arguments.rate,
+            duration=arguments.duration,
+            group=functools.partial(
+                request_group,
+                enable_query_expansion_mode=_app_setting(
+                    arguments.app_settings, "enable_query_expansion_mode", False
+                ),
+            ),
+        )
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    results: dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(tz=UTC).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "gunicorn_args": None if arguments.url else arguments.gunicorn_args,
+        "pool_size": _app_setting(arguments.database_settings, "pool_size"),
+        "concurrency": arguments.concurrency,
+        "rate": arguments.rate,
+        "duration_seconds": round(duration, 2),
+        "groups": summarize(samples, duration),
+    }
+
+    output = json.dumps(results, indent=2)
+    if arguments.output:
+        Path(arguments.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
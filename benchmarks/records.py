@@ -0,0 +1,161 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Clip Record Allocation and Timing Comparison.
+
+Compares building search results from dictionary cursor rows into clip
+dictionaries, as search results were built before Clip records were
+introduced, with building Clip records from tuple cursor rows, and
+slugifying clip keys on every use with the slugify_key cache. Rows are
+generated with benchmarks.corpus, so no database is required.
+
+Usage: python -m benchmarks.records [--rows 24] [--iterations 2000]
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from slugify import slugify
+
+from app.main.clip import Clip, slugify_key
+from benchmarks.corpus import DEFAULT_SEED, generate_rows
+from benchmarks.run import measure
+
+_COLUMNS: tuple[str, ...] = (
+    "id", "key", "mp3", "m4a", "m4r", "artist", "album", "title", "year",
+)  # fmt: skip
+
+# Template fields read when rendering a search result
+_TEMPLATE_FIELDS: tuple[str, ...] = (
+    "id", "key", "title", "artist", "album", "year", "mp3_path", "m4a_path",
+    "m4r_path",
+)  # fmt: skip
+
+
+def _dictionary_rows(corpus: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return rows in the shape returned by a dictionary cursor."""
+    return [
+        {**{column: row[column] for column in _COLUMNS}, "score": 1.0 / row["id"]}
+        for row in corpus
+    ]
+
+
+def _tuple_rows(corpus: list[dict[str, Any]]) -> list[tuple]:
+    """Return rows in the shape returned by a tuple cursor."""
+    return [(*(row[column] for column in _COLUMNS), 1.0 / row["id"]) for row in corpus]
+
+
+def _build_dictionary(row: dict[str, Any]) -> dict[str, int | str | None]:
+    """Build a clip dictionary from a dictionary cursor row."""
+    return {
+        "id": row["id"],
+        "key": row["key"],
+        "key_slug": slugify(row["key"]),
+        "mp3_path": f"{row['key']}.mp3" if bool(row["mp3"]) else None,
+        "m4a_path": f"{row['key']}.m4a" if bool(row["m4a"]) else None,
+        "m4r_path": f"{row['key']}.m4r" if bool(row["m4r"]) else None,
+        "artist": row["artist"],
+        "album": row["album"],
+        "title": row["title"],
+        "year": row["year"],
+    }
+
+
+def _render_dictionary(clips: list[dict]) -> None:
+    for clip in clips:
+        for field in _TEMPLATE_FIELDS:
+            clip[field]
+
+
+def _render_record(clips: list[Clip]) -> None:
+    for clip in clips:
+        for field in _TEMPLATE_FIELDS:
+            getattr(clip, field)
+
+
+def _allocated(build: Callable[[], Any]) -> dict[str, int]:
+    """Return the bytes retained by, and peak bytes allocated by, a build."""
+    tracemalloc.start()
+    try:
+        retained = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del retained
+    return {"retained_bytes": current, "peak_bytes": peak}
+
+
+def compare_records(rows: int, iterations: int, seed: int) -> dict[str, dict]:
+    """Compare clip dictionaries with Clip records for a page of rows.
+
+    Allocations cover fetched rows and built results, as both are held
+    while a page is rendered. Timings cover building results and reading
+    the fields used by the search results template.
+    """
+    corpus = list(generate_rows(rows, seed))
+    dictionary_rows = _dictionary_rows(corpus)
+    tuple_rows = _tuple_rows(corpus)
+
+    def _dictionary_path() -> list[dict]:
+        clips = [_build_dictionary(row) for row in dictionary_rows]
+        _render_dictionary(clips)
+        return clips
+
+    def _record_path() -> list[Clip]:
+        clips = [Clip.from_row(row) for row in tuple_rows]
+        _render_record(clips)
+        return clips
+
+    return {
+        "dictionary": {
+            **_allocated(lambda: (_dictionary_rows(corpus), _dictionary_path())),
+            **measure(_dictionary_path, iterations),
+        },
+        "record": {
+            **_allocated(lambda: (_tuple_rows(corpus), _record_path())),
+            **measure(_record_path, iterations),
+        },
+    }
+
+
+def compare_key_slugs(rows: int, iterations: int, seed: int) -> dict[str, dict]:
+    """Compare slugifying a page of clip keys with the slugify_key cache."""
+    keys = [row["key"] for row in generate_rows(rows, seed)]
+    slugify_key.cache_clear()
+    return {
+        "key_slug_slugify": measure(lambda: [slugify(key) for key in keys], iterations),
+        "key_slug_cached": measure(
+            lambda: [slugify_key(key) for key in keys], iterations
+        ),
+    }
+
+
+def main() -> int:
+    """Run the clip record comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=24, help="rows per page")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    arguments = parser.parse_args()
+
+    results = {
+        **compare_records(
+            rows=arguments.rows, iterations=arguments.iterations, seed=arguments.seed
+        ),
+        **compare_key_slugs(
+            rows=arguments.rows, iterations=arguments.iterations, seed=arguments.seed
+        ),
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
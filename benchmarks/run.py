@@ -0,0 +1,283 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Benchmark Suite Runner.
+
+Runs search, clip information, pagination, template rendering and
+end-to-end search request benchmarks against a benchmark database loaded
+with benchmarks.corpus, and writes the results as JSON.
+
+Usage: python -m benchmarks.run [--output results.json]
+    [--compare baseline.json] [--iterations 200]
+    [--database-settings benchmarks/database_settings.json]
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, render_template
+
+from app import create_app
+from app.database import get_connection
+from app.main.clip import retrieve_clip_info
+from app.main.search import SearchMode, SearchStrategy, search_clips
+from app.utilities import pagination_list
+from benchmarks.corpus import DEFAULT_SEED, DEFAULT_SETTINGS_PATH, benchmark_queries
+
+RESULTS_VERSION: int = 1
+
+
+def _summary(timings: list[int]) -> dict[str, float | int]:
+    """Summarize timings in nanoseconds as milliseconds."""
+    timings = sorted(timings)
+    mean = statistics.fmean(timings)
+    return {
+        "iterations": len(timings),
+        "min_ms": round(timings[0] / 1e6, 4),
+        "median_ms": round(statistics.median(timings) / 1e6, 4),
+        "mean_ms": round(mean / 1e6, 4),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))] / 1e6, 4),
+        "max_ms": round(timings[-1] / 1e6, 4),
+        "ops_per_second": round(1e9 / mean, 1) if mean else None,
+    }
+
+
+def measure(
+    function: Callable[[], Any], iterations: int, warmup: int = 5
+) -> dict[str, float | int]:
+    """Time repeated calls of a function."""
+    for _ in range(warmup):
+        function()
+
+    timings: list[int] = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        function()
+        timings.append(time.perf_counter_ns() - start)
+
+    return _summary(timings)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _corpus_info(seed: int) -> tuple[int, list[str]]:
+    """Return the number of clips and a deterministic sample of clip keys."""
+    cursor = get_connection().cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM clips")
+        count = int(cursor.fetchone()[0])
+        clip_ids = random.Random(seed).sample(  # noqa: S311
+            range(1, count + 1), min(count, 50)
+        )
+        placeholders = ", ".join(["%s"] * len(clip_ids))
+        cursor.execute(
+            f"SELECT c.key FROM clips c WHERE c.id IN ({placeholders})", clip_ids
+        )
+        return count, [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def run_benchmarks(
+    app: Flask, iterations: int, seed: int
+) -> tuple[dict[str, Any], dict[str, dict]]:
+    """Run all benchmarks and return corpus information and results."""
+    results: dict[str, dict] = {}
+    queries = benchmark_queries(seed)
+    results_per_page: int = app.config["app_settings"]["results_per_page"]
+
+    with app.app_context():
+        clip_count, clip_keys = _corpus_info(seed)
+
+        for search_mode, search_strategy in itertools.product(
+            SearchMode, SearchStrategy
+        ):
+            arguments = itertools.cycle(
+                itertools.product(queries[search_mode.value], (0, results_per_page * 4))
+            )
+
+            def _search(
+                search_mode: SearchMode = search_mode,
+                search_strategy: SearchStrategy = search_strategy,
+                arguments: itertools.cycle = arguments,
+            ) -> None:
+                search_query, offset = next(arguments)
+                search_clips(
+                    search_query=search_query,
+                    search_mode=search_mode,
+                    results_per_page=results_per_page,
+                    offset=offset,
+                    database_connection=get_connection(),
+                    search_strategy=search_strategy,
+                )
+
+            name = f"search_clips[{search_mode.name.lower()},{search_strategy.value}]"
+            results[name] = measure(_search, iterations)
+
+        keys = itertools.cycle(clip_keys)
+        results["retrieve_clip_info"] = measure(
+            lambda: retrieve_clip_info(next(keys), get_connection()), iterations
+        )
+
+        pages = itertools.cycle(itertools.product(range(1, 60), (1, 5, 40, 10000)))
+        results["pagination_list"] = measure(
+            lambda: pagination_list(*next(pages)), iterations * 50
+        )
+
+        search_results = search_clips(
+            search_query=queries[1][0],
+            search_mode=SearchMode.NATURAL,
+            results_per_page=results_per_page,
+            offset=0,
+            database_connection=get_connection(),
+        )
+
+    with app.test_request_context("/search", query_string={"query": queries[1][0]}):
+        total_count = search_results.get("total_count", 0)
+        total_pages = -(-total_count // results_per_page)
+        results["render_search_template"] = measure(
+            lambda: render_template(
+                "pages/search.html",
+                search_query=queries[1][0],
+                search_mode=1,
+                valid_search_mode=True,
+                current_page=1,
+                total_count=total_count,
+                total_pages=total_pages,
+                pagination_list=pagination_list(1, total_pages),
+                returned_count=search_results.get("returned_count", 0),
+                search_results=search_results.get("results", []),
+                gurgle="Gurgle",
+            ),
+            iterations,
+        )
+
+    # End-to-end requests use every search mode and a mix of pages, with
+    # and without the search result cache
+    requests = itertools.cycle(
+        [
+            {"query": query, "mode": mode, "page": page}
+            for mode, mode_queries in queries.items()
+            for query in mode_queries
+            for page in (1, 2, 5)
+        ]
+    )
+    client = app.test_client()
+    results["search_endpoint_cached"] = measure(
+        lambda: client.get("/search", query_string=next(requests)), iterations
+    )
+    app.extensions.pop("search_cache", None)
+    results["search_endpoint"] = measure(
+        lambda: client.get("/search", query_string=next(requests)), iterations
+    )
+
+    return {"clips": clip_count, "seed": seed}, results
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[str]:
+    """Print median timings against a baseline and return regressions."""
+    regressions: list[str] = []
+    print(
+        f"{'benchmark':<48} {'baseline':>10} {'current':>10} {'change':>8}",
+        file=sys.stderr,
+    )
+    for name, result in current["benchmarks"].items():
+        baseline_result: dict | None = baseline["benchmarks"].get(name)
+        if not baseline_result:
+            print(
+                f"{name:<48} {'-':>10} {result['median_ms']:>10.4f} {'new':>8}",
+                file=sys.stderr,
+            )
+            continue
+
+        ratio = result["median_ms"] / baseline_result["median_ms"]
+        print(
+            f"{name:<48} {baseline_result['median_ms']:>10.4f} "
+            f"{result['median_ms']:>10.4f} {ratio - 1:>+8.1%}",
+            file=sys.stderr,
+        )
+        if ratio > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-settings", default=DEFAULT_SETTINGS_PATH)
+    parser.add_argument("--app-settings", default="app_settings.json")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="write JSON results to a file")
+    parser.add_argument("--compare", help="compare against a JSON results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="median time ratio above which a benchmark is a regression",
+    )
+    arguments = parser.parse_args()
+
+    app = create_app(
+        app_settings_path=arguments.app_settings,
+        database_settings_path=arguments.database_settings,
+    )
+    corpus, benchmarks = run_benchmarks(
+        app, iterations=arguments.iterations, seed=arguments.seed
+    )
+    results: dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(tz=UTC).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": corpus,
+        "benchmarks": benchmarks,
+    }
+
+    output = json.dumps(results, indent=2)
+    if arguments.output:
+        Path(arguments.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if arguments.compare:
+        with Path(arguments.compare).open(mode="r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(baseline, results, threshold=arguments.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
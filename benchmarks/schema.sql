@@ -0,0 +1,33 @@
+-- Copyright (c) 2025-2026 Linh Pham
+-- search.marsupialgurgle.com is released under the terms of the MIT License
+-- SPDX-License-Identifier: MIT
+--
+-- Benchmark database schema with the clips and tags columns queried by
+-- the application. The full-text index is created after the synthetic
+-- corpus is loaded.
+
+DROP TABLE IF EXISTS tags;
+DROP TABLE IF EXISTS clips;
+
+CREATE TABLE clips (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+    `key` VARCHAR(255) NOT NULL,
+    mp3 TINYINT(1) NOT NULL DEFAULT 0,
+    m4a TINYINT(1) NOT NULL DEFAULT 0,
+    m4r TINYINT(1) NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE KEY clips_key (`key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE tags (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+    clip_id INT UNSIGNED NOT NULL,
+    title VARCHAR(255) DEFAULT NULL,
+    album VARCHAR(255) DEFAULT NULL,
+    artist VARCHAR(255) DEFAULT NULL,
+    year SMALLINT UNSIGNED DEFAULT NULL,
+    PRIMARY KEY (id),
+    KEY tags_clip_id (clip_id),
+    CONSTRAINT tags_clip_id_fk FOREIGN KEY (clip_id) REFERENCES clips (id)
+        ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
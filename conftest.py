@@ -5,10 +5,53 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """pytest conftest.py File."""
 
+import json
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
 import pytest
 from flask import Flask
 
 from app import create_app
+from app.sqlite import SQLITE_SCHEMA, SQLiteConnection, load_sqlite_database
+
+_SQLITE_ROWS: list[dict] = [
+    {
+        "id": 1,
+        "key": "audio/lukeandrewheygorgle",
+        "mp3": 1,
+        "m4a": 1,
+        "m4r": 0,
+        "title": "Luke and Andrew Say Hey Gorgle",
+        "album": "TBTL Drops",
+        "artist": "Luke Burbank",
+        "year": 2024,
+    },
+    {
+        "id": 2,
+        "key": "audio/gürgleintheyear2525",
+        "mp3": 1,
+        "m4a": 0,
+        "m4r": 0,
+        "title": "Gürgle in the Year 2525",
+        "album": "Songs",
+        "artist": "Zager and Evans",
+        "year": 1969,
+    },
+    {
+        "id": 3,
+        "key": "audio/andrewgobble",
+        "mp3": 1,
+        "m4a": 1,
+        "m4r": 1,
+        "title": "Andrew Gobble Gobble",
+        "album": "TBTL Drops",
+        "artist": "Andrew Walsh",
+        "year": None,
+    },
+]
 
 
 @pytest.fixture
@@ -17,3 +60,77 @@ def client():
     app: Flask = create_app()
     with app.test_client() as _client:
         yield _client
+
+
+@pytest.fixture
+def sqlite_rows() -> list[dict]:
+    """Pytest SQLite Database Rows Fixture."""
+    return _SQLITE_ROWS
+
+
+@pytest.fixture
+def sqlite_path(tmp_path: Path) -> Path:
+    """Pytest SQLite Database Fixture.
+
+    The database is copied from a source database by the loader.
+    """
+    source_path = tmp_path / "source.sqlite"
+    source = sqlite3.connect(source_path)
+    source.executescript(SQLITE_SCHEMA)
+    source.executemany(
+        "INSERT INTO clips VALUES (?, ?, ?, ?, ?)",
+        [
+            (row["id"], row["key"], row["mp3"], row["m4a"], row["m4r"])
+            for row in _SQLITE_ROWS
+        ],
+    )
+    source.executemany(
+        "INSERT INTO tags VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                row["id"],
+                row["id"],
+                row["title"],
+                row["album"],
+                row["artist"],
+                row["year"],
+            )
+            for row in _SQLITE_ROWS
+        ],
+    )
+    source.commit()
+    source.close()
+
+    database_path = tmp_path / "mg_clips.sqlite"
+    source_connection = SQLiteConnection(str(source_path))
+    load_sqlite_database(source_connection, database_path, batch_size=2)
+    source_connection.close()
+    return database_path
+
+
+@pytest.fixture
+def sqlite_app(tmp_path: Path, sqlite_path: Path) -> Callable[..., Flask]:
+    """Pytest SQLite Application Fixture.
+
+    Returns a function that creates the application with the SQLite
+    search backend and the application settings passed to it, or the
+    default application settings file if no settings are passed.
+    """
+
+    def _sqlite_app(**app_settings: Any) -> Flask:
+        app_settings_path = Path("app_settings.json")
+        if app_settings:
+            app_settings_path = tmp_path / "app_settings.json"
+            app_settings_path.write_text(json.dumps(app_settings), encoding="utf-8")
+
+        database_settings_path = tmp_path / "database_settings.json"
+        database_settings_path.write_text(
+            json.dumps({"backend": "sqlite", "sqlite_path": str(sqlite_path)}),
+            encoding="utf-8",
+        )
+        return create_app(
+            app_settings_path=str(app_settings_path),
+            database_settings_path=str(database_settings_path),
+        )
+
+    return _sqlite_app
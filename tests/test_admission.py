@@ -0,0 +1,213 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Request Admission Control Module."""
+
+import multiprocessing
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from app.admission import AdmissionControl, client_address, search_cost
+from app.main.search import SearchMode
+
+
+@pytest.mark.parametrize(
+    "search_mode, page, cost",
+    [
+        (SearchMode.NATURAL, 1, 1),
+        (SearchMode.NATURAL, 5, 1),
+        (SearchMode.NATURAL, 6, 2),
+        (SearchMode.BOOLEAN, 1, 2),
+        (SearchMode.EXPANDED, 1, 4),
+        (SearchMode.EXPANDED, 11, 12),
+        (SearchMode.NATURAL, 10000, 8),
+        (SearchMode.NATURAL, -1, 1),
+    ],
+)
+def test_search_cost(search_mode: SearchMode, page: int, cost: float) -> None:
+    """Testing app.admission.search_cost."""
+    assert search_cost(search_mode, page) == cost
+
+
+@pytest.mark.parametrize(
+    "remote_addr, header, header_value, expected",
+    [
+        ("203.0.113.7", None, None, "203.0.113.7"),
+        ("127.0.0.1", "X-Real-IP", "203.0.113.7", "203.0.113.7"),
+        ("127.0.0.1", "X-Real-IP", None, "127.0.0.1"),
+        ("127.0.0.1", "X-Forwarded-For", "192.0.2.1, 203.0.113.7", "203.0.113.7"),
+        ("2001:db8:1:2:3:4:5:6", None, None, "2001:db8:1:2::/64"),
+        ("::ffff:203.0.113.7", None, None, "203.0.113.7"),
+    ],
+)
+def test_client_address(
+    remote_addr: str, header: str | None, header_value: str | None, expected: str
+) -> None:
+    """Testing app.admission.client_address."""
+    headers = {header: header_value} if header and header_value else {}
+    with Flask(__name__).test_request_context(
+        "/search", headers=headers, environ_base={"REMOTE_ADDR": remote_addr}
+    ):
+        assert client_address(header) == expected
+
+
+def test_admit(tmp_path: Path) -> None:
+    """Testing app.admission.AdmissionControl.admit."""
+    path = str(tmp_path / "rate_limit")
+    admission = AdmissionControl(path, capacity=4, refill_rate=0.01)
+    assert admission.admit("203.0.113.7", 2) is None
+    assert admission.admit("203.0.113.7", 2) is None
+
+    retry_after = admission.admit("203.0.113.7", 1)
+    assert retry_after is not None
+    assert 90 < retry_after <= 100
+
+    # Buckets are shared with other workers using the same file
+    other_worker = AdmissionControl(path, capacity=4, refill_rate=0.01)
+    assert other_worker.admit("203.0.113.7", 1) is not None
+    assert other_worker.admit("192.0.2.1", 100) is None
+    assert admission.stats()["rate_limited"] == 1
+
+
+def _acquire_search(path: str, results: multiprocessing.Queue) -> None:
+    results.put(AdmissionControl(path, max_searches=2).acquire_search())
+
+
+def test_acquire_search(tmp_path: Path) -> None:
+    """Testing app.admission.AdmissionControl.acquire_search across processes."""
+    path = str(tmp_path / "rate_limit")
+    admission = AdmissionControl(path, max_searches=2)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+
+    first = admission.acquire_search()
+    assert first is not None
+    process = context.Process(target=_acquire_search, args=(path, results))
+    process.start()
+    process.join()
+    assert results.get(timeout=5) is not None
+
+    # Both search slots are held, one by this process and one by a
+    # process that has exited, which releases its slot
+    second = admission.acquire_search()
+    assert second is not None
+    assert admission.acquire_search() is None
+
+    process = context.Process(target=_acquire_search, args=(path, results))
+    process.start()
+    process.join()
+    assert results.get(timeout=5) is None
+
+    admission.release_search(first)
+    process = context.Process(target=_acquire_search, args=(path, results))
+    process.start()
+    process.join()
+    assert results.get(timeout=5) == first
+    assert admission.stats()["active_searches"] == 1
+
+
+def _admission_app(
+    sqlite_app: Callable[..., Flask], tmp_path: Path, capacity: float
+) -> Flask:
+    return sqlite_app(
+        rate_limit_capacity=capacity,
+        rate_limit_client_header="X-Real-IP",
+        rate_limit_max_searches=1,
+        rate_limit_path=str(tmp_path / "rate_limit"),
+        rate_limit_refill_rate=0.01,
+        search_cache_size=0,
+        stream_search_results=True,
+    )
+
+
+def test_admission_control(sqlite_app: Callable[..., Flask], tmp_path: Path) -> None:
+    """Testing admission control of search and clip pages."""
+    app = _admission_app(sqlite_app, tmp_path, capacity=3)
+    client = app.test_client()
+    headers = {"X-Real-IP": "203.0.113.7"}
+
+    for path, query_string in (
+        ("/search", {"query": "andrew"}),
+        ("/search", {"query": "gobble"}),
+        ("/clip", {"key": "audio/andrewgobble"}),
+        ("/search", {}),
+    ):
+        response = client.get(path, query_string=query_string, headers=headers)
+        assert response.status_code == 200
+        assert b"Andrew" in response.data or not query_string
+        response.close()
+
+    response = client.get(
+        "/search", query_string={"query": "andrew", "mode": 2}, headers=headers
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.headers["Cache-Control"] == "no-store"
+
+    # Streamed pages hold their search slot until the page has been sent
+    response = client.get(
+        "/search", query_string={"query": "andrew"}, headers={"X-Real-IP": "192.0.2.1"}
+    )
+    assert response.status_code == 200
+    assert app.extensions["admission_control"].stats()["active_searches"] == 1
+    response.close()
+
+    stats = app.extensions["admission_control"].stats()
+    assert stats["admitted"] == 4
+    assert stats["rate_limited"] == 1
+    assert stats["active_searches"] == 0
+
+
+def test_admission_control_api(
+    sqlite_app: Callable[..., Flask], tmp_path: Path
+) -> None:
+    """Testing admission control of search and clip API requests."""
+    app = _admission_app(sqlite_app, tmp_path, capacity=20)
+    client = app.test_client()
+    headers = {"X-Real-IP": "203.0.113.7"}
+
+    response = client.get(
+        "/api/clip", query_string={"key": "audio/andrewgobble"}, headers=headers
+    )
+    assert response.status_code == 200
+    response = client.get(
+        "/api/search", query_string={"query": "andrew"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json["total_count"] == 2
+
+    # Exports hold the only search slot until every clip has been sent
+    export = client.get(
+        "/api/search",
+        query_string={"query": "andrew", "format": "ndjson"},
+        headers=headers,
+    )
+    assert export.status_code == 200
+    response = client.get(
+        "/api/search",
+        query_string={"query": "gobble"},
+        headers={"X-Real-IP": "192.0.2.1"},
+    )
+    assert response.status_code == 429
+    assert len(export.data.splitlines()) == 2
+    export.close()
+
+    # Exports take a flat cost, which leaves too few tokens for another
+    response = client.get(
+        "/api/search",
+        query_string={"query": "gobble", "format": "ndjson"},
+        headers=headers,
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    stats = app.extensions["admission_control"].stats()
+    assert stats["admitted"] == 4
+    assert stats["rate_limited"] == 1
+    assert stats["search_limited"] == 1
+    assert stats["active_searches"] == 0
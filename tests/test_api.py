@@ -0,0 +1,94 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing API Module and Views."""
+
+import json
+
+import pytest
+from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
+
+
+@pytest.mark.parametrize("query, mode", [("andrew", 1), ("luke", 2)])
+def test_search(client: FlaskClient, query: str, mode: int) -> None:
+    """Testing api.search."""
+    response: TestResponse = client.get(
+        "/api/search", query_string={"query": query, "mode": mode}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert response.json["mode"] == mode
+    assert response.json["page"] == 1
+    assert response.json["returned_count"] == len(response.json["results"])
+    assert "seek_start" not in response.json
+    for clip in response.json["results"]:
+        assert "key" in clip
+        assert "key_slug" in clip
+
+
+def test_search_missing_query(client: FlaskClient) -> None:
+    """Testing api.search without a search query."""
+    response: TestResponse = client.get("/api/search")
+    assert response.status_code == 400
+    assert response.json["error"] == "MissingQuery"
+
+
+@pytest.mark.parametrize("query", ["andrew", "gobble"])
+def test_search_ndjson(client: FlaskClient, query: str) -> None:
+    """Testing api.search with NDJSON streaming."""
+    response: TestResponse = client.get(
+        "/api/search", query_string={"query": query, "format": "ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    clips: list[dict] = [json.loads(line) for line in response.text.splitlines()]
+    total_count: int = client.get("/api/search", query_string={"query": query}).json[
+        "total_count"
+    ]
+    assert len(clips) == total_count
+    assert len({clip["id"] for clip in clips}) == total_count
+
+
+@pytest.mark.parametrize(
+    "clip_key",
+    ["audio/lukeandrewheygorgle-3171", "audio/chrishayesmentionstbtlallinsegment"],
+)
+def test_clip(client: FlaskClient, clip_key: str) -> None:
+    """Testing api.clip."""
+    response: TestResponse = client.get("/api/clip", query_string={"key": clip_key})
+    assert response.status_code == 200
+    assert response.json["key"] == clip_key
+
+
+@pytest.mark.parametrize(
+    "clip_key, status_code, error",
+    [
+        ("", 400, "MissingClipKey"),
+        ("THIS_WONT_RETURN_RESULTS", 404, "ClipNotFound"),
+    ],
+)
+def test_clip_not_found(
+    client: FlaskClient, clip_key: str, status_code: int, error: str
+) -> None:
+    """Testing api.clip with missing or unknown clip keys."""
+    response: TestResponse = client.get("/api/clip", query_string={"key": clip_key})
+    assert response.status_code == status_code
+    assert response.json == {"error": error}
+
+
+@pytest.mark.parametrize("prefix", ["and", "gob"])
+def test_suggest(client: FlaskClient, prefix: str) -> None:
+    """Testing api.suggest."""
+    response: TestResponse = client.get("/api/suggest", query_string={"prefix": prefix})
+    if not client.application.config["app_settings"]["enable_suggestions"]:
+        assert response.status_code == 404
+        return
+
+    assert response.status_code == 200
+    assert response.json["prefix"] == prefix
+    for suggestion in response.json["suggestions"]:
+        assert suggestion.casefold().startswith(prefix)
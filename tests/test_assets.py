@@ -0,0 +1,92 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Fingerprinted Static Asset Module."""
+
+import gzip
+from pathlib import Path
+
+import brotli
+from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
+
+from app.assets.pipeline import AssetManifest, build_assets
+from app.assets.routes import asset_url_for
+
+
+def _static_folder(static_folder: Path) -> None:
+    (static_folder / "css").mkdir(parents=True)
+    (static_folder / "fonts").mkdir()
+    (static_folder / "fonts" / "plex.woff2").write_bytes(b"font")
+    (static_folder / "css" / "app.css").write_text(
+        "@font-face { src: url('../fonts/plex.woff2') format('woff2'); }\n"
+        "body { background: url(data:image/png;base64,AAAA); }\n" * 20
+    )
+
+
+def test_build_assets(tmp_path: Path) -> None:
+    """Testing assets.pipeline.build_assets."""
+    static_folder = tmp_path / "static"
+    _static_folder(static_folder)
+    output_path = static_folder / "dist"
+
+    manifest = build_assets(static_folder, output_path)
+    assert set(manifest) == {"css/app.css", "fonts/plex.woff2"}
+    assert manifest["fonts/plex.woff2"]["encodings"] == []
+    assert manifest["css/app.css"]["encodings"] == ["br", "gzip"]
+
+    font_path = manifest["fonts/plex.woff2"]["path"]
+    css_path = output_path / manifest["css/app.css"]["path"]
+    css = css_path.read_text()
+    assert f"url('../fonts/{Path(font_path).name}')" in css
+    assert "url(data:image/png;base64,AAAA)" in css
+    assert gzip.decompress(Path(f"{css_path}.gz").read_bytes()) == css.encode()
+    assert brotli.decompress(Path(f"{css_path}.br").read_bytes()) == css.encode()
+
+    # Rebuilding unchanged files does not change their file names, and
+    # the output directory is not fingerprinted again
+    assert build_assets(static_folder, output_path) == manifest
+
+    # Changing a font changes the file name of the stylesheet using it
+    (static_folder / "fonts" / "plex.woff2").write_bytes(b"new font")
+    assert (
+        build_assets(static_folder, output_path)["css/app.css"]
+        != (manifest["css/app.css"])
+    )
+    assert css_path.exists()
+
+
+def test_asset_routes(client: FlaskClient, tmp_path: Path) -> None:
+    """Testing assets.routes.asset and assets.routes.asset_url_for."""
+    static_folder = tmp_path / "static"
+    _static_folder(static_folder)
+    build_assets(static_folder, static_folder / "dist")
+
+    app = client.application
+    app.extensions["asset_manifest"] = AssetManifest.load(static_folder / "dist")
+    with app.test_request_context():
+        css_url = asset_url_for("static", filename="css/app.css")
+        assert css_url.startswith("/assets/css/app.")
+        assert asset_url_for("static", filename="js/tooltip.js") == (
+            "/static/js/tooltip.js"
+        )
+        assert asset_url_for("main.index") == "/"
+
+    response: TestResponse = client.get(css_url)
+    assert response.status_code == 200
+    assert response.mimetype == "text/css"
+    assert "Content-Encoding" not in response.headers
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    response = client.get(css_url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"@font-face" in gzip.decompress(response.data)
+
+    response = client.get(css_url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert b"@font-face" in brotli.decompress(response.data)
+
+    assert client.get("/assets/css/app.css").status_code == 404
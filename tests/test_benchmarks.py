@@ -0,0 +1,118 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Benchmark Suite Corpus Generator, Clip Record Comparison and Load Test."""
+
+from benchmarks.corpus import benchmark_queries, generate_rows
+from benchmarks.load import (
+    anonymized_request,
+    map_clip_keys,
+    replay,
+    request_group,
+    summarize,
+)
+from benchmarks.records import compare_records
+
+
+def test_generate_rows_deterministic() -> None:
+    """Testing benchmarks.corpus.generate_rows with the same seed."""
+    assert list(generate_rows(200, seed=7)) == list(generate_rows(200, seed=7))
+    assert list(generate_rows(200, seed=7)) != list(generate_rows(200, seed=8))
+
+
+def test_generate_rows() -> None:
+    """Testing benchmarks.corpus.generate_rows."""
+    rows = list(generate_rows(500))
+    assert [row["id"] for row in rows] == list(range(1, 501))
+    assert len({row["key"] for row in rows}) == 500
+    for row in rows:
+        assert row["title"]
+        assert row["artist"]
+        assert len(row["key"]) <= 255
+
+
+def test_benchmark_queries() -> None:
+    """Testing benchmarks.corpus.benchmark_queries."""
+    queries = benchmark_queries()
+    assert sorted(queries) == [1, 2, 3]
+    assert queries == benchmark_queries()
+
+
+def test_compare_records() -> None:
+    """Testing benchmarks.records.compare_records."""
+    results = compare_records(rows=24, iterations=5, seed=1)
+    assert sorted(results) == ["dictionary", "record"]
+    assert results["record"]["retained_bytes"] < results["dictionary"]["retained_bytes"]
+
+
+def test_anonymized_request() -> None:
+    """Testing benchmarks.load.anonymized_request."""
+    line = (
+        '203.0.113.7 - - [18/Oct/2026:10:00:00 +0000] "GET /search?query=hey+gurgle'
+        '&mode=2&page=3&cursor=abc&utm=x HTTP/1.1" 200 5120 "https://example.com/" '
+        '"Mozilla/5.0"'
+    )
+    assert anonymized_request(line) == "/search?query=hey+gurgle&mode=2&page=3"
+    assert (
+        anonymized_request(
+            '203.0.113.7 - - [18/Oct/2026:10:00:00 +0000] "GET /clip/?key=audio/a '
+            'HTTP/1.1" 200 100 "-" "-"'
+        )
+        == "/clip?key=audio%2Fa"
+    )
+    assert anonymized_request("/search?query=andrew") == "/search?query=andrew"
+    assert not anonymized_request('1.2.3.4 - - [x] "GET /about HTTP/1.1" 200 1 "-" "-"')
+    assert not anonymized_request(
+        '1.2.3.4 - - [x] "POST /search?query=a HTTP/1.1" 200 1 "-" "-"'
+    )
+    assert not anonymized_request("not an access log line")
+
+
+def test_map_clip_keys() -> None:
+    """Testing benchmarks.load.map_clip_keys."""
+    requests = ["/clip?key=a", "/clip?key=b", "/clip?key=a", "/search?query=a", "/clip"]
+    mapped = map_clip_keys(requests, ["audio/x", "audio/y", "audio/z"])
+    assert mapped[0] == mapped[2]
+    assert mapped[0].startswith("/clip?key=audio%2F")
+    assert mapped[3:] == requests[3:]
+    assert map_clip_keys(requests, []) == requests
+
+
+def test_request_group() -> None:
+    """Testing benchmarks.load.request_group."""
+    assert request_group("/clip?key=a") == "/clip"
+    assert request_group("/search?query=a") == "/search[natural]"
+    assert request_group("/search?query=a&mode=2") == "/search[boolean]"
+    assert request_group("/search?query=a&mode=3") == "/search[expanded]"
+    assert (
+        request_group("/search?query=a&mode=3", enable_query_expansion_mode=False)
+        == "/search[natural]"
+    )
+    assert request_group("/search") == "/search[empty]"
+
+
+def test_replay_summary() -> None:
+    """Testing benchmarks.load.replay and benchmarks.load.summarize."""
+    requests = ["/search?query=a", "/search?query=a&mode=2", "/clip?key=a"] * 20
+
+    def _send(target: str) -> int:
+        if target.startswith("/clip"):
+            raise ConnectionResetError
+        return 500 if "mode=2" in target else 200
+
+    samples, duration = replay(requests, send=_send, concurrency=4, rate=1000)
+    assert len(samples) == 60
+    summary = summarize(samples, duration)
+    assert sorted(summary) == [
+        "/clip",
+        "/search[boolean]",
+        "/search[natural]",
+        "all",
+    ]
+    assert summary["all"]["requests"] == 60
+    assert summary["/search[natural]"]["error_rate"] == 0
+    assert summary["/search[boolean]"]["statuses"] == {"500": 20}
+    assert summary["/clip"]["statuses"] == {"failed": 20}
+    assert summary["all"]["p50_ms"] <= summary["all"]["p99_ms"]
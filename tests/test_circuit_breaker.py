@@ -0,0 +1,83 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Circuit Breaker Module."""
+
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+
+from flask import Flask
+
+from app.circuit_breaker import CircuitBreaker
+from app.sqlite import SQLiteConnectionPool
+
+
+def test_circuit_breaker(tmp_path: Path) -> None:
+    """Testing circuit_breaker.CircuitBreaker."""
+    database_path = tmp_path / "mg_clips.sqlite"
+    circuit_breaker = CircuitBreaker(
+        SQLiteConnectionPool(str(database_path)),
+        failure_threshold=2,
+        probe_interval=3600,
+    )
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.allow_request()
+
+    circuit_breaker.record_failure()
+    assert not circuit_breaker.allow_request()
+    assert not circuit_breaker.probe()
+    assert circuit_breaker.stats()["state"] == "open"
+
+    sqlite3.connect(database_path).close()
+    assert circuit_breaker.probe()
+    assert circuit_breaker.allow_request()
+    assert circuit_breaker.stats() == {
+        "state": "closed",
+        "opened_at": None,
+        "consecutive_failures": 0,
+        "failure_threshold": 2,
+        "opens": 1,
+        "rejected": 1,
+        "probes": 2,
+        "probe_failures": 1,
+    }
+
+
+def test_stale_results(sqlite_app: Callable[..., Flask], sqlite_path: Path) -> None:
+    """Testing stale search results while the search backend is unavailable."""
+    app = sqlite_app(
+        circuit_breaker_threshold=1,
+        circuit_breaker_probe_interval=3600,
+        enable_status=True,
+        search_cache_ttl=0,
+    )
+    client = app.test_client()
+
+    response = client.get("/api/search", query_string={"query": "andrew"})
+    assert response.json["total_count"] == 2
+    assert response.json["stale"] is False
+
+    sqlite_path.unlink()
+    for _ in range(2):
+        response = client.get("/api/search", query_string={"query": "andrew"})
+        assert response.status_code == 200
+        assert response.json["total_count"] == 2
+        assert response.json["stale"] is True
+        assert response.headers["Cache-Control"] == "no-store"
+
+    response = client.get("/search", query_string={"query": "andrew"})
+    assert b"may be out of date" in response.data
+
+    response = client.get("/api/search", query_string={"query": "gobble"})
+    assert response.status_code == 503
+
+    circuit_breaker = client.get("/status").json["circuit_breaker"]
+    assert circuit_breaker["state"] == "open"
+    assert circuit_breaker["opens"] == 1
+    assert circuit_breaker["rejected"] == 3
@@ -0,0 +1,172 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Response Compression Module."""
+
+import gzip
+import json
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import brotli
+import pytest
+from flask import Flask, Response
+from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
+
+from app import create_app
+
+_PAGE: str = "<html><body>" + "<article>Gurgle</article>" * 100 + "</body></html>"
+
+
+@pytest.fixture
+def compression_client(tmp_path: Path) -> FlaskClient:
+    """Pytest Client Fixture with Response Compression Enabled."""
+    app_settings_path = tmp_path / "app_settings.json"
+    app_settings_path.write_text(
+        json.dumps({"enable_compression": True, "compression_min_size": 512}),
+        encoding="utf-8",
+    )
+    app: Flask = create_app(app_settings_path=str(app_settings_path))
+
+    def _page() -> Response:
+        response = Response(_PAGE, mimetype="text/html")
+        response.set_etag("page")
+        return response
+
+    def _small() -> str:
+        return "<p>Gurgle</p>"
+
+    def _stream() -> Response:
+        def _lines() -> Iterator[str]:
+            for number in range(100):
+                yield f'{{"number": {number}}}\n'
+
+        return Response(_lines(), mimetype="application/x-ndjson")
+
+    app.add_url_rule("/test-page", view_func=_page)
+    app.add_url_rule("/test-small", view_func=_small)
+    app.add_url_rule("/test-stream", view_func=_stream)
+    return app.test_client()
+
+
+def test_compress_response(compression_client: FlaskClient) -> None:
+    """Testing compression.compress_response."""
+    response: TestResponse = compression_client.get("/test-page")
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.get_data(as_text=True) == _PAGE
+
+    response = compression_client.get("/test-page", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == '"page-gzip"'
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert gzip.decompress(response.data).decode("utf-8") == _PAGE
+
+    # Brotli is preferred over gzip when the client accepts both
+    response = compression_client.get(
+        "/test-page", headers={"Accept-Encoding": "gzip, deflate, br"}
+    )
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["ETag"] == '"page-br"'
+    assert brotli.decompress(response.data).decode("utf-8") == _PAGE
+
+    # Encodings with a higher quality value are preferred
+    response = compression_client.get(
+        "/test-page", headers={"Accept-Encoding": "br;q=0.5, gzip"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    # Responses smaller than the minimum size are not compressed
+    response = compression_client.get(
+        "/test-small", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    # Pre-rendered pages are already compressed
+    response = compression_client.get("/about", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"</html>" in gzip.decompress(response.data)
+
+
+def test_compress_streamed_response(compression_client: FlaskClient) -> None:
+    """Testing compression.compress_response with a streamed response."""
+    response: TestResponse = compression_client.get(
+        "/test-stream", headers={"Accept-Encoding": "gzip"}, buffered=False
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+
+    # Each line is flushed and can be decompressed as it is received
+    chunks = list(response.response)
+    assert len(chunks) == 101
+    lines = gzip.decompress(b"".join(chunks)).decode("utf-8").splitlines()
+    assert len(lines) == 100
+    assert json.loads(lines[-1]) == {"number": 99}
+    response.close()
+
+
+def test_compress_streamed_response_brotli(compression_client: FlaskClient) -> None:
+    """Testing compression.compress_response with a streamed Brotli response."""
+    response: TestResponse = compression_client.get(
+        "/test-stream", headers={"Accept-Encoding": "br"}, buffered=False
+    )
+    assert response.headers["Content-Encoding"] == "br"
+    assert "Content-Length" not in response.headers
+
+    # Each line is flushed and can be decompressed as it is received
+    chunks = list(response.response)
+    assert len(chunks) == 101
+    decompressor = brotli.Decompressor()
+    assert decompressor.process(chunks[0]) == b'{"number": 0}\n'
+    lines = (
+        (b'{"number": 0}\n' + b"".join(decompressor.process(c) for c in chunks[1:]))
+        .decode("utf-8")
+        .splitlines()
+    )
+    assert len(lines) == 100
+    assert json.loads(lines[-1]) == {"number": 99}
+    response.close()
+
+
+def test_compression_disabled(client: FlaskClient) -> None:
+    """Testing responses are not compressed by default."""
+    response: TestResponse = client.get(
+        "/robots.txt", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compress_search_results(sqlite_app: Callable[..., Flask]) -> None:
+    """Testing compressed search results with conditional requests."""
+    app = sqlite_app(enable_compression=True, compression_min_size=0)
+    client = app.test_client()
+
+    response = client.get(
+        "/search",
+        query_string={"query": "andrew"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    response = client.get(
+        "/search",
+        query_string={"query": "andrew"},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    response = client.get(
+        "/api/search",
+        query_string={"query": "andrew", "format": "ndjson"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(gzip.decompress(response.data).splitlines()) == 2
@@ -5,6 +5,9 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Testing Main Routes and Views."""
 
+import html
+import re
+
 import pytest
 from flask.testing import FlaskClient
 from werkzeug.test import TestResponse
@@ -102,6 +105,63 @@ def test_search_page_number(
     assert "noindex, nofollow" in response.text
 
 
+@pytest.mark.parametrize("query, mode", [("andrew", 1), ("luke", 2)])
+def test_search_pagination_cursor(client: FlaskClient, query: str, mode: int) -> None:
+    """Testing main.search with next and previous page cursors."""
+    response: TestResponse = client.get(
+        "/search", query_string={"query": query, "mode": mode, "page": 2}
+    )
+    assert response.status_code == 200
+    next_links = re.findall(r'href="([^"]*page=3&amp;cursor=[^"]*)"', response.text)
+    previous_links = re.findall(r'href="([^"]*page=1&amp;cursor=[^"]*)"', response.text)
+    assert next_links
+    assert previous_links
+
+    for link in (next_links[0], previous_links[0]):
+        response = client.get(html.unescape(link))
+        assert response.status_code == 200
+        assert "article" in response.text
+        assert "Clip Info" in response.text
+
+
+def test_search_invalid_cursor(client: FlaskClient) -> None:
+    """Testing main.search with an invalid page cursor."""
+    response: TestResponse = client.get(
+        "/search",
+        query_string={"query": "andrew", "mode": 1, "page": 2, "cursor": "invalid"},
+    )
+    assert response.status_code == 200
+    assert "article" in response.text
+
+
+@pytest.mark.parametrize(
+    "path, query_string",
+    [
+        ("/search", {"query": "andrew", "mode": 1}),
+        ("/clip", {"key": "audio/lukeandrewheygorgle-3171"}),
+    ],
+)
+def test_conditional_get(client: FlaskClient, path: str, query_string: dict) -> None:
+    """Testing conditional GET requests for main.search and main.clip_info."""
+    response: TestResponse = client.get(path, query_string=query_string)
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+    assert "Surrogate-Key" in response.headers
+    assert "public" in response.headers["Cache-Control"]
+
+    repeat_response: TestResponse = client.get(path, query_string=query_string)
+    assert repeat_response.data == response.data
+
+    not_modified: TestResponse = client.get(
+        path,
+        query_string=query_string,
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert not_modified.status_code == 304
+    assert not not_modified.data
+
+
 def test_search_no_query(client: FlaskClient) -> None:
     """Testing main.search without a search query."""
     response: TestResponse = client.get("/search")
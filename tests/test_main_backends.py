@@ -0,0 +1,171 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Search Backend Module."""
+
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from flask import Flask
+
+from app.main.backends import SearchBackend, SQLiteBackend, fts5_query
+from app.main.memory_index import SearchIndex, search_index
+from app.main.search import SearchMode, SeekPosition
+from app.sqlite import SQLiteConnection
+from app.utilities import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize(
+    "query, mode, expected",
+    [
+        ("luke the andrew", 1, '"luke" OR "andrew"'),
+        ("a an", 1, None),
+        ("+luke -tbtl", 2, '("luke") NOT ("tbtl")'),
+        ("luke andrew", 2, '"luke" OR "andrew"'),
+        ('+"year 2525" gürgle', 2, '"year 2525"'),
+        ("gor*", 2, '"gor"*'),
+        ('say "hey', 2, '"say" OR "hey"'),
+    ],
+)
+def test_fts5_query(query: str, mode: int, expected: str | None) -> None:
+    """Testing main.backends.fts5_query."""
+    assert fts5_query(query, SearchMode(mode)) == expected
+
+
+def test_search_backend_incomplete() -> None:
+    """Testing main.backends.SearchBackend without every method implemented."""
+
+    class IncompleteBackend(SearchBackend):
+        def search(self, *args: Any, **kwargs: Any) -> None:
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+@pytest.mark.parametrize(
+    "query, mode",
+    [("andrew", 1), ("gürgle", 1), ("+andrew -luke", 2), ("gob*", 2), ("tbtl", 2)],
+)
+def test_sqlite_backend_search(
+    sqlite_path: Path, sqlite_rows: list[dict], query: str, mode: int
+) -> None:
+    """Testing main.backends.SQLiteBackend.search against the search index."""
+    connection = SQLiteConnection(str(sqlite_path))
+    backend = SQLiteBackend(connection_factory=lambda: connection)
+    results = backend.search(query, SearchMode(mode), 10, 0)
+    expected = search_index(
+        SearchIndex.from_rows(sqlite_rows), query, SearchMode(mode), 10, 0
+    )
+
+    assert {clip.id for clip in results["results"]} == {
+        clip.id for clip in expected["results"]
+    }
+    assert results["total_count"] == expected["total_count"]
+    assert backend.count(query, SearchMode(mode)) == expected["total_count"]
+    assert [clip.id for clip in backend.stream(query, SearchMode(mode))] == [
+        clip.id for clip in results["results"]
+    ]
+
+
+def test_sqlite_backend_seek(sqlite_path: Path) -> None:
+    """Testing main.backends.SQLiteBackend.search with a seek position."""
+    connection = SQLiteConnection(str(sqlite_path))
+    backend = SQLiteBackend(connection_factory=lambda: connection)
+    first_page = backend.search("tbtl", SearchMode.NATURAL, 1, 0)
+    second_page = backend.search("tbtl", SearchMode.NATURAL, 1, 1)
+    score, clip_id = first_page["seek_end"]
+    seek_page = backend.search(
+        "tbtl",
+        SearchMode.NATURAL,
+        1,
+        0,
+        seek=SeekPosition(score=score, clip_id=clip_id, total_count=2),
+    )
+
+    assert seek_page["results"] == second_page["results"]
+
+
+def test_sqlite_backend_lookup(sqlite_path: Path) -> None:
+    """Testing main.backends.SQLiteBackend.lookup."""
+    connection = SQLiteConnection(str(sqlite_path))
+    backend = SQLiteBackend(connection_factory=lambda: connection)
+
+    clip = backend.lookup("audio/andrewgobble")
+    assert clip.title == "Andrew Gobble Gobble"
+    assert clip.m4r_path == "audio/andrewgobble.m4r"
+    assert backend.lookup("audio/missing") is None
+
+
+def test_sqlite_backend_app(sqlite_app: Callable[..., Flask]) -> None:
+    """Testing the application with the SQLite search backend."""
+    app = sqlite_app()
+    client = app.test_client()
+
+    response = client.get("/api/search", query_string={"query": "andrew"})
+    assert response.status_code == 200
+    assert response.json["total_count"] == 2
+
+    response = client.get(
+        "/api/search", query_string={"query": "andrew", "format": "ndjson"}
+    )
+    assert len(response.data.splitlines()) == 2
+    assert response.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in response.headers
+
+    response = client.get(
+        "/api/clip", query_string={"key": "audio/lukeandrewheygorgle"}
+    )
+    assert response.status_code == 200
+    assert response.json["artist"] == "Luke Burbank"
+    assert response.headers["Surrogate-Key"] == (
+        "clips api api-clip api-clip-audio-lukeandrewheygorgle"
+    )
+
+    response = client.get("/clip", query_string={"key": "audio/lukeandrewheygorgle"})
+    assert response.headers["Surrogate-Key"] == (
+        "clips clip clip-audio-lukeandrewheygorgle"
+    )
+
+    response = client.get("/search", query_string={"query": "gürgle"})
+    assert response.status_code == 200
+    assert b"Year 2525" in response.data
+
+
+def test_sqlite_backend_forged_cursor(sqlite_app: Callable[..., Flask]) -> None:
+    """Testing search result pages requested with a modified page cursor."""
+    app = sqlite_app(results_per_page=1, search_cache_size=512)
+    client = app.test_client()
+
+    response = client.get("/search", query_string={"query": "andrew"})
+    cursor = re.search(r"cursor=([^\"&]+)", response.text).group(1)
+    first_title, second_title = (
+        ("Andrew Gobble Gobble", "Luke and Andrew Say Hey Gorgle")
+        if "Andrew Gobble Gobble" in response.text
+        else ("Luke and Andrew Say Hey Gorgle", "Andrew Gobble Gobble")
+    )
+
+    # Cursors that are not signed by the application are ignored
+    data = decode_cursor(cursor, app.secret_key)
+    assert data is not None
+    forged_data = {**data, "s": 1e9, "t": 99999}
+    assert (
+        decode_cursor(encode_cursor(forged_data, "other key"), app.secret_key) is None
+    )
+
+    # Signed cursors do not set the total count or the cached offset page
+    forged_cursor = encode_cursor(forged_data, app.secret_key)
+    response = client.get(
+        "/search", query_string={"query": "andrew", "page": 2, "cursor": forged_cursor}
+    )
+    assert first_title in response.text
+    assert "page=3" not in response.text
+
+    response = client.get("/search", query_string={"query": "andrew", "page": 2})
+    assert second_title in response.text
+    assert first_title not in response.text
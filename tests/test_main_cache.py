@@ -0,0 +1,79 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Search Result Cache Module."""
+
+import pytest
+
+from app.main.cache import SearchCache, normalize_query
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("Hey  Gorgle", "hey gorgle"), (" Luke\tAndrew ", "luke andrew")],
+)
+def test_normalize_query(query: str, expected: str) -> None:
+    """Testing main.cache.normalize_query."""
+    assert normalize_query(query) == expected
+
+
+def test_search_cache_lru() -> None:
+    """Testing main.cache.SearchCache eviction."""
+    cache = SearchCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_search_cache_ttl() -> None:
+    """Testing main.cache.SearchCache expiration."""
+    cache = SearchCache(ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_search_cache_data_version() -> None:
+    """Testing main.cache.SearchCache data version invalidation."""
+    cache = SearchCache()
+    cache.validate((10, 10, 10))
+    cache.set("a", 1)
+    cache.validate((10, 10, 10))
+    cache.validate(None)
+    assert cache.get("a") == 1
+
+    cache.validate((11, 11, 11))
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["data_version"] == [11, 11, 11]
+
+
+def test_search_cache_stale() -> None:
+    """Testing main.cache.SearchCache.get_stale."""
+    cache = SearchCache(ttl=-1)
+    cache.validate((10, 10, 10))
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == 1
+
+    cache = SearchCache()
+    cache.validate((10, 10, 10))
+    cache.set("a", 1)
+    cache.validate((11, 11, 11))
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == 1
+    assert cache.get_stale("b") is None
+    assert cache.stats()["stale_hits"] == 1
+
+    cache.set("a", 2)
+    assert cache.get("a") == 2
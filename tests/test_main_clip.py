@@ -0,0 +1,75 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Clip Module."""
+
+from app.main.clip import Clip, slugify_key
+from app.main.search import build_clip
+
+_ROW: tuple = (
+    10,
+    "audio/lukeandrewheygorgle-3171",
+    1,
+    0,
+    1,
+    "Luke Burbank",
+    "TBTL Drops",
+    "Luke and Andrew Say Hey Gorgle",
+    2024,
+    12.5,
+)
+
+
+def test_clip_from_row() -> None:
+    """Testing main.clip.Clip.from_row."""
+    clip = Clip.from_row(_ROW)
+
+    assert clip.id == 10
+    assert clip.title == "Luke and Andrew Say Hey Gorgle"
+    assert clip.mp3_path == "audio/lukeandrewheygorgle-3171.mp3"
+    assert clip.m4a_path is None
+    assert clip.m4r_path == "audio/lukeandrewheygorgle-3171.m4r"
+    assert not hasattr(clip, "__dict__")
+
+
+def test_clip_key_slug() -> None:
+    """Testing main.clip.Clip.key_slug."""
+    clip = Clip.from_row(_ROW)
+    assert clip.key_slug == "audio-lukeandrewheygorgle-3171"
+    assert clip.key_slug is clip.key_slug
+
+    clip = Clip(*_ROW[:9], key_slug="precomputed")
+    assert clip.key_slug == "precomputed"
+
+
+def test_clip_as_dict() -> None:
+    """Testing main.clip.Clip.as_dict against main.search.build_clip."""
+    columns = ("id", "key", "mp3", "m4a", "m4r", "artist", "album", "title", "year")
+    clip = build_clip(dict(zip(columns, _ROW, strict=False)))
+
+    assert clip == Clip.from_row(_ROW)
+    assert clip.as_dict() == {
+        "id": 10,
+        "key": "audio/lukeandrewheygorgle-3171",
+        "key_slug": "audio-lukeandrewheygorgle-3171",
+        "mp3_path": "audio/lukeandrewheygorgle-3171.mp3",
+        "m4a_path": None,
+        "m4r_path": "audio/lukeandrewheygorgle-3171.m4r",
+        "artist": "Luke Burbank",
+        "album": "TBTL Drops",
+        "title": "Luke and Andrew Say Hey Gorgle",
+        "year": 2024,
+    }
+
+
+def test_slugify_key() -> None:
+    """Testing main.clip.slugify_key."""
+    key = "audio/Gürgle In The Year 2525"
+    slugify_key.cache_clear()
+    assert slugify_key(key) == "audio-gurgle-in-the-year-2525"
+    assert slugify_key(key) == "audio-gurgle-in-the-year-2525"
+    assert slugify_key.cache_info().hits == 1
+
+    assert Clip.from_row(_ROW).key_slug == slugify_key(_ROW[1])
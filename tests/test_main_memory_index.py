@@ -0,0 +1,148 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Memory-Resident Search Index Module."""
+
+import pytest
+from flask.testing import FlaskClient
+
+from app.database import get_connection
+from app.main.memory_index import SearchIndex, retrieve_index_rows, search_index
+from app.main.search import SearchMode, SearchStrategy, search_clips
+
+_ROWS: list[dict] = [
+    {
+        "id": 1,
+        "key": "audio/lukeandrewheygorgle",
+        "mp3": 1,
+        "m4a": 1,
+        "m4r": 0,
+        "title": "Luke and Andrew Say Hey Gorgle",
+        "album": "TBTL Drops",
+        "artist": "Luke Burbank",
+        "year": 2024,
+    },
+    {
+        "id": 2,
+        "key": "audio/intheyear2525",
+        "mp3": 1,
+        "m4a": 0,
+        "m4r": 0,
+        "title": "In the Year 2525",
+        "album": "Songs",
+        "artist": "Zager and Evans",
+        "year": 1969,
+    },
+    {
+        "id": 3,
+        "key": "audio/andrewgobble",
+        "mp3": 1,
+        "m4a": 1,
+        "m4r": 1,
+        "title": "Andrew Gobble Gobble",
+        "album": "TBTL Drops",
+        "artist": "Andrew Walsh",
+        "year": 2023,
+    },
+]
+
+# Query corpus used to compare the search index against MySQL
+_PARITY_QUERIES: list[tuple[str, int]] = [
+    ("andrew", 1),
+    ("luke", 1),
+    ("gobble", 1),
+    ("hey gorgle", 1),
+    ("luke", 2),
+    ("+luke -andrew", 2),
+    ("gorg*", 2),
+    ('"in the year 2525"', 2),
+    ("+andrew +walsh", 2),
+]
+
+
+@pytest.mark.parametrize(
+    "query, mode, expected_ids",
+    [
+        ("andrew", 1, [3, 1]),
+        ("the", 1, []),
+        ("gobble", 1, [3]),
+        ("+andrew -gobble", 2, [1]),
+        ("+tbtl +drops", 2, [1, 3]),
+        ("gorg*", 2, [1]),
+        ('"year 2525"', 2, [2]),
+        ('"2525 year"', 2, []),
+        ('"drops luke"', 2, []),
+    ],
+)
+def test_search_index(query: str, mode: int, expected_ids: list[int]) -> None:
+    """Testing main.memory_index.search_index."""
+    index = SearchIndex.from_rows(_ROWS)
+    results = search_index(
+        index,
+        search_query=query,
+        search_mode=SearchMode(mode),
+        results_per_page=10,
+        offset=0,
+    )
+
+    assert results["total_count"] == len(expected_ids)
+    assert sorted(clip.id for clip in results["results"]) == sorted(expected_ids)
+    if mode == 1 and expected_ids:
+        assert [clip.id for clip in results["results"]] == expected_ids
+
+
+def test_search_index_pagination() -> None:
+    """Testing main.memory_index.search_index with an offset."""
+    index = SearchIndex.from_rows(_ROWS)
+    results = search_index(
+        index,
+        search_query="tbtl",
+        search_mode=SearchMode.NATURAL,
+        results_per_page=1,
+        offset=1,
+    )
+
+    assert results["total_count"] == 2
+    assert results["returned_count"] == 1
+    assert set(results["results"][0].as_dict()) == {
+        "id",
+        "key",
+        "key_slug",
+        "mp3_path",
+        "m4a_path",
+        "m4r_path",
+        "artist",
+        "album",
+        "title",
+        "year",
+    }
+
+
+@pytest.mark.parametrize("query, mode", _PARITY_QUERIES)
+def test_search_index_parity(client: FlaskClient, query: str, mode: int) -> None:
+    """Testing main.memory_index.search_index against MySQL full-text search."""
+    with client.application.app_context():
+        index = SearchIndex.from_rows(retrieve_index_rows(get_connection()))
+        database_results = search_clips(
+            search_query=query,
+            search_mode=SearchMode(mode),
+            results_per_page=100000,
+            offset=0,
+            database_connection=get_connection(),
+            search_strategy=SearchStrategy.WINDOW,
+        )
+
+    index_results = search_index(
+        index,
+        search_query=query,
+        search_mode=SearchMode(mode),
+        results_per_page=100000,
+        offset=0,
+    )
+
+    assert index_results["total_count"] == database_results["total_count"]
+    assert {clip.id for clip in index_results["results"]} == {
+        clip.id for clip in database_results["results"]
+    }
@@ -0,0 +1,171 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Related Clips Module."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app import create_app
+from app.main.related import (
+    FeatureMatrix,
+    RelatedClips,
+    build_related_clips,
+    clip_features,
+    compute_neighbours,
+    read_related_clips,
+)
+from app.sqlite import SQLITE_SCHEMA, SQLiteConnection
+
+_TAGS: list[tuple[str, str, str]] = [
+    ("Luke Says Gurgle", "TBTL Drops", "Luke Burbank"),
+    ("Luke Says Gurgle Again", "TBTL Drops", "Luke Burbank"),
+    ("Andrew Gobble Gobble", "TBTL Drops", "Andrew Walsh"),
+    ("Andrew Gobbles Twice", "Gobble Songs", "Andrew Walsh"),
+    ("Gürgle in the Year 2525", "Songs", "Zager and Evans"),
+    ("Gurgle in the Year 2526", "Songs", "Zager and Evans"),
+]
+
+
+def _related_database(database_path: Path, tags: list[tuple[str, str, str]]) -> None:
+    """Create or add clips to a SQLite database used for related clips."""
+    database = sqlite3.connect(database_path)
+    if not database.execute("SELECT name FROM sqlite_master").fetchall():
+        database.executescript(SQLITE_SCHEMA)
+    start = database.execute("SELECT COUNT(*) FROM clips").fetchone()[0] + 1
+    for clip_id, (title, album, artist) in enumerate(tags, start=start):
+        database.execute(
+            "INSERT INTO clips (id, key, mp3, m4a, m4r) VALUES (?, ?, 1, 0, 0)",
+            (clip_id, f"audio/clip{clip_id}"),
+        )
+        database.execute(
+            "INSERT INTO tags (id, clip_id, title, album, artist) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (clip_id, clip_id, title, album, artist),
+        )
+    database.commit()
+    database.close()
+
+
+def test_compute_neighbours() -> None:
+    """Testing main.related.compute_neighbours against dense cosine similarity."""
+    rows = [
+        {"title": title, "album": album, "artist": artist}
+        for title, album, artist in _TAGS * 3
+    ]
+    matrix = FeatureMatrix([clip_features(row) for row in rows])
+    dense = np.zeros((matrix.row_count, len(matrix.column_indptr) - 1))
+    for row in range(matrix.row_count):
+        for position in range(matrix.indptr[row], matrix.indptr[row + 1]):
+            dense[row, matrix.indices[position]] = matrix.data[position]
+    similarities = dense @ dense.T
+    np.fill_diagonal(similarities, 0)
+
+    neighbours, scores, _, _ = compute_neighbours(
+        matrix, np.arange(matrix.row_count), count=4, batch_size=5
+    )
+    expected = -np.sort(-similarities, axis=1)[:, :4]
+    assert np.allclose(scores, expected, atol=1e-6)
+    assert np.allclose(
+        np.where(
+            neighbours >= 0,
+            np.take_along_axis(similarities, np.maximum(neighbours, 0), axis=1),
+            0,
+        ),
+        expected,
+        atol=1e-6,
+    )
+
+
+def test_build_related_clips(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Testing main.related.build_related_clips and main.related.RelatedClips."""
+    database_path = tmp_path / "mg_clips.sqlite"
+    related_path = tmp_path / "related.npz"
+    _related_database(database_path, _TAGS)
+
+    metadata = build_related_clips(
+        SQLiteConnection(str(database_path)), related_path, neighbours=3
+    )
+    assert metadata["clips"] == 6
+    assert not metadata["incremental"]
+
+    related_clips = RelatedClips(str(related_path), limit=2)
+    assert related_clips.load()
+    related = related_clips.related("audio/clip1")
+    assert [clip["key"] for clip in related] == ["audio/clip2", "audio/clip3"]
+    assert related[0]["title"] == "Luke Says Gurgle Again"
+    assert related[0]["score"] > related[1]["score"]
+    assert related_clips.related("audio/clip5")[0]["key"] == "audio/clip6"
+    assert related_clips.related("audio/missing") == []
+    assert related_clips.stats()["hits"] == 2
+
+    # Adding a clip only computes neighbours for the new clip and merges
+    # it into the neighbours of existing clips
+    monkeypatch.setattr("app.main.related.INCREMENTAL_MAX_FRACTION", 0.5)
+    _related_database(
+        database_path, [("Luke Says Gurgle Once More", "TBTL Drops", "Luke Burbank")]
+    )
+    metadata = build_related_clips(
+        SQLiteConnection(str(database_path)), related_path, neighbours=3
+    )
+    assert metadata["incremental"]
+    assert metadata["added"] == 1
+    arrays = read_related_clips(related_path)
+    assert arrays["neighbours"].shape == (7, 3)
+    assert 6 in arrays["neighbours"][0].tolist()
+    assert arrays["neighbours"][6].tolist()[:2] == [0, 1]
+
+    # Changing the tags of a clip rebuilds every clip
+    database = sqlite3.connect(database_path)
+    database.execute("UPDATE tags SET title = 'Renamed' WHERE clip_id = 1")
+    database.commit()
+    database.close()
+    metadata = build_related_clips(
+        SQLiteConnection(str(database_path)), related_path, neighbours=3
+    )
+    assert not metadata["incremental"]
+
+
+def test_related_clips_page(tmp_path: Path) -> None:
+    """Testing the related clips panel on the clip information page."""
+    database_path = tmp_path / "mg_clips.sqlite"
+    related_path = tmp_path / "related.npz"
+    _related_database(database_path, _TAGS)
+    build_related_clips(SQLiteConnection(str(database_path)), related_path)
+
+    app_settings_path = tmp_path / "app_settings.json"
+    app_settings_path.write_text(
+        json.dumps(
+            {
+                "enable_status": True,
+                "related_clips_count": 3,
+                "related_clips_path": str(related_path),
+            }
+        ),
+        encoding="utf-8",
+    )
+    database_settings_path = tmp_path / "database_settings.json"
+    database_settings_path.write_text(
+        json.dumps({"backend": "sqlite", "sqlite_path": str(database_path)}),
+        encoding="utf-8",
+    )
+    client = create_app(
+        app_settings_path=str(app_settings_path),
+        database_settings_path=str(database_settings_path),
+    ).test_client()
+
+    response = client.get("/clip", query_string={"key": "audio/clip3"})
+    assert response.status_code == 200
+    assert b"More Like This" in response.data
+    assert b"Andrew Gobbles Twice" in response.data
+    assert response.data.count(b"list-group-item-action") == 3
+
+    related_clips = client.get("/status").json["related_clips"]
+    assert related_clips["clips"] == 6
+    assert related_clips["hits"] == 1
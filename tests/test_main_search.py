@@ -0,0 +1,43 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Search Module."""
+
+import pytest
+from flask.testing import FlaskClient
+
+from app.database import get_connection
+from app.main.search import SearchMode, SearchStrategy, search_clips
+
+
+@pytest.mark.parametrize(
+    "query, mode, offset",
+    [("andrew", 1, 0), ("andrew", 1, 24), ("luke", 2, 0), ("gobble", 3, 0)],
+)
+def test_search_clips_strategies(
+    client: FlaskClient, query: str, mode: int, offset: int
+) -> None:
+    """Testing main.search.search_clips with each search strategy."""
+    with client.application.app_context():
+        window = search_clips(
+            search_query=query,
+            search_mode=SearchMode(mode),
+            results_per_page=12,
+            offset=offset,
+            database_connection=get_connection(),
+            search_strategy=SearchStrategy.WINDOW,
+        )
+        two_query = search_clips(
+            search_query=query,
+            search_mode=SearchMode(mode),
+            results_per_page=12,
+            offset=offset,
+            database_connection=get_connection(),
+            search_strategy=SearchStrategy.TWO_QUERY,
+        )
+
+    assert "error" not in window
+    assert window["total_count"] == two_query["total_count"]
+    assert window["returned_count"] == two_query["returned_count"]
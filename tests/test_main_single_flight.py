@@ -0,0 +1,92 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Request Coalescing Module."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from mysql.connector.errors import DatabaseError, OperationalError
+
+from app.main.single_flight import SingleFlight
+
+
+def _wait_for(single_flight: SingleFlight, stat: str, count: int) -> None:
+    """Wait until a statistic reaches a count."""
+    for _ in range(1000):
+        if single_flight.stats()[stat] >= count:
+            return
+        threading.Event().wait(0.005)
+    pytest.fail(f"{stat} did not reach {count}")
+
+
+def test_single_flight_coalesced() -> None:
+    """Testing main.single_flight.SingleFlight.do with concurrent calls."""
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls: list[int] = []
+
+    def _search() -> dict:
+        calls.append(1)
+        release.wait(5)
+        return {"total_count": 1}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight.do, "key", _search)]
+        _wait_for(single_flight, "in_flight", 1)
+        futures += [executor.submit(single_flight.do, "key", _search) for _ in range(3)]
+        _wait_for(single_flight, "waiting", 3)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats()["executions"] == 1
+    assert single_flight.stats()["coalesced"] == 3
+    assert single_flight.stats()["in_flight"] == 0
+
+    assert single_flight.do("key", _search) == {"total_count": 1}
+    assert len(calls) == 2
+
+
+def test_single_flight_error() -> None:
+    """Testing main.single_flight.SingleFlight.do error propagation."""
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def _search() -> None:
+        release.wait(5)
+        raise DatabaseError(msg="Lost connection")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", _search)
+        _wait_for(single_flight, "in_flight", 1)
+        follower = executor.submit(single_flight.do, "key", _search)
+        _wait_for(single_flight, "waiting", 1)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(DatabaseError):
+                future.result()
+
+    assert single_flight.stats()["errors"] == 1
+    assert single_flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_timeout() -> None:
+    """Testing main.single_flight.SingleFlight.do timeout."""
+    single_flight = SingleFlight(timeout=0.01)
+    release = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", lambda: release.wait(5))
+        _wait_for(single_flight, "in_flight", 1)
+        with pytest.raises(OperationalError):
+            single_flight.do("key", lambda: False)
+        release.set()
+        assert leader.result() is True
+
+    assert single_flight.stats()["timeouts"] == 1
@@ -0,0 +1,74 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Search Index Snapshot Module."""
+
+from pathlib import Path
+
+import pytest
+
+from app.main.memory_index import MemorySearchEngine, SearchIndex, search_index
+from app.main.search import SearchMode
+from app.main.snapshot import MappedSearchIndex, write_snapshot
+
+_ROWS: list[dict] = [
+    {
+        "id": 10,
+        "key": "audio/lukeandrewheygorgle",
+        "mp3": 1,
+        "m4a": 0,
+        "m4r": 1,
+        "title": "Luke and Andrew Say Hey Gorgle",
+        "album": "TBTL Drops",
+        "artist": "Luke Burbank",
+        "year": 2024,
+    },
+    {
+        "id": 20,
+        "key": "audio/gürgleintheyear2525",
+        "mp3": 1,
+        "m4a": 1,
+        "m4r": 0,
+        "title": "Gürgle in the Year 2525",
+        "album": None,
+        "artist": "Zager and Evans",
+        "year": None,
+    },
+]
+
+
+@pytest.mark.parametrize(
+    "query, mode",
+    [("luke", 1), ("gürgle", 1), ("gor*", 2), ('"year 2525"', 2), ("+luke -tbtl", 2)],
+)
+def test_mapped_search_index(tmp_path: Path, query: str, mode: int) -> None:
+    """Testing main.snapshot.MappedSearchIndex against SearchIndex."""
+    index = SearchIndex.from_rows(_ROWS)
+    snapshot_path = tmp_path / "search_index.snapshot"
+    write_snapshot(snapshot_path, index, data_version=(20, 2, 2))
+    snapshot = MappedSearchIndex(snapshot_path)
+
+    assert snapshot.document_count == index.document_count
+    assert snapshot.data_version == (20, 2, 2)
+    assert [snapshot.documents[i] for i in range(2)] == index.documents
+
+    expected = search_index(index, query, SearchMode(mode), 10, 0)
+    assert search_index(snapshot, query, SearchMode(mode), 10, 0) == expected
+
+
+def test_memory_search_engine_snapshot_swap(tmp_path: Path) -> None:
+    """Testing main.memory_index.MemorySearchEngine snapshot reloading."""
+    snapshot_path = tmp_path / "search_index.snapshot"
+    write_snapshot(snapshot_path, SearchIndex.from_rows(_ROWS[:1]))
+
+    engine = MemorySearchEngine(refresh_interval=0, snapshot_path=str(snapshot_path))
+    engine.refresh()
+    assert engine.stats()["documents"] == 1
+    generation = engine.stats()["generation"]
+
+    write_snapshot(snapshot_path, SearchIndex.from_rows(_ROWS))
+    engine.refresh()
+    assert engine.stats()["documents"] == 2
+    assert engine.stats()["generation"] != generation
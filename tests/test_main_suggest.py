@@ -0,0 +1,45 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Main Search Query Suggestion Module."""
+
+import pytest
+
+from app.main.suggest import SuggestionIndex
+
+_ROWS: list[dict] = [
+    {
+        "title": "Luke and Andrew Say Hey Gorgle",
+        "album": "TBTL Drops",
+        "artist": "Luke Burbank",
+    },
+    {"title": "In the Year 2525", "album": "Songs", "artist": "Zager and Evans"},
+    {"title": "Andrew Gobble Gobble", "album": "TBTL Drops", "artist": "Andrew Walsh"},
+    {"title": "Gobble", "album": None, "artist": "Andrew Walsh"},
+]
+
+
+@pytest.mark.parametrize(
+    "prefix, expected",
+    [
+        ("andr", ["andrew", "Andrew Walsh", "Andrew Gobble Gobble"]),
+        ("gob", ["gobble"]),
+        ("TBTL", ["tbtl", "TBTL Drops"]),
+        ("luke and", ["Luke and Andrew Say Hey Gorgle"]),
+        ("xyz", []),
+        ("  ", []),
+    ],
+)
+def test_suggestion_index_suggest(prefix: str, expected: list[str]) -> None:
+    """Testing main.suggest.SuggestionIndex.suggest."""
+    index = SuggestionIndex.from_rows(_ROWS, limit=3)
+    assert index.suggest(prefix) == expected
+
+
+def test_suggestion_index_limit() -> None:
+    """Testing main.suggest.SuggestionIndex.suggest with a limit."""
+    index = SuggestionIndex.from_rows(_ROWS, limit=3)
+    assert index.suggest("an", limit=1) == ["andrew"]
+    assert len(index.suggest("an", limit=50)) == 3
@@ -0,0 +1,64 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Pre-rendered Page Module."""
+
+import gzip
+
+import pytest
+from flask.testing import FlaskClient
+from werkzeug.datastructures import Accept
+from werkzeug.test import TestResponse
+
+from app.compression import negotiate_encoding
+
+
+@pytest.mark.parametrize("path", ["/", "/about", "/help"])
+def test_prerendered_page(client: FlaskClient, path: str) -> None:
+    """Testing prerender.prerendered_response."""
+    response: TestResponse = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    # A variation of "Gurgle" is chosen for each request, and conditional
+    # requests are matched against every variation of the page
+    etag = response.headers["ETag"]
+    for _ in range(10):
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"</html>" in gzip.decompress(response.data)
+
+
+def test_prerendered_page_cache(client: FlaskClient) -> None:
+    """Testing prerender.PageCache."""
+    page_cache = client.application.extensions["page_cache"]
+    for _ in range(10):
+        client.get("/about")
+        client.get("/bad-url")
+
+    # Every variation of the about page is rendered by the first request
+    assert page_cache.stats() == {"pages": 5, "renders": 5, "hits": 55}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ([("gzip", 1)], "gzip"),
+        ([("gzip", 0)], None),
+        ([("identity", 1)], None),
+        ([("*", 1)], "gzip"),
+    ],
+)
+def test_negotiate_encoding(
+    accept_encoding: list[tuple[str, float]], expected: str | None
+) -> None:
+    """Testing compression.negotiate_encoding."""
+    assert negotiate_encoding(Accept(accept_encoding), ("gzip",)) == expected
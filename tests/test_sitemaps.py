@@ -5,9 +5,18 @@
 # vim: set noai syntax=python ts=4 sw=4:
 """Testing Sitemaps Module and Views."""
 
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+
 from flask.testing import FlaskClient
 from werkzeug.test import TestResponse
 
+from app import create_app
+from app.sitemaps.clips import build_clip_sitemaps, read_manifest
+from app.sqlite import SQLITE_SCHEMA, SQLiteConnection
+
 
 def test_primary(client: FlaskClient) -> None:
     """Testing sitemaps.primary."""
@@ -18,3 +27,115 @@ def test_primary(client: FlaskClient) -> None:
     assert b"?xml" in response.data
     assert b"urlset" in response.data
     assert b"changefreq" in response.data
+
+
+def _clip_database(database_path: Path, clip_ids: range) -> None:
+    """Create or add clips to a SQLite database used for clip sitemaps."""
+    database = sqlite3.connect(database_path)
+    if not database.execute("SELECT name FROM sqlite_master").fetchall():
+        database.executescript(SQLITE_SCHEMA)
+    database.executemany(
+        "INSERT INTO clips (id, key) VALUES (?, ?)",
+        [(clip_id, f"audio/clip&{clip_id}") for clip_id in clip_ids],
+    )
+    database.executemany(
+        "INSERT INTO tags (id, clip_id, title) VALUES (?, ?, ?)",
+        [(clip_id, clip_id, f"Clip {clip_id}") for clip_id in clip_ids],
+    )
+    database.commit()
+    database.close()
+
+
+def test_build_clip_sitemaps(tmp_path: Path) -> None:
+    """Testing sitemaps.clips.build_clip_sitemaps."""
+    database_path = tmp_path / "mg_clips.sqlite"
+    sitemap_directory = tmp_path / "sitemaps"
+    _clip_database(database_path, range(1, 6))
+
+    manifest = build_clip_sitemaps(
+        SQLiteConnection(str(database_path)),
+        sitemap_directory,
+        "https://example.com/",
+        max_urls=2,
+    )
+    assert [sitemap["count"] for sitemap in manifest["sitemaps"]] == [2, 2, 1]
+    sitemap = gzip.decompress((sitemap_directory / "clips-1.xml.gz").read_bytes())
+    assert b"<loc>https://example.com/clip?key=audio%2Fclip%261</loc>" in sitemap
+    index = gzip.decompress((sitemap_directory / "sitemap-index.xml.gz").read_bytes())
+    assert index.count(b"<sitemap>") == 4
+
+    # Only the last sitemap is rewritten when clips are added
+    first_sitemap = manifest["sitemaps"][0]
+    _clip_database(database_path, range(6, 9))
+    manifest = build_clip_sitemaps(
+        SQLiteConnection(str(database_path)),
+        sitemap_directory,
+        "https://example.com/",
+        max_urls=2,
+    )
+    assert [sitemap["count"] for sitemap in manifest["sitemaps"]] == [2, 2, 2, 2]
+    assert manifest["sitemaps"][0] is not first_sitemap
+    assert manifest["sitemaps"][0] == first_sitemap
+    assert read_manifest(sitemap_directory) == manifest
+
+    # All sitemaps are rebuilt when clips are removed
+    database = sqlite3.connect(database_path)
+    database.execute("DELETE FROM tags WHERE clip_id IN (1, 2, 3)")
+    database.commit()
+    database.close()
+    manifest = build_clip_sitemaps(
+        SQLiteConnection(str(database_path)),
+        sitemap_directory,
+        "https://example.com/",
+        max_urls=2,
+    )
+    assert [sitemap["count"] for sitemap in manifest["sitemaps"]] == [2, 2, 1]
+    assert not (sitemap_directory / "clips-4.xml.gz").exists()
+
+
+def test_clip_sitemaps(tmp_path: Path) -> None:
+    """Testing sitemaps.sitemap_index and sitemaps.clips."""
+    database_path = tmp_path / "mg_clips.sqlite"
+    _clip_database(database_path, range(1, 4))
+    app_settings_path = tmp_path / "app_settings.json"
+    app_settings_path.write_text(
+        json.dumps(
+            {
+                "site_url": "https://example.com",
+                "sitemap_directory": str(tmp_path / "sitemaps"),
+            }
+        ),
+        encoding="utf-8",
+    )
+    database_settings_path = tmp_path / "database_settings.json"
+    database_settings_path.write_text(
+        json.dumps({"backend": "sqlite", "sqlite_path": str(database_path)}),
+        encoding="utf-8",
+    )
+    client = create_app(
+        app_settings_path=str(app_settings_path),
+        database_settings_path=str(database_settings_path),
+    ).test_client()
+
+    response: TestResponse = client.get(
+        "/sitemap-index.xml", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"https://example.com/sitemaps/clips-1.xml" in gzip.decompress(response.data)
+
+    response = client.get("/sitemaps/clips-1.xml")
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.data.count(b"<url>") == 3
+
+    response = client.get(
+        "/sitemaps/clips-1.xml", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+    assert client.get("/sitemaps/clips-2.xml").status_code == 404
+    assert (
+        b"Sitemap: https://example.com/sitemap-index.xml"
+        in client.get("/robots.txt").data
+    )
@@ -0,0 +1,52 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Slow Query Log Module."""
+
+import time
+from pathlib import Path
+
+from app.slow_queries import SlowQueryLog, read_slow_query_log, summarize_slow_queries
+
+
+def test_slow_query_log_record(tmp_path: Path) -> None:
+    """Testing slow_queries.SlowQueryLog.record."""
+    log_path = tmp_path / "slow.log"
+    slow_query_log = SlowQueryLog(
+        log_path=str(log_path), database_settings={}, threshold=0.5, explain_rate=0
+    )
+    slow_query_log.record("SELECT 1", (), 0.1, operation="search")
+    slow_query_log.record(
+        "SELECT %s", ("gobble",), 0.75, operation="search", mode="natural", page=2
+    )
+
+    for _ in range(50):
+        if log_path.exists() and log_path.stat().st_size:
+            break
+        time.sleep(0.02)
+
+    entries = list(read_slow_query_log(str(log_path)))
+    assert len(entries) == 1
+    assert entries[0]["query"] == "SELECT %s"
+    assert entries[0]["parameters"] == ["gobble"]
+    assert entries[0]["elapsed_ms"] == 750
+    assert entries[0]["page"] == 2
+    assert "explain" not in entries[0]
+
+
+def test_summarize_slow_queries() -> None:
+    """Testing slow_queries.summarize_slow_queries."""
+    entries = [
+        {"operation": "search", "mode": "boolean", "query": "Q1", "elapsed_ms": 900},
+        {"operation": "search", "mode": "boolean", "query": "Q1", "elapsed_ms": 700},
+        {"operation": "clip", "query": "Q2", "elapsed_ms": 1200, "explain": "plan"},
+        {"operation": "search", "mode": "expanded", "query": "Q3", "elapsed_ms": 600},
+    ]
+    summary = summarize_slow_queries(iter(entries), limit=2)
+    assert [group["query"] for group in summary] == ["Q1", "Q2"]
+    assert summary[0]["count"] == 2
+    assert summary[0]["total_ms"] == 1600
+    assert summary[0]["max_ms"] == 900
+    assert summary[1]["explain"] == "plan"
@@ -0,0 +1,49 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Status Module and Views."""
+
+from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
+
+
+def test_status(client: FlaskClient) -> None:
+    """Testing status.status."""
+    response: TestResponse = client.get("/status")
+    if not client.application.config["app_settings"]["enable_status"]:
+        assert response.status_code == 404
+        return
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert "database_pool" in response.json
+    assert "key_slug_cache" in response.json
+    assert "checked_out" in response.json["database_pool"]
+    assert "waits" in response.json["database_pool"]
+    assert "wait_time" in response.json["database_pool"]
+
+
+def test_metrics(client: FlaskClient) -> None:
+    """Testing status.metrics."""
+    client.get("/")
+    response: TestResponse = client.get("/metrics")
+    if not client.application.config["app_settings"]["enable_metrics"]:
+        assert response.status_code == 404
+        return
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "mg_search_request_duration_seconds_bucket" in response.text
+
+
+def test_server_timing(client: FlaskClient) -> None:
+    """Testing Server-Timing response header."""
+    response: TestResponse = client.get("/about")
+    if not client.application.config["app_settings"]["enable_server_timing"]:
+        assert "Server-Timing" not in response.headers
+        return
+
+    assert "render;dur=" in response.headers["Server-Timing"]
+    assert "total;dur=" in response.headers["Server-Timing"]
@@ -0,0 +1,101 @@
+# Copyright (c) 2025-2026 Linh Pham
+# search.marsupialgurgle.com is released under the terms of the MIT License
+# SPDX-License-Identifier: MIT
+#
+# vim: set noai syntax=python ts=4 sw=4:
+"""Testing Streamed Template Rendering Module."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from prometheus_client import REGISTRY
+
+
+@pytest.mark.parametrize("search_cache_size", [0, 512])
+def test_streamed_search(
+    sqlite_app: Callable[..., Flask], sqlite_path: Path, search_cache_size: int
+) -> None:
+    """Testing streamed search result pages."""
+    app = sqlite_app(
+        results_per_page=1,
+        search_cache_size=search_cache_size,
+        stream_search_results=True,
+    )
+    client = app.test_client()
+
+    response = client.get("/search", query_string={"query": "andrew"}, buffered=False)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in response.headers
+
+    # The page head and navigation are sent before the search results
+    chunks = list(response.response)
+    response.close()
+    assert len(chunks) == 2
+    assert b"</nav>" in chunks[0]
+    assert b"Andrew" not in chunks[0]
+    assert b'aria-label="Search results pagination"' in chunks[1]
+    assert b"cursor=" in chunks[1]
+    assert b"flush" not in b"".join(chunks)
+
+    # Cached results are rendered without streaming
+    response = client.get("/search", query_string={"query": "andrew"})
+    assert b"Andrew" in response.data
+    if search_cache_size:
+        assert "ETag" in response.headers
+    else:
+        assert response.headers["Cache-Control"] == "no-store"
+
+    response = client.get("/search", query_string={"query": "missing"})
+    assert b"No search results found" in response.data
+
+    sqlite_path.unlink()
+    response = client.get("/search", query_string={"query": "gobble"})
+    assert response.status_code == 200
+    assert b"database server error" in response.data
+    assert b"selected search mode is not available" not in response.data
+
+
+def test_streamed_search_metrics(sqlite_app: Callable[..., Flask]) -> None:
+    """Testing request metrics of streamed search result pages."""
+    app = sqlite_app(
+        enable_metrics=True,
+        enable_server_timing=True,
+        search_cache_size=0,
+        stream_search_results=True,
+    )
+    client = app.test_client()
+
+    def stage_count(stage: str) -> float:
+        return (
+            REGISTRY.get_sample_value(
+                "mg_search_stage_duration_seconds_count", {"stage": stage}
+            )
+            or 0
+        )
+
+    def request_count() -> float:
+        return (
+            REGISTRY.get_sample_value(
+                "mg_search_request_duration_seconds_count",
+                {"route": "/search", "mode": "natural"},
+            )
+            or 0
+        )
+
+    db_queries = stage_count("db-query")
+    requests = request_count()
+
+    # The search runs after the headers have been sent, so the database
+    # query is only recorded once the streamed response has ended
+    response = client.get("/search", query_string={"query": "andrew"}, buffered=False)
+    assert "db-query" not in response.headers["Server-Timing"]
+    assert request_count() == requests
+
+    chunks = list(response.response)
+    response.close()
+    assert b"Andrew" in b"".join(chunks)
+    assert stage_count("db-query") > db_queries
+    assert request_count() == requests + 1